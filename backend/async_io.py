@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import os
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+# Maximum concurrent calls per external dependency
+GEMINI_CONCURRENCY = int(os.getenv('GEMINI_CONCURRENCY', '4'))
+INDEX_CONCURRENCY = int(os.getenv('INDEX_CONCURRENCY', '8'))
+SMTP_CONCURRENCY = int(os.getenv('SMTP_CONCURRENCY', '2'))
+JOBS_CONCURRENCY = int(os.getenv('JOBS_CONCURRENCY', '2'))
+CACHE_CONCURRENCY = int(os.getenv('CACHE_CONCURRENCY', '4'))
+
+class Dependency:
+    """
+    Concurrency budget for one external dependency.
+
+    Blocking calls run on the dependency's own thread pool so a slow service
+    cannot starve the others or the event loop, and a semaphore bounds how many
+    calls are in flight at once (queued callers wait without holding a thread).
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self._executor = None
+        # asyncio primitives belong to one event loop, so keep one per loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.limit,
+                thread_name_prefix=f"{self.name}-io"
+            )
+        return self._executor
+
+    def semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limit)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking call on this dependency's pool and await the result."""
+        async with self.semaphore():
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+            finally:
+                self.in_flight -= 1
+
+    def stats(self):
+        return {"limit": self.limit, "in_flight": self.in_flight}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+gemini = Dependency("gemini", GEMINI_CONCURRENCY)
+index = Dependency("index", INDEX_CONCURRENCY)
+smtp = Dependency("smtp", SMTP_CONCURRENCY)
+jobs = Dependency("jobs", JOBS_CONCURRENCY)
+cache = Dependency("cache", CACHE_CONCURRENCY)
+
+async def run_index(fn, *args, **kwargs):
+    """Run a blocking vector_db call without blocking the event loop"""
+    return await index.run(fn, *args, **kwargs)
+
+async def run_smtp(fn, *args, **kwargs):
+    """Run a blocking SMTP call without blocking the event loop"""
+    return await smtp.run(fn, *args, **kwargs)
+
+async def run_jobs(fn, *args, **kwargs):
+    """Run a blocking job_queue table call without blocking the event loop"""
+    return await jobs.run(fn, *args, **kwargs)
+
+async def run_cache(fn, *args, **kwargs):
+    """Run a blocking summary_cache call without blocking the event loop"""
+    return await cache.run(fn, *args, **kwargs)
+
+async def generate_content(model, prompt, **kwargs):
+    """
+    Await a Gemini generation, bounded by the Gemini concurrency limit.
+
+    Args:
+        model: A google.generativeai GenerativeModel
+        prompt (str): The prompt to send
+
+    Returns:
+        The model response
+    """
+    async with gemini.semaphore():
+        gemini.in_flight += 1
+        try:
+            return await model.generate_content_async(prompt, **kwargs)
+        finally:
+            gemini.in_flight -= 1
+
+async def stream_content(model, prompt, **kwargs):
+    """
+    Stream a Gemini generation, yielding text as it arrives.
+
+    The Gemini concurrency slot is held until the stream is exhausted or closed.
+
+    Args:
+        model: A google.generativeai GenerativeModel
+        prompt (str): The prompt to send
+
+    Yields:
+        str: Partial response text
+    """
+    async with gemini.semaphore():
+        gemini.in_flight += 1
+        try:
+            response = await model.generate_content_async(prompt, stream=True, **kwargs)
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    yield text
+        finally:
+            gemini.in_flight -= 1
+
+def stats():
+    """Return the in-flight count and limit for every dependency"""
+    return {dependency.name: dependency.stats() for dependency in (gemini, index, smtp, jobs, cache)}
+
+def shutdown():
+    """Release the dependency thread pools."""
+    for dependency in (gemini, index, smtp, jobs, cache):
+        dependency.shutdown()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting calls to a rate per minute.
+
+    Up to burst calls may go through at once; after that callers wait for
+    tokens to refill at rate_per_minute / 60 per second.
+    """
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, int(rate_per_minute // 10)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=1.0):
+        """Block until cost tokens are available and take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return
+                delay = (cost - self.tokens) / self.rate
+                self.waited += delay
+            time.sleep(delay)
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    Token bucket whose rate follows the service's capacity: it grows by a
+    tenth of the starting rate after each successful call and halves when the
+    service throttles (additive increase, multiplicative decrease), within
+    min_rate_per_minute and max_rate_per_minute.
+    """
+
+    def __init__(self, rate_per_minute, min_rate_per_minute=None, max_rate_per_minute=None, burst=None):
+        super().__init__(rate_per_minute, burst)
+        self.min_rate = (min_rate_per_minute or rate_per_minute / 16) / 60.0
+        self.max_rate = (max_rate_per_minute or rate_per_minute * 4) / 60.0
+        self.step = self.rate / 10
+        self.throttles = 0
+
+    @property
+    def rate_per_minute(self):
+        return self.rate * 60
+
+    def succeeded(self):
+        """Record a successful call, raising the rate"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+    def throttled(self):
+        """Record a throttled call, halving the rate"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.throttles += 1
+
+def backoff_delay(attempt, base_delay=2.0, max_delay=60.0):
+    """Full-jitter exponential backoff: a random delay up to base_delay * 2**attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class Checkpoint:
+    """
+    Append-only record of finished items, so an interrupted run can resume.
+
+    Each line is a JSON object {"id", "status"}; the last line for an ID wins.
+    Only items recorded as "success" are skipped on resume.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by the interruption
+                    if entry.get("status") == "success":
+                        self.done.add(entry["id"])
+                    else:
+                        self.done.discard(entry["id"])
+
+    def record(self, item_id, status):
+        self.record_many([item_id], status)
+
+    def record_many(self, item_ids, status):
+        """Record the same status for many items with one append"""
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps({"id": item_id, "status": status}) + "\n" for item_id in item_ids))
+            if status == "success":
+                self.done.update(item_ids)
+            else:
+                self.done.difference_update(item_ids)
+
+    def remove(self):
+        """Delete the checkpoint file once a run has completed"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class BatchReport:
+    """Thread-safe progress counters with a throughput summary"""
+
+    def __init__(self, total, label="items"):
+        self.total = total
+        self.label = label
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, counter, count=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            per_minute = self.processed * 60 / elapsed if elapsed > 0 else 0.0
+            remaining = self.total - self.processed - self.failed - self.skipped
+            return {
+                "total": self.total,
+                "processed": self.processed,
+                "failed": self.failed,
+                "retried": self.retried,
+                "skipped": self.skipped,
+                "elapsed_seconds": round(elapsed, 1),
+                "per_minute": round(per_minute, 1),
+                "eta_seconds": round(remaining * 60 / per_minute) if per_minute else None
+            }
+
+    def line(self):
+        stats = self.snapshot()
+        done = stats["processed"] + stats["failed"] + stats["skipped"]
+        eta = f" | ETA {stats['eta_seconds'] // 60}m{stats['eta_seconds'] % 60:02d}s" if stats["eta_seconds"] else ""
+        return (
+            f"Progress: {done}/{stats['total']} {self.label} "
+            f"({stats['processed']} processed, {stats['failed']} failed, "
+            f"{stats['retried']} retried, {stats['skipped']} skipped) | "
+            f"{stats['per_minute']:.1f} {self.label}/min{eta}"
+        )
+
+def run_batch(items, process, workers=4, checkpoint=None, max_retries=3,
+              base_delay=2.0, report_interval=10.0, label="items"):
+    """
+    Process items concurrently with retries, checkpointing and progress reports.
+
+    process(item) should return a dict with "status"; anything but "success"
+    (or an exception) is retried after a jittered exponential backoff, up to
+    max_retries times. Rate limiting is up to process itself, so that work
+    which does not reach the rate-limited service (e.g. cache hits) is not slowed.
+
+    Args:
+        items (list): Item IDs to process
+        process: Callable taking an item ID and returning a status dict
+        workers (int, optional): Number of worker threads
+        checkpoint (Checkpoint, optional): Skip items it records as done and record new results
+        max_retries (int, optional): Retries per item after the first attempt
+        base_delay (float, optional): Backoff base in seconds
+        report_interval (float, optional): Seconds between progress lines
+        label (str, optional): What the items are called in progress lines
+
+    Returns:
+        tuple: (list of per-item results, BatchReport)
+    """
+    report = BatchReport(len(items), label)
+    pending = []
+    for item in items:
+        if checkpoint is not None and item in checkpoint.done:
+            report.add("skipped")
+        else:
+            pending.append(item)
+    if report.skipped:
+        print(f"Resuming from checkpoint: skipping {report.skipped} finished {label}")
+
+    def attempt(item):
+        for attempt_number in range(max_retries + 1):
+            try:
+                result = process(item)
+            except Exception as e:
+                result = {"status": "error", "message": str(e)}
+            if result.get("status") == "success" or attempt_number == max_retries:
+                break
+            report.add("retried")
+            delay = backoff_delay(attempt_number, base_delay)
+            print(f"Retrying {item} in {delay:.1f}s after error: {result.get('message')}")
+            time.sleep(delay)
+
+        result.setdefault("id", item)
+        result["attempts"] = attempt_number + 1
+        report.add("processed" if result.get("status") == "success" else "failed")
+        if checkpoint is not None:
+            checkpoint.record(item, result["status"])
+        return result
+
+    # Print progress from a side thread so slow items do not delay the report
+    finished = threading.Event()
+    def reporter():
+        while not finished.wait(report_interval):
+            print(report.line())
+    reporter_thread = threading.Thread(target=reporter, daemon=True)
+    reporter_thread.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(attempt, pending))
+    finally:
+        finished.set()
+        reporter_thread.join()
+    print(report.line())
+    return results, report
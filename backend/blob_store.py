@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import os
+import zlib
+import hashlib
+import tempfile
+from functools import lru_cache
+
+# Directory holding compressed bodies; point this at a shared volume when
+# several backend processes serve the same index
+BLOB_STORE_DIR = os.getenv(
+    'BLOB_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blobs')
+)
+
+def content_hash(text):
+    """Return the sha256 hex digest used as a body's address"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _blob_path(digest):
+    # Shard by the first two hex characters to keep directories small
+    return os.path.join(BLOB_STORE_DIR, digest[:2], f"{digest}.zz")
+
+def put_blob(text, digest=None):
+    """
+    Store a text body compressed under its content hash.
+
+    Writing the same text twice is a no-op, so callers never need to check
+    whether a body already exists.
+
+    Args:
+        text (str): The body to store
+        digest (str, optional): The body's content hash, if already computed
+
+    Returns:
+        str: The content hash to keep on the vector
+    """
+    digest = digest or content_hash(text)
+    path = _blob_path(digest)
+    if os.path.exists(path):
+        return digest
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = zlib.compress(text.encode('utf-8'), 6)
+
+    # Write to a temp file and rename so readers never see a partial blob
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest
+
+class BlobWriter:
+    """
+    Store a body as it arrives, compressing and hashing it incrementally.
+
+    Data goes to a temp file in the store; commit() moves it under its content
+    hash, so memory use does not depend on the body's size.
+    """
+
+    def __init__(self):
+        os.makedirs(BLOB_STORE_DIR, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=BLOB_STORE_DIR, suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb')
+        self._compressor = zlib.compressobj(6)
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        """Append UTF-8 encoded bytes of the body"""
+        self._hash.update(data)
+        self._file.write(self._compressor.compress(data))
+        self.size += len(data)
+
+    def commit(self):
+        """
+        Finish the body and move it under its content hash.
+
+        Returns:
+            str: The content hash, as put_blob would return for the same text
+        """
+        self._file.write(self._compressor.flush())
+        self._file.close()
+        digest = self._hash.hexdigest()
+        path = _blob_path(digest)
+        if os.path.exists(path):
+            os.remove(self._tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp_path, path)
+        return digest
+
+    def abort(self):
+        """Discard a partially written body"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+@lru_cache(maxsize=64)
+def get_blob(digest):
+    """
+    Load a body by its content hash.
+
+    Bodies are immutable, so recently read ones are kept in a small cache.
+
+    Args:
+        digest (str): Content hash returned by put_blob
+
+    Returns:
+        str: The stored text
+    """
+    with open(_blob_path(digest), 'rb') as f:
+        return zlib.decompress(f.read()).decode('utf-8')
+
+def has_blob(digest):
+    """Check whether a body is present in the store"""
+    return os.path.exists(_blob_path(digest))
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+from transcript_upload import MAX_UPLOAD_BYTES
+
+# Meetings stored per batch by the bulk endpoint; one batch is stored while the next is read
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '256'))
+
+# Longest NDJSON line (one meeting) accepted, in bytes
+MAX_BULK_LINE_BYTES = int(os.getenv('MAX_BULK_LINE_BYTES', str(MAX_UPLOAD_BYTES)))
+
+class LineTooLong(Exception):
+    """An NDJSON line exceeded MAX_BULK_LINE_BYTES"""
+
+async def read_ndjson(chunks, max_line_bytes=None):
+    """
+    Parse an NDJSON stream incrementally, one line at a time.
+
+    Only the current line is buffered, so bodies of any length can be read.
+    Blank lines are skipped; a line that is not valid JSON is reported rather
+    than ending the stream.
+
+    Args:
+        chunks: Async iterable of bytes, e.g. request.stream()
+        max_line_bytes (int, optional): Longest line accepted (default MAX_BULK_LINE_BYTES)
+
+    Yields:
+        tuple: (line number, parsed value or None, error message or None)
+
+    Raises:
+        LineTooLong: If a line exceeds max_line_bytes
+    """
+    max_line_bytes = max_line_bytes or MAX_BULK_LINE_BYTES
+    buffer = bytearray()
+    line_number = 0
+
+    def parse(line):
+        try:
+            return json.loads(line), None
+        except ValueError as e:
+            return None, f"Invalid JSON: {e}"
+
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            line = bytes(buffer[start:end]).strip()
+            start = end + 1
+            if len(line) > max_line_bytes:
+                raise LineTooLong(f"Line {line_number} is longer than {max_line_bytes} bytes")
+            if line:
+                yield (line_number, *parse(line))
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise LineTooLong(f"Line {line_number + 1} is longer than {max_line_bytes} bytes")
+
+    line = bytes(buffer).strip()
+    if line:
+        yield (line_number + 1, *parse(line))
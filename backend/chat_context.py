@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+# Prepared chat contexts stay cached this long after the last question about the meeting
+CHAT_CONTEXT_TTL_SECONDS = int(os.getenv('CHAT_CONTEXT_TTL_SECONDS', '1800'))
+CHAT_CONTEXT_MAX_ENTRIES = int(os.getenv('CHAT_CONTEXT_MAX_ENTRIES', '128'))
+
+# Keep long transcripts in a Gemini cached-content handle instead of retrieving
+# passages for every question; off by default since cached tokens are billed per hour
+CHAT_PROVIDER_CACHE = os.getenv('CHAT_PROVIDER_CACHE', 'false').lower() == 'true'
+CHAT_PROVIDER_CACHE_MIN_CHARS = int(os.getenv('CHAT_PROVIDER_CACHE_MIN_CHARS', '100000'))
+
+# Bounds on the conversation history sent with each question
+CHAT_HISTORY_MAX_CHARS = int(os.getenv('CHAT_HISTORY_MAX_CHARS', '4000'))
+CHAT_HISTORY_TURN_CHARS = int(os.getenv('CHAT_HISTORY_TURN_CHARS', '600'))
+
+class ChatContext:
+    """
+    Everything needed to answer questions about one meeting without reloading it:
+    the transcript, its passage index, the prepared prompt prefix and, when
+    provider caching is used, the cached-content handle and the model bound to it.
+    """
+
+    def __init__(self, transcript, index, prefix, summary_hash=None, cached_content=None, model=None):
+        self.transcript = transcript
+        self.index = index
+        self.prefix = prefix
+        self.summary_hash = summary_hash
+        self.cached_content = cached_content
+        self.model = model
+        self.expires_at = 0.0
+        # The provider expires its cache on a fixed schedule
+        self.provider_expires_at = time.time() + CHAT_CONTEXT_TTL_SECONDS if cached_content else None
+
+    def is_stale(self, now):
+        if self.expires_at <= now:
+            return True
+        # Leave a margin so a question is never sent to an expiring handle
+        return self.provider_expires_at is not None and self.provider_expires_at - 60 <= now
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+def _release(contexts):
+    """Delete provider-side caches of dropped contexts (best effort)"""
+    for context in contexts:
+        if context.cached_content is not None:
+            try:
+                context.cached_content.delete()
+            except Exception as e:
+                print(f"Error deleting cached content: {e}")
+
+def get(meeting_id, transcript_hash, summary_hash=None):
+    """
+    Look up the prepared context of a meeting.
+
+    A hit extends the entry's TTL. Entries built from a different summary are
+    treated as misses, so a regenerated summary is picked up on the next question.
+
+    Args:
+        meeting_id (str): Meeting ID (None for a transcript sent with the question)
+        transcript_hash (str): Hash of the transcript
+        summary_hash (str, optional): Hash of the meeting's current summary
+
+    Returns:
+        ChatContext: The cached context, or None on a miss
+    """
+    key = (meeting_id, transcript_hash)
+    now = time.time()
+    dropped = []
+    with _lock:
+        context = _entries.get(key)
+        if context is not None and (context.is_stale(now) or context.summary_hash != summary_hash):
+            if context.is_stale(now):
+                _counters["expirations"] += 1
+            dropped.append(_entries.pop(key))
+            context = None
+
+        if context is None:
+            _counters["misses"] += 1
+        else:
+            _entries.move_to_end(key)
+            context.expires_at = now + CHAT_CONTEXT_TTL_SECONDS
+            _counters["hits"] += 1
+
+    _release(dropped)
+    return context
+
+def put(meeting_id, transcript_hash, context):
+    """Cache a prepared context, dropping expired and least recently used entries"""
+    key = (meeting_id, transcript_hash)
+    now = time.time()
+    context.expires_at = now + CHAT_CONTEXT_TTL_SECONDS
+    dropped = []
+    with _lock:
+        previous = _entries.pop(key, None)
+        if previous is not None and previous is not context:
+            dropped.append(previous)
+        _entries[key] = context
+
+        for stale_key in [k for k, entry in _entries.items() if entry.is_stale(now)]:
+            dropped.append(_entries.pop(stale_key))
+            _counters["expirations"] += 1
+        while len(_entries) > CHAT_CONTEXT_MAX_ENTRIES:
+            dropped.append(_entries.popitem(last=False)[1])
+            _counters["evictions"] += 1
+
+    _release(dropped)
+
+def use_provider_cache(transcript):
+    """Return True if the transcript should be held in a provider-side cache"""
+    return CHAT_PROVIDER_CACHE and len(transcript) >= CHAT_PROVIDER_CACHE_MIN_CHARS
+
+def create_provider_cache(model_name, system_instruction, transcript):
+    """
+    Create a Gemini cached-content handle holding the transcript.
+
+    Args:
+        model_name (str): Model the cache is created for
+        system_instruction (str): Prepared chat context prompt
+        transcript (str): The full transcript
+
+    Returns:
+        The CachedContent handle, or None if the model or library does not support it
+    """
+    try:
+        from google.generativeai import caching
+        return caching.CachedContent.create(
+            model=model_name,
+            system_instruction=system_instruction,
+            contents=[f"Meeting Transcript:\n{transcript}"],
+            ttl=timedelta(seconds=CHAT_CONTEXT_TTL_SECONDS)
+        )
+    except Exception as e:
+        print(f"Provider context cache unavailable, using passage retrieval: {e}")
+        return None
+
+def compact_history(history):
+    """
+    Render the most recent conversation turns for the prompt.
+
+    Each turn is cut to CHAT_HISTORY_TURN_CHARS and the oldest turns are dropped
+    once CHAT_HISTORY_MAX_CHARS is reached, so long conversations cost a
+    bounded number of tokens per question.
+
+    Args:
+        history (list): Turns as {"role": "user" | "ai", "text": str}, oldest first
+
+    Returns:
+        str: The history block, or an empty string if there is none
+    """
+    lines = []
+    used = 0
+    omitted = False
+    for turn in reversed(history):
+        text = " ".join(turn["text"].split())
+        if not text:
+            continue
+        if len(text) > CHAT_HISTORY_TURN_CHARS:
+            text = text[:CHAT_HISTORY_TURN_CHARS].rstrip() + " ..."
+        line = f"{'User' if turn['role'] == 'user' else 'Assistant'}: {text}"
+        if used + len(line) > CHAT_HISTORY_MAX_CHARS:
+            if lines:
+                omitted = True
+                break
+            # Always keep the latest turn, cut to the budget
+            line = line[:CHAT_HISTORY_MAX_CHARS].rstrip() + " ..."
+        lines.append(line)
+        used += len(line) + 1
+
+    if not lines:
+        return ""
+    lines.reverse()
+    if omitted:
+        lines.insert(0, "(earlier conversation omitted)")
+    return "Conversation so far:\n" + "\n".join(lines) + "\n\n"
+
+def stats():
+    """Return hit/miss counters and the number of cached contexts"""
+    with _lock:
+        lookups = _counters["hits"] + _counters["misses"]
+        return {
+            "entries": len(_entries),
+            "provider_caches": sum(1 for context in _entries.values() if context.cached_content is not None),
+            "hits": _counters["hits"],
+            "misses": _counters["misses"],
+            "hit_ratio": _counters["hits"] / lookups if lookups else 0.0,
+            "evictions": _counters["evictions"],
+            "expirations": _counters["expirations"],
+            "max_entries": CHAT_CONTEXT_MAX_ENTRIES,
+            "ttl_seconds": CHAT_CONTEXT_TTL_SECONDS
+        }
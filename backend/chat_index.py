@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import json
+import math
+import zlib
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+import transcript_parser
+
+# Per-meeting passage indexes, one file per transcript hash
+CHAT_INDEX_DIR = os.getenv(
+    'CHAT_INDEX_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_index')
+)
+
+# Maximum passage length in characters and number of passages sent per question
+CHAT_PASSAGE_SIZE = int(os.getenv('CHAT_PASSAGE_SIZE', '1200'))
+CHAT_TOP_K = int(os.getenv('CHAT_TOP_K', '4'))
+
+# Bump when the index layout or passage splitting changes
+INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can did do does for from had has have how i if in is it
+its me my of on or our so that the their them then there these they this to was we
+were what when where which who why will with you your about any all also just not
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Loaded indexes by transcript hash, least recently used first
+CACHE_SIZE = 64
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def _passage_bounds(transcript, max_chars, parsed):
+    """
+    Split a transcript into passages of whole speaker turns.
+
+    Returns:
+        tuple: (end offset of the header, list of (start, end) passage offsets)
+    """
+    starts = list(parsed.offsets)
+    header_end = parsed.header_end
+    if not starts:
+        # No speaker turns; fall back to paragraphs
+        starts = [0] + [match.end() for match in re.finditer(r'\n\s*\n', transcript)]
+    bounds = starts + [len(transcript)]
+
+    # Cut turns longer than a passage at line breaks
+    units = []
+    for start, end in zip(bounds, bounds[1:]):
+        while end - start > max_chars:
+            cut = transcript.rfind("\n", start + 1, start + max_chars)
+            if cut <= start:
+                cut = start + max_chars
+            units.append((start, cut))
+            start = cut
+        units.append((start, end))
+
+    # Pack consecutive turns into passages
+    passages = []
+    for start, end in units:
+        if passages and end - passages[-1][0] <= max_chars:
+            passages[-1] = (passages[-1][0], end)
+        else:
+            passages.append((start, end))
+    return header_end, passages
+
+def build_index(transcript, parsed=None):
+    """
+    Build the passage index of a transcript.
+
+    Passages are stored as offsets into the transcript together with their
+    term counts, so the index stays small and the text comes from the blob store.
+
+    Args:
+        transcript (str): The meeting transcript
+        parsed (ParsedTranscript, optional): The transcript's structure, if already parsed
+
+    Returns:
+        dict: The index
+    """
+    if parsed is None:
+        parsed = transcript_parser.parse_text(transcript)
+    header_end, passages = _passage_bounds(transcript, CHAT_PASSAGE_SIZE, parsed)
+    terms = [Counter(tokenize(transcript[start:end])) for start, end in passages]
+    return {
+        "version": INDEX_VERSION,
+        "passage_size": CHAT_PASSAGE_SIZE,
+        "header_end": header_end,
+        "passages": passages,
+        "terms": [dict(counts) for counts in terms],
+        "lengths": [sum(counts.values()) for counts in terms]
+    }
+
+def _index_path(transcript_hash):
+    return os.path.join(CHAT_INDEX_DIR, transcript_hash[:2], f"{transcript_hash}.json.zz")
+
+def save_index(transcript_hash, index):
+    """Write an index atomically under its transcript's hash"""
+    path = _index_path(transcript_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = zlib.compress(json.dumps(index, separators=(",", ":")).encode("utf-8"), 6)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _cache_put(transcript_hash, index):
+    with _cache_lock:
+        _cache[transcript_hash] = index
+        _cache.move_to_end(transcript_hash)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def load_index(transcript_hash):
+    """
+    Load the index of a transcript, or None if it has not been built.
+
+    Transcripts are immutable, so loaded indexes are kept in a small LRU cache
+    keyed by transcript hash. Misses are not cached, so an index built later
+    is found without evicting the others.
+    """
+    with _cache_lock:
+        index = _cache.get(transcript_hash)
+        if index is not None:
+            _cache.move_to_end(transcript_hash)
+            return index
+    path = _index_path(transcript_hash)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        index = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+    if index.get("version") != INDEX_VERSION or index.get("passage_size") != CHAT_PASSAGE_SIZE:
+        return None
+    _cache_put(transcript_hash, index)
+    return index
+
+def ensure_index(transcript_hash, transcript, parsed=None):
+    """
+    Return the index of a stored transcript, building and saving it if needed.
+
+    Args:
+        transcript_hash (str): Blob store hash of the transcript
+        transcript (str): The transcript
+        parsed (ParsedTranscript, optional): The transcript's structure, if already parsed
+
+    Returns:
+        dict: The index
+    """
+    index = load_index(transcript_hash)
+    if index is None:
+        index = build_index(transcript, parsed)
+        save_index(transcript_hash, index)
+        _cache_put(transcript_hash, index)
+    return index
+
+def retrieve(index, query, top_k=None):
+    """
+    Rank passages against a question with BM25.
+
+    Args:
+        index (dict): Index from build_index
+        query (str): The question
+        top_k (int, optional): Number of passages to return (default CHAT_TOP_K)
+
+    Returns:
+        list: Indices of the selected passages, in transcript order
+    """
+    top_k = top_k or CHAT_TOP_K
+    count = len(index["passages"])
+    if count <= top_k:
+        return list(range(count))
+
+    query_terms = set(tokenize(query))
+    average_length = (sum(index["lengths"]) / count) or 1.0
+    idf = {}
+    for term in query_terms:
+        document_frequency = sum(1 for terms in index["terms"] if term in terms)
+        idf[term] = math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    scores = []
+    for position, (terms, length) in enumerate(zip(index["terms"], index["lengths"])):
+        score = 0.0
+        for term in query_terms:
+            frequency = terms.get(term)
+            if not frequency:
+                continue
+            score += idf[term] * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average_length))
+        scores.append((score, position))
+
+    # Questions matching nothing (e.g. "what happened?") get the opening passages
+    if not any(score for score, _ in scores):
+        return list(range(top_k))
+
+    best = sorted(scores, key=lambda item: (-item[0], item[1]))[:top_k]
+    return sorted(position for score, position in best if score > 0)
+
+def build_context(transcript, index, query, top_k=None):
+    """
+    Return the transcript header and the passages most relevant to the question.
+
+    Returns:
+        tuple: (header text, list of passage texts in transcript order)
+    """
+    header = transcript[:index["header_end"]].strip()
+    passages = [
+        transcript[start:end].strip()
+        for start, end in (index["passages"][position] for position in retrieve(index, query, top_k))
+    ]
+    return header, passages
@@ -4,6 +4,7 @@
 import os
 from pinecone import Pinecone
 from dotenv import load_dotenv
+from blob_store import get_blob
 import argparse
 import json
 
@@ -77,8 +78,10 @@ def check_index(namespace=NAMESPACE, limit=100):
                 print(f"  Attendees: {match.metadata.get('attendees', 'N/A')}")
                 
                 # Print summary if available
-                if 'summary' in match.metadata:
-                    summary = match.metadata['summary']
+                summary = match.metadata.get('summary')
+                if summary is None and match.metadata.get('summary_hash'):
+                    summary = get_blob(match.metadata['summary_hash'])
+                if summary:
                     print(f"  Summary: {summary[:200]}..." if len(summary) > 200 else f"  Summary: {summary}")
         
         print(f"\nTotal: {len(query_response.matches)} vectors listed")
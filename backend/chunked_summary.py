@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import asyncio
+import summary_cache
+import transcript_parser
+from prompts import (
+    SUMMARY_PROMPT_VERSION,
+    CHUNK_SUMMARY_PROMPT, CHUNK_SUMMARY_PROMPT_VERSION,
+    MERGE_SUMMARY_PROMPT, MERGE_SUMMARY_PROMPT_VERSION,
+    REDUCE_SUMMARY_PROMPT, REDUCE_SUMMARY_PROMPT_VERSION
+)
+
+# Transcripts longer than this many characters are summarized chunk by chunk
+SUMMARY_CHUNK_THRESHOLD = int(os.getenv('SUMMARY_CHUNK_THRESHOLD', '40000'))
+
+# Maximum size of each chunk in characters
+SUMMARY_CHUNK_SIZE = int(os.getenv('SUMMARY_CHUNK_SIZE', '12000'))
+
+# Cache version of a map-reduce summary; changes whenever any stage's prompt does
+MAP_REDUCE_PROMPT_VERSION = "+".join(
+    (CHUNK_SUMMARY_PROMPT_VERSION, MERGE_SUMMARY_PROMPT_VERSION, REDUCE_SUMMARY_PROMPT_VERSION)
+)
+
+def needs_chunking(transcript):
+    """Return True if the transcript is too long for a single summary call"""
+    return len(transcript) > SUMMARY_CHUNK_THRESHOLD
+
+def prompt_version(transcript):
+    """Return the prompt version the transcript's summary is cached under"""
+    return MAP_REDUCE_PROMPT_VERSION if needs_chunking(transcript) else SUMMARY_PROMPT_VERSION
+
+def _split_turns(transcript, parsed=None):
+    """
+    Split a transcript into its header and speaker turns.
+
+    Transcripts without speaker turns are split into paragraphs instead.
+    """
+    if parsed is None:
+        parsed = transcript_parser.parse_text(transcript)
+    if not len(parsed):
+        return "", [paragraph.strip() for paragraph in re.split(r'\n\s*\n', transcript) if paragraph.strip()]
+
+    header = transcript[:parsed.header_end].strip()
+    turns = [transcript[start:end].strip() for start, end in parsed.turn_bounds()]
+    return header, [turn for turn in turns if turn]
+
+def _split_long_turn(turn, max_chars):
+    """Split a turn longer than max_chars on line boundaries, cutting lines that are still too long"""
+    pieces = []
+    current = ""
+    for line in turn.split("\n"):
+        while len(line) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + 1 + len(line) > max_chars:
+            pieces.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_transcript(transcript, max_chars=None, parsed=None):
+    """
+    Split a transcript into chunks of whole speaker turns.
+
+    Every chunk starts with the transcript header (meeting name, date and
+    participants) so it can be summarized on its own. A single turn longer than
+    a chunk is split on line boundaries.
+
+    Args:
+        transcript (str): The meeting transcript
+        max_chars (int): Maximum chunk length (default SUMMARY_CHUNK_SIZE)
+        parsed (ParsedTranscript, optional): The transcript's structure, if already parsed
+
+    Returns:
+        list: The chunks, in transcript order
+    """
+    max_chars = max_chars or SUMMARY_CHUNK_SIZE
+    header, turns = _split_turns(transcript, parsed)
+
+    # Drop a header that would crowd out the turns themselves
+    if len(header) > max_chars // 4:
+        header = ""
+    budget = max_chars - len(header) - 2 if header else max_chars
+
+    groups = []
+    current = []
+    size = 0
+    for turn in turns:
+        for piece in (_split_long_turn(turn, budget) if len(turn) > budget else [turn]):
+            if current and size + 2 + len(piece) > budget:
+                groups.append(current)
+                current = []
+                size = 0
+            size += len(piece) + (2 if current else 0)
+            current.append(piece)
+    if current:
+        groups.append(current)
+
+    return ["\n\n".join(([header] if header else []) + group) for group in groups]
+
+def _join_summaries(summaries):
+    return "\n\n".join(f"Part {part}:\n{summary.strip()}" for part, summary in enumerate(summaries, 1))
+
+def _group_summaries(summaries, max_chars):
+    """Group consecutive summaries up to about max_chars, at least two per group"""
+    groups = []
+    current = []
+    size = 0
+    for summary in summaries:
+        if len(current) >= 2 and size + len(summary) > max_chars:
+            groups.append(current)
+            current = []
+            size = 0
+        current.append(summary)
+        size += len(summary)
+    if current:
+        groups.append(current)
+    return groups
+
+async def _cached_generate(prompt, prompt_version, model_name, generate):
+    return await summary_cache.get_or_generate_async(
+        prompt, prompt_version, model_name, lambda: generate(prompt)
+    )
+
+async def summarize_chunks(chunks, generate, model_name):
+    """
+    Summarize chunks concurrently (the map step).
+
+    Chunk summaries are cached, so a transcript that shares chunks with an
+    earlier one only pays for the chunks that changed.
+
+    Args:
+        chunks (list): Chunks from split_transcript
+        generate: Async callable taking a prompt and returning the model's text
+        model_name (str): Model name used in the cache key
+
+    Returns:
+        list: One summary per chunk, in order
+    """
+    total = len(chunks)
+    return list(await asyncio.gather(*(
+        _cached_generate(
+            CHUNK_SUMMARY_PROMPT.format(part=part, total=total, transcript=chunk),
+            CHUNK_SUMMARY_PROMPT_VERSION,
+            model_name,
+            generate
+        )
+        for part, chunk in enumerate(chunks, 1)
+    )))
+
+async def build_reduce_prompt(summaries, generate, model_name):
+    """
+    Build the final reduce prompt from chunk summaries.
+
+    While the combined summaries are longer than SUMMARY_CHUNK_THRESHOLD they are
+    merged level by level, in groups of about SUMMARY_CHUNK_SIZE.
+
+    Returns:
+        str: The prompt for the final summary
+    """
+    while len(summaries) > 1 and len(_join_summaries(summaries)) > SUMMARY_CHUNK_THRESHOLD:
+        summaries = list(await asyncio.gather(*(
+            _cached_generate(
+                MERGE_SUMMARY_PROMPT.format(summaries=_join_summaries(group)),
+                MERGE_SUMMARY_PROMPT_VERSION,
+                model_name,
+                generate
+            )
+            for group in _group_summaries(summaries, SUMMARY_CHUNK_SIZE)
+        )))
+    return REDUCE_SUMMARY_PROMPT.format(summaries=_join_summaries(summaries))
+
+async def map_reduce_summary(transcript, generate, model_name, parsed=None):
+    """
+    Summarize a long transcript by summarizing its chunks concurrently
+    and merging the chunk summaries in a final reduce call.
+
+    Args:
+        transcript (str): The meeting transcript
+        generate: Async callable taking a prompt and returning the model's text
+        model_name (str): Model name used in the cache keys
+        parsed (ParsedTranscript, optional): The transcript's structure, if already parsed
+
+    Returns:
+        str: The meeting summary
+    """
+    chunks = split_transcript(transcript, parsed=parsed)
+    print(f"Summarizing transcript of {len(transcript)} characters in {len(chunks)} chunks")
+    summaries = await summarize_chunks(chunks, generate, model_name)
+    return await generate(await build_reduce_prompt(summaries, generate, model_name))
@@ -10,9 +10,11 @@ from vector_db import (
     store_meeting,
     search_meetings,
     retrieve_meeting,
+    get_meeting_body,
     DEFAULT_NAMESPACE
 )
 from process_transcripts import summarize_transcript
+import transcript_parser
 
 # Load environment variables
 load_dotenv()
@@ -31,23 +33,14 @@ def upload_meeting_from_file(file_path, namespace=DEFAULT_NAMESPACE):
     print(f"Reading transcript from {file_path}...")
     
     try:
-        with open(file_path, 'r') as f:
-            transcript = f.read()
+        transcript, parsed = transcript_parser.parse_file(file_path)
         
         # Extract meeting name from file name
         meeting_name = os.path.basename(file_path).replace('.txt', '').replace('_', ' ').title()
         
-        # Parse meeting metadata from the transcript
-        meeting_date = None
-        attendees = []
-        
-        lines = transcript.split('\n')
-        for line in lines[:10]:  # Look at first 10 lines for metadata
-            if "Meeting Date:" in line:
-                meeting_date = line.split("Meeting Date:")[1].strip()
-            elif "Participants:" in line:
-                participants = line.split("Participants:")[1].strip()
-                attendees = [email.strip() + "@example.com" for email in participants.split(',')]
+        # Meeting metadata comes from the transcript header
+        meeting_date = parsed.meeting_date
+        attendees = transcript_parser.meeting_info(parsed)["attendees"]
         
         if not meeting_date:
             meeting_date = "2025-05-01T00:00:00"  # Default date if not found
@@ -65,7 +58,8 @@ def upload_meeting_from_file(file_path, namespace=DEFAULT_NAMESPACE):
             meeting_name=meeting_name,
             meeting_date=meeting_date,
             attendees=attendees,
-            namespace=namespace
+            namespace=namespace,
+            parsed=parsed
         )
         
         if result["status"] == "success":
@@ -165,8 +159,8 @@ def search_for_information(query, namespace=DEFAULT_NAMESPACE, top_k=3):
         print(f"   Date: {meeting['metadata']['meeting_date']}")
         
         # Print a snippet of the summary if available
-        if "summary" in meeting["metadata"]:
-            summary = meeting["metadata"]["summary"]
+        summary = get_meeting_body(meeting["metadata"], "summary")
+        if summary:
             print(f"   Summary: {summary[:200]}..." if len(summary) > 200 else f"   Summary: {summary}")
         
         # Print relevant topics if available
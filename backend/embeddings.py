@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from blob_store import content_hash
+
+EMBEDDING_DIMENSION = 768
+
+# Embedding provider: "hash" (default, hash-seeded random vectors) or "lexical"
+# (hashed word and character n-grams, see lexical_embeddings.py). Vectors from
+# different providers are not comparable, so re-embed stored meetings after switching.
+EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'hash').lower()
+
+# Embeddings kept in memory, keyed by the content hash of the text
+EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '4096'))
+
+# Texts generated per vectorized batch
+EMBEDDING_BATCH_SIZE = 256
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_counters = {"hits": 0, "misses": 0}
+
+# Each thread reseeds its own generator, so concurrent callers never share RNG state
+_local = threading.local()
+
+def _generator():
+    generator = getattr(_local, "generator", None)
+    if generator is None:
+        generator = _local.generator = np.random.RandomState()
+    return generator
+
+def _seed(text):
+    # First four bytes of the md5, as the original get_embedding seeded np.random
+    return int.from_bytes(hashlib.md5(text.encode()).digest()[:4], byteorder='big') % (2**32 - 1)
+
+class HashEmbedder:
+    """Hash-seeded random vectors: deterministic per text, but carry no meaning"""
+
+    name = "hash"
+    version = "1"
+
+    def __init__(self, dimension=EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    def embed_batch(self, texts):
+        """
+        Generate the hash-seeded embeddings of texts as a float32 array.
+
+        Values match the original per-text np.random.uniform(-1, 1) vectors, so
+        vectors already in the index stay comparable.
+        """
+        generator = _generator()
+        samples = np.empty((len(texts), self.dimension), dtype=np.float64)
+        for row, text in enumerate(texts):
+            generator.seed(_seed(text))
+            samples[row] = generator.random_sample(self.dimension)
+        # uniform(-1, 1) is -1 + 2 * sample, computed for the whole batch at once
+        samples *= 2
+        samples -= 1
+        return samples.astype(np.float32)
+
+def _lexical_embedder():
+    import lexical_embeddings
+    return lexical_embeddings.load_embedder(EMBEDDING_DIMENSION)
+
+# Registry of embedding models by id. Every stored vector records the id and
+# version of the model that produced it (see model_metadata), so vectors from
+# another model can be found and re-embedded with reembed.py.
+PROVIDERS = {
+    "hash": HashEmbedder,
+    "lexical": _lexical_embedder
+}
+
+# Metadata keys recording the model behind a stored vector
+MODEL_KEY = "embedding_model"
+VERSION_KEY = "embedding_version"
+
+# Vectors stored before models were recorded all came from the hash embedder
+LEGACY_MODEL = {MODEL_KEY: "hash", VERSION_KEY: "1"}
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+def get_provider(name=None):
+    """Return an embedding provider by id (default EMBEDDING_PROVIDER)"""
+    name = (name or EMBEDDING_PROVIDER).lower()
+    with _providers_lock:
+        if name not in _providers:
+            if name not in PROVIDERS:
+                raise ValueError(f"Unknown embedding provider: {name}. Known providers: {', '.join(PROVIDERS)}")
+            _providers[name] = PROVIDERS[name]()
+        return _providers[name]
+
+def model_metadata():
+    """Return the metadata identifying the current embedding model, to store with each vector"""
+    provider = get_provider()
+    return {MODEL_KEY: provider.name, VERSION_KEY: provider.version}
+
+def is_current(metadata):
+    """Return True if a stored vector was produced by the current embedding model"""
+    current = model_metadata()
+    if MODEL_KEY not in metadata:
+        return current == LEGACY_MODEL
+    return all(metadata.get(key) == value for key, value in current.items())
+
+def meeting_text(transcript, summary=None):
+    """Text a meeting's vector embeds: the transcript followed by the summary"""
+    return f"{transcript} {summary}" if summary else transcript
+
+def embed_many(texts):
+    """
+    Embed texts in batches.
+
+    Repeated texts, within the call or seen recently, are served from an LRU
+    cache keyed by content hash. Safe to call from several threads.
+
+    Args:
+        texts (list): Texts to embed
+
+    Returns:
+        numpy.ndarray: float32 array of shape (len(texts), EMBEDDING_DIMENSION)
+    """
+    provider = get_provider()
+    result = np.empty((len(texts), EMBEDDING_DIMENSION), dtype=np.float32)
+    keys = [(provider.name, provider.version, content_hash(text)) for text in texts]
+
+    missing = OrderedDict()  # key -> rows needing it, so duplicates are generated once
+    with _lock:
+        for row, key in enumerate(keys):
+            cached = _cache.get(key)
+            if cached is None:
+                missing.setdefault(key, []).append(row)
+            else:
+                _cache.move_to_end(key)
+                result[row] = cached
+        _counters["hits"] += len(keys) - sum(len(rows) for rows in missing.values())
+        _counters["misses"] += sum(len(rows) for rows in missing.values())
+
+    pending = list(missing.items())
+    for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+        batch = pending[start:start + EMBEDDING_BATCH_SIZE]
+        vectors = provider.embed_batch([texts[rows[0]] for _, rows in batch])
+        with _lock:
+            for (key, rows), vector in zip(batch, vectors):
+                result[rows] = vector
+                # Copy so a cached row does not keep its whole batch alive
+                vector = vector.copy()
+                vector.flags.writeable = False
+                _cache[key] = vector
+            while len(_cache) > EMBEDDING_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return result
+
+def embed(text):
+    """Embed one text; returns a float32 vector of EMBEDDING_DIMENSION values"""
+    return embed_many([text])[0]
+
+def stats():
+    """Return cache hit/miss counters and size"""
+    with _lock:
+        lookups = _counters["hits"] + _counters["misses"]
+        return {
+            "provider": EMBEDDING_PROVIDER,
+            "entries": len(_cache),
+            "max_entries": EMBEDDING_CACHE_SIZE,
+            "hits": _counters["hits"],
+            "misses": _counters["misses"],
+            "hit_ratio": _counters["hits"] / lookups if lookups else 0.0
+        }
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+from datetime import datetime
+
+# How often the background refresher re-reads the index stats (seconds)
+STATS_REFRESH_SECONDS = float(os.getenv('INDEX_STATS_REFRESH_SECONDS', '30'))
+
+# Size of the connection pool shared by all data-plane calls
+POOL_THREADS = int(os.getenv('PINECONE_POOL_THREADS', '4'))
+
+class IndexSession:
+    """
+    Long-lived handle to a single Pinecone index.
+
+    The index host is resolved once per process and the same data-plane client
+    (and its HTTP connection pool) is reused by every call. Health and stats
+    probes run on a background thread and callers read the cached result, so the
+    request path never pays for a describe_index_stats() round trip.
+    """
+
+    def __init__(self, pc, index_name, refresh_seconds=STATS_REFRESH_SECONDS):
+        self.pc = pc
+        self.index_name = index_name
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._index = None
+        self._stats = None
+        self._checked_at = None
+        self._healthy = None
+        self._last_error = None
+        self._stop = threading.Event()
+        self._refresher = None
+
+    @property
+    def index(self):
+        """The shared index handle, opened on first use."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._open()
+        return self._index
+
+    def _open(self):
+        # Resolve the host once; pc.Index(name) would otherwise hit the
+        # control plane again every time a handle is created
+        host = self.pc.describe_index(self.index_name).host
+        print(f"Opening index {self.index_name} at {host} (pool_threads={POOL_THREADS})")
+        return self.pc.Index(host=host, pool_threads=POOL_THREADS)
+
+    def refresh(self):
+        """
+        Probe the index once and update the cached stats and health.
+
+        Returns:
+            The fresh stats, or None if the probe failed
+        """
+        try:
+            stats = self.index.describe_index_stats()
+            with self._lock:
+                self._stats = stats
+                self._healthy = True
+                self._last_error = None
+                self._checked_at = time.time()
+            return stats
+        except Exception as e:
+            print(f"Index health check failed for {self.index_name}: {e}")
+            with self._lock:
+                self._healthy = False
+                self._last_error = str(e)
+                self._checked_at = time.time()
+            return None
+
+    def stats(self):
+        """
+        Return the cached index stats, probing synchronously only if nothing
+        has been cached yet.
+        """
+        if self._stats is None:
+            self.refresh()
+        return self._stats
+
+    def health(self):
+        """
+        Return the result of the most recent background probe.
+
+        Returns:
+            dict: Health status without touching the network
+        """
+        checked_at = self._checked_at
+        return {
+            "index_name": self.index_name,
+            "healthy": self._healthy,
+            "last_checked": datetime.fromtimestamp(checked_at).isoformat() if checked_at else None,
+            "last_error": self._last_error,
+            "refresh_seconds": self.refresh_seconds
+        }
+
+    def start_refresher(self):
+        """Start the background thread that keeps stats and health current."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop,
+            name=f"index-refresher-{self.index_name}",
+            daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refresher(self):
+        """Stop the background refresher if it is running."""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refresh_seconds)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+import async_io
+
+# Persistent job table; jobs survive restarts and are picked up again on startup
+JOB_QUEUE_DB = os.getenv(
+    'JOB_QUEUE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db')
+)
+
+# Number of jobs processed concurrently by this process
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+
+# Failed jobs are retried after JOB_RETRY_DELAY_SECONDS * attempts, up to JOB_MAX_ATTEMPTS runs
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_DELAY_SECONDS = float(os.getenv('JOB_RETRY_DELAY_SECONDS', '5'))
+
+# A running job not updated for this long is assumed lost with a crashed process
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '900'))
+
+# How often a running job's updated_at is refreshed, so long jobs never look stale
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', '60'))
+
+STATUSES = ["queued", "running", "succeeded", "failed"]
+
+_lock = threading.Lock()
+_conn = None
+
+# Per-process state: handlers by job kind and partial output of running jobs.
+# Job inputs live in the payload (e.g. a blob hash), never in process memory,
+# so a backlog of queued jobs costs only its table rows.
+_handlers = {}
+_progress = {}
+_queue = None
+_workers = []
+
+def _connection():
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(JOB_QUEUE_DB, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                meeting_id TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, created_at)")
+        conn.commit()
+        _conn = conn
+    return _conn
+
+def _job(row):
+    job_id, kind, meeting_id, payload, status, attempts, error, result, created_at, updated_at = row
+    return {
+        "job_id": job_id,
+        "kind": kind,
+        "meeting_id": meeting_id,
+        "payload": json.loads(payload),
+        "status": status,
+        "attempts": attempts,
+        "error": error,
+        "result": json.loads(result) if result else None,
+        "created_at": created_at,
+        "updated_at": updated_at
+    }
+
+def create_job(kind, meeting_id, payload):
+    """
+    Record a new queued job.
+
+    Args:
+        kind (str): Job kind, selecting the registered handler
+        meeting_id (str): Meeting the job works on
+        payload (dict): JSON-serializable job arguments
+
+    Returns:
+        str: The job ID
+    """
+    job_id = str(uuid.uuid4())
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT INTO jobs (job_id, kind, meeting_id, payload, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, meeting_id, json.dumps(payload), now, now)
+        )
+        conn.commit()
+    return job_id
+
+def get_job(job_id):
+    """
+    Return a job, or None if there is no such job.
+
+    Running jobs started by this process include the partial output their
+    handler has reported so far under "progress".
+    """
+    with _lock:
+        row = _connection().execute(
+            "SELECT job_id, kind, meeting_id, payload, status, attempts, error, result, created_at, updated_at "
+            "FROM jobs WHERE job_id = ?",
+            (job_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    job = _job(row)
+    if job["status"] == "running":
+        job["progress"] = _progress.get(job_id)
+    return job
+
+def set_progress(job_id, progress):
+    """Report the partial output of a running job"""
+    _progress[job_id] = progress
+
+def _claim(job_id):
+    """Mark a job running if it is queued (or stale), so only one worker runs it"""
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? "
+            "WHERE job_id = ? AND (status = 'queued' OR (status = 'running' AND updated_at < ?))",
+            (now, job_id, now - JOB_STALE_SECONDS)
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+def _heartbeat(job_id):
+    """Refresh a running job's updated_at, showing its worker is still alive"""
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND status = 'running'",
+            (time.time(), job_id)
+        )
+        conn.commit()
+
+async def _keep_alive(job_id):
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        await async_io.run_jobs(_heartbeat, job_id)
+
+def _finish(job_id, status, error=None, result=None):
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, result = ?, updated_at = ? WHERE job_id = ?",
+            (status, error, json.dumps(result) if result is not None else None, time.time(), job_id)
+        )
+        conn.commit()
+
+def recoverable_jobs():
+    """Return IDs of queued jobs and of running jobs whose process has gone away, oldest first"""
+    with _lock:
+        rows = _connection().execute(
+            "SELECT job_id FROM jobs WHERE status = 'queued' OR (status = 'running' AND updated_at < ?) "
+            "ORDER BY created_at",
+            (time.time() - JOB_STALE_SECONDS,)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+def register(kind, handler):
+    """
+    Register the handler of a job kind.
+
+    The handler is an async callable taking the job dict and returning a
+    JSON-serializable result. Raising marks the attempt as failed.
+    """
+    _handlers[kind] = handler
+
+async def submit(kind, meeting_id, payload):
+    """
+    Create a job and queue it for this process's workers.
+
+    The job row is written on the async_io jobs pool, off the event loop.
+
+    Args:
+        kind (str): Job kind
+        meeting_id (str): Meeting the job works on
+        payload (dict): JSON-serializable job arguments, enough to run the job after a restart
+
+    Returns:
+        str: The job ID
+    """
+    job_id = await async_io.run_jobs(create_job, kind, meeting_id, payload)
+    _queue.put_nowait(job_id)
+    return job_id
+
+async def _run(job_id):
+    if not await async_io.run_jobs(_claim, job_id):
+        return
+    job = await async_io.run_jobs(get_job, job_id)
+    handler = _handlers.get(job["kind"])
+    if handler is None:
+        await async_io.run_jobs(_finish, job_id, "failed", error=f"No handler for job kind {job['kind']}")
+        return
+
+    keep_alive = asyncio.create_task(_keep_alive(job_id))
+    try:
+        result = await handler(job)
+    except asyncio.CancelledError:
+        # Shutting down; leave the job for the next start. Written inline so
+        # it is not lost if the loop stops before a pool call would finish
+        _finish(job_id, "queued")
+        raise
+    except Exception as e:
+        print(f"Job {job_id} ({job['kind']}) failed on attempt {job['attempts']}: {str(e)}")
+        if job["attempts"] < JOB_MAX_ATTEMPTS:
+            await async_io.run_jobs(_finish, job_id, "queued", error=str(e))
+            asyncio.get_running_loop().call_later(
+                JOB_RETRY_DELAY_SECONDS * job["attempts"], _queue.put_nowait, job_id
+            )
+            return
+        await async_io.run_jobs(_finish, job_id, "failed", error=str(e))
+    else:
+        await async_io.run_jobs(_finish, job_id, "succeeded", result=result)
+    finally:
+        keep_alive.cancel()
+        _progress.pop(job_id, None)
+
+async def _work():
+    while True:
+        job_id = await _queue.get()
+        try:
+            await _run(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error running job {job_id}: {str(e)}")
+        finally:
+            _queue.task_done()
+
+async def start(workers=None):
+    """Start the worker pool and requeue jobs left over from a previous run"""
+    global _queue, _workers
+    _queue = asyncio.Queue()
+    for job_id in await async_io.run_jobs(recoverable_jobs):
+        _queue.put_nowait(job_id)
+    if _queue.qsize():
+        print(f"Resuming {_queue.qsize()} unfinished jobs")
+    _workers = [asyncio.create_task(_work()) for _ in range(workers or JOB_WORKERS)]
+
+async def stop():
+    """Stop the workers; jobs they were running are queued again for the next start"""
+    global _workers
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers = []
+
+def stats():
+    """Return job counts by status and the number of jobs waiting for a worker"""
+    with _lock:
+        counts = dict(_connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    return {
+        **{status: counts.get(status, 0) for status in STATUSES},
+        "waiting": _queue.qsize() if _queue is not None else 0,
+        "workers": len(_workers)
+    }
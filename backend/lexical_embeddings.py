@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import hashlib
+import argparse
+import threading
+import numpy as np
+from chat_index import STOPWORDS
+
+# Optional document-frequency table fitted on the stored transcripts; without
+# it every feature gets the same IDF
+LEXICAL_IDF_PATH = os.getenv(
+    'LEXICAL_IDF_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexical_idf.npz')
+)
+
+# Character n-gram lengths and the weight of each feature family in the final vector
+CHAR_NGRAMS = (3, 4, 5)
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.3
+CHAR_WEIGHT = 0.3
+
+# Features are hashed into this many buckets for document frequencies,
+# then folded into the embedding dimension
+IDF_BUCKETS = 2 ** 18
+
+_P = np.uint64(1099511628211)  # Polynomial hash base (odd, so invertible mod 2**64)
+_P_INVERSE = np.uint64(pow(int(_P), -1, 2 ** 64))
+_SALTS = {
+    "word": np.uint64(0x9E3779B97F4A7C15),
+    "bigram": np.uint64(0xC2B2AE3D27D4EB4F),
+    **{n: np.uint64(0x165667B19E3779F9 * n % 2 ** 64) for n in CHAR_NGRAMS}
+}
+
+# Bytes that belong to tokens: ASCII letters and digits, plus any UTF-8
+# multi-byte sequence so accented and non-Latin words stay whole
+_TOKEN_BYTES = np.zeros(256, dtype=bool)
+_TOKEN_BYTES[ord('a'):ord('z') + 1] = True
+_TOKEN_BYTES[ord('0'):ord('9') + 1] = True
+_TOKEN_BYTES[128:] = True
+
+_powers_lock = threading.Lock()
+_powers = np.ones(1, dtype=np.uint64)
+_inverse_powers = np.ones(1, dtype=np.uint64)
+
+def _power_tables(length):
+    """Return P**i and P**-i mod 2**64 for i < length, growing the cached tables as needed"""
+    global _powers, _inverse_powers
+    with _powers_lock:
+        if len(_powers) < length:
+            size = max(length, 2 * len(_powers))
+            with np.errstate(over='ignore'):
+                _powers = np.concatenate(([np.uint64(1)], np.cumprod(np.full(size - 1, _P, dtype=np.uint64))))
+                _inverse_powers = np.concatenate(
+                    ([np.uint64(1)], np.cumprod(np.full(size - 1, _P_INVERSE, dtype=np.uint64)))
+                )
+        return _powers[:length], _inverse_powers[:length]
+
+def _mix(values):
+    """splitmix64 finalizer, spreading polynomial hashes over all 64 bits"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def _token_hashes(data):
+    """Hash every token of a lowercased UTF-8 byte array in one vectorized pass"""
+    mask = _TOKEN_BYTES[data]
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if not len(starts):
+        return np.empty(0, dtype=np.uint64), mask
+
+    # Prefix sums of b[i] * P**i give each token's hash as a difference,
+    # shifted back to position 0 by P**-start
+    powers, inverse_powers = _power_tables(len(data) + 1)
+    prefix = np.concatenate(([np.uint64(0)], np.cumsum(data.astype(np.uint64) * powers[:len(data)])))
+    hashes = (prefix[ends] - prefix[starts]) * inverse_powers[starts]
+    # Mix in the length so a token never collides with its own prefix padded by zero bytes
+    return hashes + (ends - starts).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15), mask
+
+def _stopword_hashes():
+    words = sorted(STOPWORDS)
+    data = np.frombuffer(" ".join(words).encode("utf-8"), dtype=np.uint8)
+    with np.errstate(over='ignore'):
+        return _token_hashes(data)[0]
+
+with np.errstate(over='ignore'):
+    _STOPWORD_HASHES = _stopword_hashes()
+
+def features(text):
+    """
+    Return the hashed features of a text, by family.
+
+    Families are word unigrams and bigrams (stopwords removed) and character
+    n-grams of the text with every run of non-word characters reduced to one
+    space, so n-grams also capture word boundaries.
+
+    Returns:
+        dict: Family name -> uint64 array of feature hashes (one per occurrence)
+    """
+    data = np.frombuffer(text.lower().encode("utf-8"), dtype=np.uint8)
+    with np.errstate(over='ignore'):
+        tokens, mask = _token_hashes(data)
+        tokens = tokens[~np.isin(tokens, _STOPWORD_HASHES)]
+        families = {
+            "word": tokens,
+            "bigram": tokens[:-1] * _P + tokens[1:] if len(tokens) > 1 else np.empty(0, dtype=np.uint64)
+        }
+
+        # Keep word bytes plus the first separator after each word, as spaces
+        keep = mask.copy()
+        keep[1:] |= mask[:-1]
+        stream = np.concatenate(([32], np.where(mask, data, 32)[keep])).astype(np.uint64)
+        for n in CHAR_NGRAMS:
+            count = len(stream) - n + 1
+            if count <= 0:
+                families[n] = np.empty(0, dtype=np.uint64)
+                continue
+            hashes = stream[:count].copy()
+            for offset in range(1, n):
+                hashes = hashes * _P + stream[offset:offset + count]
+            families[n] = hashes
+
+        return {family: _mix(hashes ^ _SALTS[family]) for family, hashes in families.items()}
+
+class IdfTable:
+    """Smoothed inverse document frequencies of hashed features"""
+
+    def __init__(self, document_frequency, documents):
+        self.document_frequency = document_frequency
+        self.documents = documents
+        self.weights = (
+            np.log((1 + documents) / (1 + document_frequency.astype(np.float64))) + 1
+        ).astype(np.float32)
+        self.version = hashlib.sha256(document_frequency.tobytes()).hexdigest()[:12] + f"-{documents}"
+
+    @classmethod
+    def fit(cls, texts):
+        """Count, for every feature bucket, the number of texts containing it"""
+        document_frequency = np.zeros(IDF_BUCKETS, dtype=np.uint32)
+        documents = 0
+        for text in texts:
+            buckets = np.unique(np.concatenate([
+                hashes % np.uint64(IDF_BUCKETS) for hashes in features(text).values()
+            ]))
+            document_frequency[buckets.astype(np.int64)] += 1
+            documents += 1
+        return cls(document_frequency, documents)
+
+    def save(self, path):
+        np.savez_compressed(path, document_frequency=self.document_frequency, documents=self.documents)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["document_frequency"], int(data["documents"]))
+
+class LexicalEmbedder:
+    """
+    Offline embeddings from hashed word and character n-grams.
+
+    Each feature family is weighted by sublinear TF times IDF, projected onto
+    the embedding dimension by feature hashing (a signed bucket per feature),
+    L2-normalized, then the families are combined and normalized again.
+    Deterministic: the same text and IDF table always give the same vector.
+    """
+
+    name = "lexical"
+
+    def __init__(self, dimension=768, idf=None):
+        self.dimension = dimension
+        self.idf = idf
+
+    @property
+    def version(self):
+        return f"1+idf-{self.idf.version}" if self.idf is not None else "1"
+
+    def _family_vector(self, hashes):
+        unique, counts = np.unique(hashes, return_counts=True)
+        weights = 1 + np.log(counts)
+        if self.idf is not None:
+            weights = weights * self.idf.weights[(unique % np.uint64(IDF_BUCKETS)).astype(np.int64)]
+        signs = np.where(unique & np.uint64(1), -1.0, 1.0)
+        buckets = ((unique >> np.uint64(1)) % np.uint64(self.dimension)).astype(np.int64)
+        vector = np.bincount(buckets, weights=weights * signs, minlength=self.dimension)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed(self, text):
+        """Embed one text as a unit-length float32 vector"""
+        family_weights = {"word": WORD_WEIGHT, "bigram": BIGRAM_WEIGHT}
+        vector = np.zeros(self.dimension, dtype=np.float64)
+        for family, hashes in features(text).items():
+            if len(hashes):
+                vector += family_weights.get(family, CHAR_WEIGHT / len(CHAR_NGRAMS)) * self._family_vector(hashes)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm > 0 else vector).astype(np.float32)
+
+    def embed_batch(self, texts):
+        """Embed texts as a float32 array of shape (len(texts), dimension)"""
+        result = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            result[row] = self.embed(text)
+        return result
+
+def load_embedder(dimension=768):
+    """Return a LexicalEmbedder using the fitted IDF table if there is one"""
+    idf = IdfTable.load(LEXICAL_IDF_PATH) if os.path.exists(LEXICAL_IDF_PATH) else None
+    return LexicalEmbedder(dimension, idf)
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit the lexical embedding IDF table on the stored transcripts')
+    parser.add_argument('--namespace', type=str, help='Namespace to read meetings from')
+    parser.add_argument('--output', type=str, default=LEXICAL_IDF_PATH, help='Where to write the table')
+    args = parser.parse_args()
+
+    import vector_db
+    namespace = args.namespace or vector_db.DEFAULT_NAMESPACE
+    vector_db.initialize_vector_db()
+
+    def transcripts():
+        for meeting in vector_db.iter_all_meetings(namespace):
+            transcript = vector_db.get_meeting_body(meeting["metadata"], "transcript")
+            if transcript:
+                yield transcript
+
+    idf = IdfTable.fit(transcripts())
+    idf.save(args.output)
+    print(f"Fitted IDF on {idf.documents} transcripts (version {idf.version}), saved to {args.output}")
+    print("Stored vectors keep their old weights until they are re-embedded.")
+
+if __name__ == "__main__":
+    main()
@@ -7,11 +7,20 @@
 
 import os
 import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pinecone import Pinecone
 from dotenv import load_dotenv
 import google.generativeai as genai
-import time
 import argparse
+from blob_store import put_blob, content_hash
+from batch_runner import AdaptiveTokenBucket, Checkpoint, backoff_delay
+from vector_backends import upsert_batches, UPSERT_MAX_BYTES
+import chat_index
+import meeting_catalog
+import embeddings
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +30,24 @@ INDEX_NAME = "meeting-summarizer"  # Index name as provided
 DIMENSION = 768  # Vector dimension as specified
 NAMESPACE = "meetings"  # Default namespace
 
+# Concurrent upsert requests
+LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', '4'))
+
+# Starting upsert request rate; it rises while Pinecone keeps up and halves when it throttles
+UPSERTS_PER_MINUTE = float(os.getenv('PINECONE_UPSERTS_PER_MINUTE', '600'))
+
+# Retries per upsert request, with jittered exponential backoff
+LOAD_MAX_RETRIES = int(os.getenv('LOAD_MAX_RETRIES', '5'))
+
+# Longest record read from the input, in characters; a longer one is counted as failed
+LOAD_MAX_RECORD_SIZE = int(os.getenv('LOAD_MAX_RECORD_SIZE', str(32 * 1024 * 1024)))
+
+# Records already loaded by an interrupted run are skipped when it is started again
+LOAD_CHECKPOINT = os.getenv(
+    'LOAD_CHECKPOINT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_json_to_pinecone.checkpoint.jsonl')
+)
+
 def check_pinecone_index():
     """
     Check if the Pinecone index exists and is properly configured.
@@ -67,18 +94,17 @@ def check_pinecone_index():
 
 def setup_gemini():
     """
-    Setup mock embedding for testing.
+    Return the embedding provider.
     No actual Gemini API call will be made.
     """
-    print("Setting up mock embeddings (no API calls)")
-    # Return None as we don't actually need a model
-    return None
+    provider = embeddings.get_provider()
+    print(f"Using {provider.name} embeddings (version {provider.version}, no API calls)")
+    return provider
 
 def get_embedding(text, model):
     """
-    Generate mock embedding for text for testing purposes.
-    This function generates consistent embeddings based on the text content
-    without actually calling the Gemini API.
+    Generate the embedding of a text with the shared embedding provider, so
+    vectors loaded here are comparable with the API's queries.
     
     Args:
         text (str): The text to generate embedding for
@@ -88,113 +114,337 @@ def get_embedding(text, model):
         list: The embedding vector
     """
     try:
-        import hashlib
-        import numpy as np
-        
-        # Create a hash of the text to ensure the same text always produces the same vector
-        hash_obj = hashlib.sha256(text.encode())
-        hash_bytes = hash_obj.digest()
-        
-        # Convert hash bytes to a vector of floats with the required dimension
-        vector = []
-        for i in range(DIMENSION):
-            # Use modulo to cycle through the hash bytes
-            byte_index = i % len(hash_bytes)
-            # Convert byte to float between -1 and 1
-            vector.append((hash_bytes[byte_index] / 128.0) - 1.0)
-        
-        # Normalize the vector to unit length (important for cosine similarity)
-        vector = np.array(vector)
-        norm = np.linalg.norm(vector)
-        if norm > 0:
-            vector = vector / norm
-        
-        print(f"Generated mock embedding for text of length {len(text)} characters")
-        return vector.tolist()
+        return embeddings.embed(text).tolist()
     except Exception as e:
         print(f"Error generating embedding: {e}")
         raise
 
+class MalformedRecord:
+    """Stands in for a record that could not be decoded, so it is counted as failed"""
+    
+    def __init__(self, error):
+        self.error = error
+
+def _truncated(error, buffer):
+    """Whether a decode error may just be the record continuing past the buffer"""
+    return error.msg.startswith("Unterminated string") or error.pos >= len(buffer.rstrip()) - 6
+
+def iter_json_records(json_file, chunk_size=1024 * 1024, max_record_size=LOAD_MAX_RECORD_SIZE):
+    """
+    Yield the records of a JSON array or NDJSON file one at a time.
+    
+    Memory use is bounded by the largest record rather than the file size.
+    NDJSON is read line by line; a line that is not valid JSON, or is longer
+    than max_record_size, is yielded as a MalformedRecord and reading goes on.
+    An array is decoded record by record from a growing buffer; a syntax error
+    or a record over max_record_size ends it with a ValueError, since the rest
+    of the array cannot be located reliably.
+    
+    Args:
+        json_file (str): Path to the JSON array or NDJSON file
+        chunk_size (int, optional): Characters read at a time
+        max_record_size (int, optional): Longest record accepted, in characters
+    
+    Yields:
+        dict: One meeting record, or a MalformedRecord
+    
+    Raises:
+        ValueError: If a JSON array is malformed
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        head = f.read(chunk_size)
+        stripped = head.lstrip()
+        if not stripped:
+            return
+        if not stripped.startswith("["):
+            f.seek(0)
+            yield from _iter_ndjson(f, max_record_size)
+            return
+        yield from _iter_array(f, head[len(head) - len(stripped) + 1:], chunk_size, max_record_size)
+
+def _iter_ndjson(f, max_record_size):
+    for number, line in enumerate(iter(lambda: f.readline(max_record_size + 1), ""), start=1):
+        if len(line) > max_record_size and not line.endswith("\n"):
+            # Skip the rest of the line without holding it
+            while line and not line.endswith("\n"):
+                line = f.readline(max_record_size + 1)
+            yield MalformedRecord(f"line {number} is longer than {max_record_size} characters")
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield MalformedRecord(f"line {number} is not valid JSON: {e.msg}")
+
+def _iter_array(f, buffer, chunk_size, max_record_size):
+    decoder = json.JSONDecoder()
+    position = 0
+    number = 0
+    eof = False
+    while True:
+        # Skip whitespace and commas between records
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+                number += 1
+                yield record
+                continue
+            except json.JSONDecodeError as e:
+                if eof or not _truncated(e, buffer):
+                    raise ValueError(f"Record {number + 1} of the array is not valid JSON: {e.msg}")
+                if len(buffer) - position > max_record_size:
+                    raise ValueError(f"Record {number + 1} of the array is longer than {max_record_size} characters")
+        elif eof:
+            raise ValueError("The JSON array is not closed")
+        # Read at least as much as is buffered, so a long record is re-decoded
+        # a logarithmic number of times rather than once per chunk
+        chunk = f.read(max(chunk_size, len(buffer) - position))
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
 def load_json_data(json_file):
     """
     Load meeting data from JSON file.
     
     Args:
-        json_file (str): Path to the JSON file
+        json_file (str): Path to the JSON array or NDJSON file
     
     Returns:
         list: List of meeting records
     """
     try:
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-        return data
+        records = []
+        for record in iter_json_records(json_file):
+            if isinstance(record, MalformedRecord):
+                print(f"Skipping malformed record: {record.error}")
+            else:
+                records.append(record)
+        return records
     except Exception as e:
         print(f"Error loading JSON file: {e}")
         raise
 
-def upload_to_pinecone(index, data, embedding_model, batch_size=10, namespace=NAMESPACE):
+def validate_record(record):
     """
-    Upload meeting data to Pinecone index.
+    Check that a meeting record has the fields the loader needs.
+    
+    Raises:
+        ValueError: Describing the first problem found
+    """
+    if isinstance(record, MalformedRecord):
+        raise ValueError(record.error)
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    for field in ("meeting_name", "transcript"):
+        if not isinstance(record.get(field), str):
+            raise ValueError(f"{field} must be a string")
+    if not record["transcript"].strip():
+        raise ValueError("transcript is empty")
+    for field in ("meeting_id", "summary", "timestamp", "meeting_date"):
+        if record.get(field) is not None and not isinstance(record[field], str):
+            raise ValueError(f"{field} must be a string")
+    attendees = record.get("attendees")
+    if attendees is not None and not (isinstance(attendees, list) and all(isinstance(a, str) for a in attendees)):
+        raise ValueError("attendees must be a list of strings")
+
+def record_id(record):
+    """Return a record's meeting ID, or one derived from its content so re-runs agree"""
+    if record.get("meeting_id"):
+        return record["meeting_id"]
+    key = content_hash(f"{record.get('meeting_name', '')}\n{record['transcript']}")
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"meeting:{key}"))
+
+def prepare_vectors(records):
+    """
+    Embed records in one batch and build their vectors, moving bodies to the blob store.
     
     Args:
-        index: The Pinecone index object
-        data (list): List of meeting records
-        embedding_model: The Gemini model for generating embeddings
-        batch_size (int): Number of records to upload in each batch
-        namespace (str): Namespace to upload to
+        records (list): Meeting records
+    
+    Returns:
+        list: Vectors in the Pinecone v6.0.0 record format
     """
-    # Process in batches
-    for i in range(0, len(data), batch_size):
-        batch = data[i:i+batch_size]
-        vectors = []
+    # Combine transcript and summary for a more comprehensive embedding
+    batch_embeddings = embeddings.embed_many([
+        embeddings.meeting_text(record["transcript"], record.get("summary")) for record in records
+    ])
+    
+    vectors = []
+    for record, embedding in zip(records, batch_embeddings):
+        # Bodies go to the blob store and only their hashes are kept
+        transcript_hash = put_blob(record["transcript"])
+        chat_index.ensure_index(transcript_hash, record["transcript"])
         
-        print(f"Processing batch {i//batch_size + 1}/{len(data)//batch_size + 1}...")
+        # Prepare metadata
+        metadata = {
+            "meeting_name": record["meeting_name"],
+            "transcript_hash": transcript_hash,
+            "timestamp": record.get("timestamp") or time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "attendees": record.get("attendees") or [],
+            "meeting_date": record.get("meeting_date") or "",
+            "has_summary": False,
+            **embeddings.model_metadata()
+        }
+        metadata.update(meeting_catalog.filter_metadata(metadata))
         
-        for record in batch:
-            # Generate embedding for each record
-            # We can combine transcript and summary for a more comprehensive embedding
-            content = record["transcript"]
-            if "summary" in record:
-                content += " " + record["summary"]
-            
-            embedding = get_embedding(content, embedding_model)
-            
-            # Prepare metadata
-            metadata = {
-                "meeting_name": record["meeting_name"],
-                "transcript": record["transcript"],
-                "timestamp": record["timestamp"],
-                "attendees": record["attendees"],
-                "meeting_date": record["meeting_date"]
-            }
-            
-            # Add summary if available
-            if "summary" in record:
-                metadata["summary"] = record["summary"]
-            
-            # Add to vectors batch using v6.0.0 API format
-            vectors.append({
-                "id": record["meeting_id"],
-                "values": embedding,
-                "metadata": metadata
-            })
-        
-        # Upsert the batch using v6.0.0 API format
-        index.upsert(vectors=vectors, namespace=namespace)
-        print(f"✅ Uploaded batch {i//batch_size + 1}/{len(data)//batch_size + 1}")
+        # Add summary if available
+        if record.get("summary") is not None:
+            metadata["summary_hash"] = put_blob(record["summary"])
+            metadata["has_summary"] = record["summary"].strip() != ""
         
-        # Slight delay to avoid rate limiting
-        time.sleep(1)
+        vectors.append({
+            "id": record_id(record),
+            "values": embedding.tolist(),
+            "metadata": metadata
+        })
+    return vectors
+
+def _is_throttled(error):
+    """Whether an upsert failed because Pinecone is rate limiting"""
+    status = getattr(error, 'status', None) or getattr(error, 'status_code', None)
+    return status == 429 or "429" in str(error) or "too many requests" in str(error).lower()
+
+def upsert_with_retry(index, vectors, namespace, limiter, max_retries=LOAD_MAX_RETRIES):
+    """Upsert one batch within the rate limit, retrying with backoff and slowing down when throttled"""
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            index.upsert(vectors=vectors, namespace=namespace)
+            limiter.succeeded()
+            return
+        except Exception as e:
+            if _is_throttled(e):
+                limiter.throttled()
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"Retrying upsert of {len(vectors)} records in {delay:.1f}s after error: {e}")
+            time.sleep(delay)
+
+def upload_to_pinecone(index, data, embedding_model=None, batch_size=100, namespace=NAMESPACE,
+                       workers=LOAD_WORKERS, checkpoint=None, upserts_per_minute=UPSERTS_PER_MINUTE,
+                       max_request_bytes=UPSERT_MAX_BYTES):
+    """
+    Upload meeting data to Pinecone index.
+    
+    Records are embedded batch_size at a time on this thread while up to
+    workers upsert requests run concurrently; requests are split by payload
+    size, not record count. At most two batches per worker are in flight, so
+    memory stays bounded however long the input is.
+    
+    Args:
+        index: The Pinecone index object
+        data (iterable): Meeting records, e.g. from iter_json_records; invalid
+            ones are counted as failed and the rest still loaded
+        embedding_model: Ignored, kept for compatibility
+        batch_size (int): Number of records embedded together
+        namespace (str): Namespace to upload to
+        workers (int): Concurrent upsert requests
+        checkpoint (Checkpoint, optional): Skip records it records as loaded and record new ones
+        upserts_per_minute (float): Starting upsert request rate
+        max_request_bytes (int): Largest upsert request payload
+    
+    Returns:
+        dict: Counts of loaded, skipped and failed records and the elapsed time
+    """
+    limiter = AdaptiveTokenBucket(upserts_per_minute, burst=workers)
+    slots = threading.BoundedSemaphore(workers * 2)
+    counts = {"loaded": 0, "skipped": 0, "failed": 0}
+    counts_lock = threading.Lock()
+    started = time.monotonic()
+    
+    def report():
+        elapsed = time.monotonic() - started
+        print(
+            f"Progress: {counts['loaded']} loaded, {counts['skipped']} skipped, {counts['failed']} failed | "
+            f"{counts['loaded'] / elapsed if elapsed > 0 else 0.0:.1f} records/s | "
+            f"{limiter.rate_per_minute:.0f} upserts/min"
+        )
+    
+    def upload(vectors):
+        ids = [vector["id"] for vector in vectors]
+        try:
+            upsert_with_retry(index, vectors, namespace, limiter)
+            # Keep the local meeting catalog in sync with the index
+            meeting_catalog.upsert_meetings([(vector["id"], vector["metadata"]) for vector in vectors], namespace)
+            status = "success"
+        except Exception as e:
+            print(f"❌ Failed to upload {len(vectors)} records: {e}")
+            status = "error"
+        finally:
+            slots.release()
+        if checkpoint is not None:
+            checkpoint.record_many(ids, status)
+        with counts_lock:
+            counts["loaded" if status == "success" else "failed"] += len(ids)
+    
+    def fail(ids, count):
+        if checkpoint is not None and ids:
+            checkpoint.record_many(ids, "error")
+        with counts_lock:
+            counts["failed"] += count
+    
+    def submit(executor, records):
+        try:
+            vectors = prepare_vectors(records)
+        except Exception as e:
+            print(f"❌ Failed to prepare {len(records)} records: {e}")
+            fail([record_id(record) for record in records], len(records))
+            return
+        for batch in upsert_batches(vectors, max_bytes=max_request_bytes):
+            slots.acquire()
+            executor.submit(upload, batch)
+        report()
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = []
+        for number, record in enumerate(data, start=1):
+            # A bad record is counted as failed without holding up the rest
+            try:
+                validate_record(record)
+            except ValueError as e:
+                meeting_id = record.get("meeting_id") if isinstance(record, dict) else None
+                print(f"❌ Skipping invalid record {number} ({meeting_id or 'no meeting_id'}): {e}")
+                fail([meeting_id] if isinstance(meeting_id, str) else [], 1)
+                continue
+            if checkpoint is not None and record_id(record) in checkpoint.done:
+                with counts_lock:
+                    counts["skipped"] += 1
+                continue
+            pending.append(record)
+            if len(pending) >= batch_size:
+                submit(executor, pending)
+                pending = []
+        if pending:
+            submit(executor, pending)
+    report()
+    
+    return {**counts, "elapsed_seconds": round(time.monotonic() - started, 1), "throttles": limiter.throttles}
 
 def main():
     parser = argparse.ArgumentParser(description='Load meeting data from JSON to Pinecone vector database')
-    parser.add_argument('--json_file', type=str, default='processed_meetings.json', 
-                        help='Path to the JSON file containing meeting data')
+    parser.add_argument('--json_file', type=str, default='processed_meetings.ndjson', 
+                        help='Path to the JSON array or NDJSON file containing meeting data')
     parser.add_argument('--namespace', type=str, default=NAMESPACE, 
                         help='Namespace to upload data to')
-    parser.add_argument('--batch_size', type=int, default=10, 
-                        help='Number of records to upload in each batch')
+    parser.add_argument('--batch_size', type=int, default=100, 
+                        help='Number of records embedded together (upserts are split by size)')
+    parser.add_argument('--workers', type=int, default=LOAD_WORKERS,
+                        help='Concurrent upsert requests')
+    parser.add_argument('--upserts_per_minute', type=float, default=UPSERTS_PER_MINUTE,
+                        help='Starting upsert request rate; adapts to throttling')
+    parser.add_argument('--max_request_bytes', type=int, default=UPSERT_MAX_BYTES,
+                        help='Largest upsert request payload in bytes')
+    parser.add_argument('--checkpoint', type=str, default=LOAD_CHECKPOINT,
+                        help='Checkpoint file for resuming an interrupted load')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignore an existing checkpoint and load every record')
     parser.add_argument('--check_only', action='store_true',
                         help='Only check if the index exists, don\'t upload data')
     parser.add_argument('--mock_embeddings', action='store_true', default=True,
@@ -219,20 +469,42 @@ def main():
     # Setup embedding model
     print("\nSetting up embeddings...")
     if args.mock_embeddings:
-        print("NOTICE: Using mock embeddings for testing. These are not real semantic embeddings.")
-        print("For production use, implement a proper embedding function.")
+        print("NOTICE: Using local embeddings (EMBEDDING_PROVIDER), not a remote embedding API.")
     embedding_model = setup_gemini()
     
-    # Load JSON data
-    print(f"\nLoading meeting data from {args.json_file}...")
-    data = load_json_data(args.json_file)
-    print(f"Loaded {len(data)} meeting records")
+    if args.restart:
+        Checkpoint(args.checkpoint).remove()
+    checkpoint = Checkpoint(args.checkpoint)
+    if checkpoint.done:
+        print(f"Resuming from checkpoint: {len(checkpoint.done)} records already loaded")
     
-    # Upload to Pinecone
-    print(f"\nUploading data to Pinecone namespace: {args.namespace}...")
-    upload_to_pinecone(index, data, embedding_model, args.batch_size, args.namespace)
+    # Stream the records and upload them to Pinecone
+    print(f"\nUploading meeting data from {args.json_file} to Pinecone namespace: {args.namespace}...")
+    try:
+        result = upload_to_pinecone(
+            index,
+            iter_json_records(args.json_file),
+            embedding_model,
+            args.batch_size,
+            args.namespace,
+            workers=args.workers,
+            checkpoint=checkpoint,
+            upserts_per_minute=args.upserts_per_minute,
+            max_request_bytes=args.max_request_bytes
+        )
+    except ValueError as e:
+        # A malformed JSON array; what was loaded before it is checkpointed
+        print(f"\n❌ Stopped reading {args.json_file}: {e}")
+        print("Fix the file and run again to resume after the records already loaded.")
+        return
     
-    print("\n✅ Data upload complete!")
+    if result["failed"]:
+        print(f"\n❌ {result['failed']} records failed to upload; run again to retry them.")
+    else:
+        checkpoint.remove()
+        print("\n✅ Data upload complete!")
+    print(f"Loaded {result['loaded']} records ({result['skipped']} skipped) in {result['elapsed_seconds']}s, "
+          f"throttled {result['throttles']} times")
     
     # Get and display stats
     stats = index.describe_index_stats()
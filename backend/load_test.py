@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import glob
+import time
+import argparse
+import threading
+import statistics
+import requests
+
+def measure_list_latency(base_url, samples, interval):
+    """
+    Time a series of GET /api/meetings requests.
+
+    Args:
+        base_url (str): Backend base URL
+        samples (int): Number of requests to send
+        interval (float): Pause between requests in seconds
+
+    Returns:
+        list: Latencies in milliseconds
+    """
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        response = requests.get(f"{base_url}/api/meetings", params={"view": "compact", "limit": 50})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    return latencies
+
+def upload_for_summary(base_url, file_path, results, slot):
+    """
+    Send one /api/summarize upload, wait for its summary job and record the
+    outcome in results[slot].
+    """
+    start = time.perf_counter()
+    try:
+        with open(file_path, 'rb') as f:
+            response = requests.post(
+                f"{base_url}/api/summarize",
+                files={"file": (os.path.basename(file_path), f, "text/plain")},
+                data={"emails": "load.test@example.com", "meeting_name": f"Load test {slot}"}
+            )
+        status = response.status_code
+        if status == 202:
+            job_id = response.json()["job_id"]
+            while True:
+                job = requests.get(f"{base_url}/api/jobs/{job_id}").json()
+                if job["status"] in ("succeeded", "failed"):
+                    status = job["status"]
+                    break
+                time.sleep(0.25)
+        results[slot] = (status, (time.perf_counter() - start) * 1000)
+    except Exception as e:
+        results[slot] = (str(e), (time.perf_counter() - start) * 1000)
+
+def describe(latencies):
+    """Return p50, p95 and max of a list of latencies"""
+    ordered = sorted(latencies)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "p50": statistics.median(ordered),
+        "p95": ordered[p95_index],
+        "max": ordered[-1]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check that GET /api/meetings stays fast while summaries are being generated'
+    )
+    parser.add_argument('--base-url', type=str, default='http://localhost:3000', help='Backend base URL')
+    parser.add_argument('--uploads', type=int, default=4, help='Concurrent /api/summarize uploads')
+    parser.add_argument('--samples', type=int, default=30, help='GET /api/meetings requests per phase')
+    parser.add_argument('--interval', type=float, default=0.05, help='Pause between list requests (seconds)')
+    parser.add_argument('--transcript', type=str, help='Transcript to upload (default: first testdata file)')
+
+    args = parser.parse_args()
+
+    transcript = args.transcript
+    if not transcript:
+        test_files = sorted(glob.glob("../testdata/*.txt") or glob.glob("testdata/*.txt"))
+        if not test_files:
+            print("No transcript given and no testdata files found.")
+            return 1
+        transcript = test_files[0]
+
+    print(f"Measuring baseline latency of GET /api/meetings ({args.samples} requests)...")
+    baseline = describe(measure_list_latency(args.base_url, args.samples, args.interval))
+
+    print(f"Starting {args.uploads} concurrent /api/summarize uploads of {transcript}...")
+    results = [None] * args.uploads
+    threads = [
+        threading.Thread(target=upload_for_summary, args=(args.base_url, transcript, results, slot))
+        for slot in range(args.uploads)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Give the uploads a moment to reach the model call
+    time.sleep(0.2)
+    print("Measuring GET /api/meetings latency while summaries are in flight...")
+    under_load = measure_list_latency(args.base_url, args.samples, args.interval)
+    still_running = sum(thread.is_alive() for thread in threads)
+
+    for thread in threads:
+        thread.join()
+    loaded = describe(under_load)
+
+    print("\n===== Results =====")
+    print(f"Baseline:   p50 {baseline['p50']:.1f} ms | p95 {baseline['p95']:.1f} ms | max {baseline['max']:.1f} ms")
+    print(f"Under load: p50 {loaded['p50']:.1f} ms | p95 {loaded['p95']:.1f} ms | max {loaded['max']:.1f} ms")
+    for slot, (status, elapsed) in enumerate(results):
+        print(f"Upload {slot}: status {status} in {elapsed:.0f} ms")
+
+    if still_running == 0:
+        print("\n⚠️ All uploads finished before measurement ended; use a longer transcript or more uploads.")
+
+    # Latency is considered flat if p95 stays within 2x baseline (or 50 ms of it)
+    limit = max(2 * baseline['p95'], baseline['p95'] + 50)
+    if loaded['p95'] <= limit:
+        print(f"\n✅ List latency stayed flat (p95 {loaded['p95']:.1f} ms <= {limit:.1f} ms)")
+        return 0
+    print(f"\n❌ List latency degraded under load (p95 {loaded['p95']:.1f} ms > {limit:.1f} ms)")
+    return 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,12 +7,19 @@
 
 import os
 import glob
-import re
 import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 import uuid
 import google.generativeai as genai
 from dotenv import load_dotenv
+import summary_cache
+import transcript_parser
+from batch_runner import TokenBucket
+from prompts import SUMMARY_PROMPT, SUMMARY_PROMPT_VERSION
 
 # Load environment variables
 load_dotenv()
@@ -25,113 +32,223 @@ if not GOOGLE_API_KEY:
 genai.configure(api_key=GOOGLE_API_KEY)
 model = genai.GenerativeModel('gemini-2.5-flash-preview-04-17')
 
-def extract_meeting_info_from_transcript(transcript_text):
+# Processes parsing transcripts
+PARSE_WORKERS = int(os.getenv('TESTDATA_PARSE_WORKERS', str(os.cpu_count() or 1)))
+
+# Summaries generated concurrently
+SUMMARY_WORKERS = int(os.getenv('TESTDATA_SUMMARY_WORKERS', '4'))
+
+# Gemini requests per minute; match the project's quota
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '60'))
+
+# Processed meetings, one JSON object per line, and the content hash of the
+# transcript file each was built from
+OUTPUT_FILE = "processed_meetings.ndjson"
+MANIFEST_SUFFIX = ".manifest.json"
+
+def extract_meeting_info_from_transcript(parsed):
     """
-    Extract meeting information from the transcript text.
+    Extract meeting information from a parsed transcript.
     
     Returns:
         dict: Dictionary containing meeting name, date, and participants
     """
-    info = {
-        "meeting_name": "Unknown Meeting",
-        "meeting_date": datetime.now().isoformat(),
-        "attendees": []
-    }
-    
-    # Extract meeting topic/name
-    topic_match = re.search(r'Meeting Topic:\s*(.*?)(?:\n|$)', transcript_text)
-    if topic_match:
-        info["meeting_name"] = topic_match.group(1).strip()
-    
-    # Extract meeting date
-    date_match = re.search(r'Meeting Date:\s*(.*?)(?:\n|$)', transcript_text)
-    if date_match:
-        date_str = date_match.group(1).strip()
-        try:
-            # Try to parse the date
-            date_obj = datetime.strptime(date_str, "%B %d, %Y")
-            info["meeting_date"] = date_obj.isoformat()
-        except ValueError:
-            # If parsing fails, keep the original string
-            info["meeting_date"] = date_str
-    
-    # Extract participants and their emails
-    participants_match = re.search(r'Participants:\s*(.*?)(?:\n|$)', transcript_text)
-    if participants_match:
-        participants_str = participants_match.group(1).strip()
-        participants = participants_str.split(',')
-        
-        # Extract names and generate emails
-        for participant in participants:
-            name = participant.strip()
-            
-            # Extract just the name without titles or roles
-            name_match = re.search(r'([\w\s]+)(?:\(.*\))?', name)
-            if name_match:
-                clean_name = name_match.group(1).strip()
-                # Generate email from name
-                email = clean_name.lower().replace(' ', '.') + '@example.com'
-                info["attendees"].append(email)
-    
-    return info
-
-def generate_summary(transcript):
-    """Generate a summary of the transcript using Gemini."""
-    prompt = f"""Please provide a concise summary of the following meeting transcript. 
-    Focus on key points, decisions made, and action items. Format the summary in a clear, 
-    structured way with headings and bullet points where appropriate:
-
-    {transcript}"""
+    return transcript_parser.meeting_info(parsed)
+
+def generate_summary(transcript, limiter=None, raise_errors=False):
+    """
+    Generate a summary of the transcript using Gemini, reusing cached summaries.
+    
+    Args:
+        transcript (str): The meeting transcript
+        limiter (TokenBucket, optional): Rate limiter to acquire before calling the model
+        raise_errors (bool, optional): Raise on failure instead of returning a placeholder summary
+    """
+    prompt = SUMMARY_PROMPT.format(transcript=transcript)
+    
+    def generate():
+        # Cache hits do not count against the rate limit
+        if limiter is not None:
+            limiter.acquire()
+        return model.generate_content(prompt).text
     
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return summary_cache.get_or_generate(
+            transcript,
+            SUMMARY_PROMPT_VERSION,
+            model.model_name,
+            generate
+        )
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error generating summary: {e}")
         return "Summary generation failed. Please try again later."
 
-def main():
-    """Extract meeting information from transcripts and save to JSON."""
-    print("Processing test data...")
+def file_hash(path):
+    """Return the sha256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(transcript_parser.READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stable_meeting_id(name):
+    """Meeting ID of a test file, the same on every run so reloads overwrite rather than duplicate"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"testdata:{name}"))
+
+def parse_transcript(path):
+    """
+    Read and parse one transcript; runs in a worker process.
+    
+    Returns:
+        tuple: (path, transcript text, meeting info, parse stats)
+    """
+    transcript, parsed = transcript_parser.parse_file(path)
+    return path, transcript, extract_meeting_info_from_transcript(parsed), parsed.stats()
+
+def load_manifest(path):
+    """Return the manifest mapping test file names to their content hash and meeting ID"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"Ignoring unreadable manifest {path}: {e}")
+        return {}
+
+def save_manifest(path, manifest):
+    """Write the manifest atomically, so a crash never leaves it half written"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def read_output(path):
+    """
+    Read the records of an NDJSON output file.
     
-    # Get all text files in the testdata directory
+    Returns:
+        tuple: (records keyed by meeting ID, the last one written winning;
+            True if the file has superseded or unreadable lines)
+    """
+    records = {}
+    dirty = False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # Torn by a crash mid-write
+                    dirty = True
+                    continue
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    dirty = True
+                    continue
+                dirty = dirty or record["meeting_id"] in records
+                records[record["meeting_id"]] = record
+    except FileNotFoundError:
+        pass
+    return records, dirty
+
+def write_output(path, records):
+    """Rewrite the output file atomically with one line per record"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(temp_path, path)
+
+def find_test_files():
+    """Return the transcript files in the testdata directory"""
     # First check if we should use the testdata in the current directory or go up one level
     if os.path.exists("../testdata"):
-        test_files = glob.glob("../testdata/*.txt")
-    else:
-        test_files = glob.glob("testdata/*.txt")
+        return sorted(glob.glob("../testdata/*.txt"))
+    return sorted(glob.glob("testdata/*.txt"))
+
+def main():
+    """
+    Extract meeting information from transcripts and save it as NDJSON.
+    
+    Only transcripts whose content changed since the last run (per the
+    manifest) are parsed and summarized, so editing one file costs one Gemini
+    call. Parsing runs in a process pool and at most --workers summaries are
+    generated at once. Each finished meeting is appended to the output and
+    recorded in the manifest straight away, so a crash loses only the meetings
+    in flight.
+    """
+    parser = argparse.ArgumentParser(description='Build processed meeting data from the test transcripts')
+    parser.add_argument('--output', type=str, default=OUTPUT_FILE,
+                        help='NDJSON file to write meetings to')
+    parser.add_argument('--workers', type=int, default=SUMMARY_WORKERS,
+                        help='Summaries generated concurrently')
+    parser.add_argument('--parse_workers', type=int, default=PARSE_WORKERS,
+                        help='Processes parsing transcripts')
+    parser.add_argument('--rpm', type=float, default=GEMINI_REQUESTS_PER_MINUTE,
+                        help='Gemini requests per minute')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Ignore the manifest and process every transcript')
+    args = parser.parse_args()
+    
+    print("Processing test data...")
     
+    test_files = find_test_files()
     if not test_files:
         print("No test files found in the testdata directory.")
         return
     
     print(f"Found {len(test_files)} test files.")
     
-    # Create a list to store processed meeting data
-    meetings_data = []
+    output_file = args.output
+    manifest_file = output_file + MANIFEST_SUFFIX
+    manifest = {} if args.rebuild else load_manifest(manifest_file)
+    records, dirty = ({}, False) if args.rebuild else read_output(output_file)
     
-    # Process each file
-    for file_path in test_files:
-        # Read the transcript
-        with open(file_path, 'r') as file:
-            transcript = file.read()
-        
-        # Extract meeting information from the transcript
-        meeting_info = extract_meeting_info_from_transcript(transcript)
+    # Entries whose record is missing from the output are stale; so are files
+    # that have been deleted since the last run
+    names = {os.path.basename(path): path for path in test_files}
+    for name in list(manifest):
+        if name not in names or manifest[name]["meeting_id"] not in records:
+            del manifest[name]
+    kept_ids = {entry["meeting_id"] for entry in manifest.values()}
+    if args.rebuild or dirty or set(records) - kept_ids:
+        write_output(output_file, [records[meeting_id] for meeting_id in records if meeting_id in kept_ids])
+        save_manifest(manifest_file, manifest)
+    
+    changed = []
+    for name, path in names.items():
+        digest = file_hash(path)
+        if manifest.get(name, {}).get("content_hash") != digest:
+            changed.append((name, path, digest))
+    print(f"{len(test_files) - len(changed)} unchanged, {len(changed)} to process.")
+    
+    limiter = TokenBucket(args.rpm)
+    slots = threading.BoundedSemaphore(max(1, args.workers))
+    write_lock = threading.Lock()
+    counts = {"processed": 0, "failed": 0}
+    digests = {path: (name, digest) for name, path, digest in changed}
+    
+    def summarize(path, transcript, meeting_info):
+        name, digest = digests[path]
         meeting_name = meeting_info["meeting_name"]
-        
-        print(f"Processing {meeting_name}...")
-        
-        # Generate a unique ID for the meeting
-        meeting_id = str(uuid.uuid4())
-        
-        # Generate summary
-        print(f"Generating summary for {meeting_name}...")
-        summary = generate_summary(transcript)
+        try:
+            print(f"Generating summary for {meeting_name}...")
+            summary = generate_summary(transcript, limiter, raise_errors=True)
+        except Exception as e:
+            print(f"❌ Failed to summarize {meeting_name}, it will be retried on the next run: {e}")
+            with write_lock:
+                counts["failed"] += 1
+            return
+        finally:
+            slots.release()
         
         # Create a record for this meeting
         meeting_record = {
-            "meeting_id": meeting_id,
+            "meeting_id": stable_meeting_id(name),
             "meeting_name": meeting_name,
             "transcript": transcript,
             "summary": summary,
@@ -140,16 +257,49 @@ def main():
             "meeting_date": meeting_info["meeting_date"]
         }
         
-        meetings_data.append(meeting_record)
+        # Append the record before noting it in the manifest: after a crash in
+        # between, the meeting is redone (from the summary cache) rather than lost
+        with write_lock:
+            with open(output_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(meeting_record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            manifest[name] = {"content_hash": digest, "meeting_id": meeting_record["meeting_id"]}
+            save_manifest(manifest_file, manifest)
+            counts["processed"] += 1
         
-        print(f"Successfully processed {meeting_name} with ID {meeting_id}")
+        print(f"Successfully processed {meeting_name} with ID {meeting_record['meeting_id']}")
+    
+    if changed:
+        paths = [path for _, path, _ in changed]
+        parse_workers = min(max(1, args.parse_workers), len(paths))
+        # A single file is not worth starting worker processes for
+        parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 1 else None
+        try:
+            parsed = parse_pool.map(parse_transcript, paths) if parse_pool else map(parse_transcript, paths)
+            with ThreadPoolExecutor(max_workers=max(1, args.workers)) as summary_pool:
+                for path, transcript, meeting_info, stats in parsed:
+                    print(f"Processing {meeting_info['meeting_name']} "
+                          f"({stats['turns']} turns, {stats['speakers']} speakers)...")
+                    # Bound the summaries in flight, and the parsed transcripts held for them
+                    slots.acquire()
+                    summary_pool.submit(summarize, path, transcript, meeting_info)
+        finally:
+            if parse_pool:
+                parse_pool.shutdown()
+    
+    # Drop the records superseded by this run's changes
+    records, dirty = read_output(output_file)
+    if dirty:
+        kept_ids = {entry["meeting_id"] for entry in manifest.values()}
+        write_output(output_file, [records[meeting_id] for meeting_id in records if meeting_id in kept_ids])
     
-    # Save the processed data to a JSON file
-    output_file = "processed_meetings.json"
-    with open(output_file, 'w') as f:
-        json.dump(meetings_data, f, indent=2)
+    print(f"All test data processed and saved to {output_file}: "
+          f"{counts['processed']} processed, {counts['failed']} failed, "
+          f"{len(test_files) - len(changed)} unchanged")
     
-    print(f"All test data processed and saved to {output_file}")
+    cache_stats = summary_cache.stats()
+    print(f"Summary cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -3,17 +3,31 @@
 # @Date:   2025-05-19 21:47:02
 # @Last Modified by:   Mukhil Sundararaj
 # @Last Modified time: 2025-05-20 14:30:53
-from fastapi import FastAPI, UploadFile, HTTPException, Form, Request
+from fastapi import FastAPI, HTTPException, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
 import smtplib
 from email.message import EmailMessage
 import json
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ValidationError
+from typing import List, Literal, Optional
 import vector_db
+import meeting_catalog
+import async_io
+import summary_cache
+import chunked_summary
+import chat_index
+import chat_context
+import transcript_upload
+import job_queue
+import search_index
+import search_cache
+import bulk_ingest
+from blob_store import content_hash, get_blob
+from prompts import SUMMARY_PROMPT, CHAT_CONTEXT_PROMPT, CHAT_QUESTION_PROMPT
 import asyncio
 from opik import track
 from datetime import datetime
@@ -40,9 +54,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ChatTurn(BaseModel):
+    role: str  # "user" or "ai"
+    text: str
+
 class ChatRequest(BaseModel):
     query: str
-    transcript: str  # Changed from summary to transcript
+    meeting_id: Optional[str] = None  # Answer from the stored meeting's passage index
+    transcript: Optional[str] = None  # Or from a transcript sent with the question
+    history: Optional[List[ChatTurn]] = None  # Earlier turns, oldest first
 
 class MeetingRequest(BaseModel):
     meeting_name: str
@@ -53,6 +73,14 @@ class MeetingRequest(BaseModel):
 class MeetingSearchRequest(BaseModel):
     query: str
     top_k: Optional[int] = 5
+    # Vector and BM25 keyword rankings fused, or either one alone
+    mode: Literal["hybrid", "keyword", "vector"] = "hybrid"
+    # Only meetings every listed attendee attended (address or name before the @),
+    # dated within [date_from, date_to] (YYYY-MM-DD) and with or without a summary
+    attendees: Optional[List[str]] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    has_summary: Optional[bool] = None
 
 class SummaryRequest(BaseModel):
     meeting_id: str
@@ -60,22 +88,321 @@ class SummaryRequest(BaseModel):
 class UpdateAttendeesRequest(BaseModel):
     attendees: List[str]
 
+# Fields a client can select with ?fields= on the meeting endpoints
+MEETING_FIELDS = [
+    "id", "name", "date", "attendees", "timestamp", "has_summary", "has_enhanced_data",
+    "transcript", "summary", "action_items", "key_topics", "decisions", "next_steps", "processed_at"
+]
+
+# Fields that require loading a body from the blob store
+BODY_FIELDS = {"transcript", "summary"}
+
+# Fields the catalog can answer on its own; also the compact list view
+LIST_FIELDS = ["id", "name", "date", "attendees", "timestamp", "has_summary", "has_enhanced_data"]
+
+ENHANCED_FIELDS = ["action_items", "key_topics", "decisions", "next_steps"]
+
+# Request body of the upload endpoints, which read the multipart stream themselves
+TRANSCRIPT_UPLOAD_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "emails", "meeting_name"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "emails": {"type": "string"},
+                        "meeting_name": {"type": "string"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+# Keep proxies from buffering Server-Sent Events
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def parse_fields(fields, allowed):
+    """Parse a comma-separated ?fields= value, rejecting unknown field names"""
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}"
+        )
+    return requested
+
+def meeting_filters(attendees=None, date_from=None, date_to=None, has_summary=None):
+    """Build the meeting filters for vector_db, rejecting malformed dates; None if there are none"""
+    for name, value in (("date_from", date_from), ("date_to", date_to)):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}. Expected YYYY-MM-DD")
+    filters = {
+        "attendees": [attendee for attendee in attendees or [] if attendee.strip()],
+        "date_from": date_from,
+        "date_to": date_to,
+        "has_summary": has_summary
+    }
+    return filters if any(value not in (None, [], "") for value in filters.values()) else None
+
+def meeting_bodies(metadatas):
+    """Load the (summary, transcript) bodies of listed meetings from the blob store"""
+    return [
+        (vector_db.get_meeting_body(metadata, "summary"), vector_db.get_meeting_body(metadata, "transcript"))
+        for metadata in metadatas
+    ]
+
+def compact_meeting(meeting_id, metadata, fields):
+    """
+    Build the compact representation of a meeting: each field appears once,
+    without the id/meeting_id, name/meeting_name and date/meeting_date aliases.
+    """
+    meeting = {}
+    for field in fields:
+        if field == "id":
+            meeting["id"] = meeting_id
+        elif field == "name":
+            meeting_name = metadata.get("meeting_name", "")
+            if not meeting_name or meeting_name.strip() == "":
+                meeting_name = f"Meeting {meeting_id[:8]}"
+            meeting["name"] = meeting_name
+        elif field == "date":
+            meeting_date = metadata.get("meeting_date") or ""
+            if meeting_date.strip() == "":
+                meeting_date = metadata.get("timestamp") or "Unknown date"
+                if meeting_date.endswith("Z"):
+                    meeting_date = meeting_date[:-1]  # Remove Z suffix if present
+            meeting["date"] = meeting_date
+        elif field == "has_summary":
+            meeting["has_summary"] = bool(metadata.get("has_summary"))
+        elif field == "has_enhanced_data":
+            meeting["has_enhanced_data"] = metadata.get(
+                "has_enhanced_data",
+                any(key in metadata for key in ENHANCED_FIELDS)
+            )
+        elif field == "attendees" or field in ENHANCED_FIELDS:
+            meeting[field] = metadata.get(field, [])
+        else:
+            meeting[field] = metadata.get(field, "")
+    return meeting
+
+async def receive_summarize_upload(request):
+    """
+    Receive a transcript upload with its emails and meeting_name form fields.
+    
+    Returns:
+        TranscriptUpload: The received upload
+    """
+    try:
+        upload = await transcript_upload.receive_transcript(request)
+    except transcript_upload.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    missing = [field for field in ("emails", "meeting_name") if field not in upload.fields]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing form fields: {', '.join(missing)}")
+    return upload
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def load_chat_context(meeting_id=None, transcript=None):
+    """
+    Return the prepared chat context of a meeting, or of a transcript sent with
+    the question, from the chat context cache when possible.
+    
+    Blocking (reads the catalog, index and blob store), so run it with async_io.run_index.
+    """
+    summary = ""
+    summary_hash = None
+    if meeting_id:
+        # The catalog knows the current body hashes without a vector store round trip
+        record = meeting_catalog.get_meeting(meeting_id, vector_db.DEFAULT_NAMESPACE)
+        if record and record.get("transcript_hash"):
+            context = chat_context.get(meeting_id, record["transcript_hash"], record.get("summary_hash"))
+            if context is not None:
+                return context
+        
+        result = vector_db.retrieve_meeting(meeting_id, include_bodies=False)
+        if result["status"] != "success":
+            raise HTTPException(status_code=404, detail=f"Meeting with ID {meeting_id} not found")
+        
+        metadata = result["meeting"]
+        transcript = vector_db.get_meeting_body(metadata, "transcript")
+        if not transcript:
+            raise HTTPException(status_code=400, detail="No transcript found for this meeting")
+        summary = vector_db.get_meeting_body(metadata, "summary")
+        transcript_hash = metadata.get("transcript_hash") or content_hash(transcript)
+        summary_hash = metadata.get("summary_hash")
+        
+        # Built at ingest; meetings stored before chat indexes existed get one on first use
+        index = chat_index.ensure_index(transcript_hash, transcript)
+    elif transcript:
+        transcript_hash = content_hash(transcript)
+        context = chat_context.get(None, transcript_hash)
+        if context is not None:
+            return context
+        index = chat_index.build_index(transcript)
+    else:
+        raise HTTPException(status_code=400, detail="Either meeting_id or transcript is required")
+    
+    header = transcript[:index["header_end"]].strip()
+    sections = []
+    if header:
+        sections.append(f"Meeting details:\n{header}")
+    if summary:
+        sections.append(f"Meeting summary:\n{summary}")
+    prefix = CHAT_CONTEXT_PROMPT.format(context="\n\n".join(sections))
+    
+    cached_content = None
+    provider_model = None
+    if chat_context.use_provider_cache(transcript):
+        cached_content = chat_context.create_provider_cache(model.model_name, prefix, transcript)
+        if cached_content is not None:
+            provider_model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+    
+    context = chat_context.ChatContext(transcript, index, prefix, summary_hash, cached_content, provider_model)
+    chat_context.put(meeting_id, transcript_hash, context)
+    return context
+
+def prepare_chat_prompt(query, meeting_id=None, transcript=None, history=None):
+    """
+    Build the prompt for one chat question.
+    
+    Blocking, so run it with async_io.run_index.
+    
+    Args:
+        query (str): The user's question
+        meeting_id (str, optional): Stored meeting to answer from
+        transcript (str, optional): Transcript to answer from when there is no meeting_id
+        history (list, optional): Earlier turns as {"role", "text"} dicts, oldest first
+    
+    Returns:
+        tuple: (model to send the prompt to, prompt)
+    """
+    context = load_chat_context(meeting_id, transcript)
+    history_text = chat_context.compact_history(history or [])
+    
+    # A provider-side cache already holds the instructions and the whole transcript
+    if context.cached_content is not None:
+        return context.model, CHAT_QUESTION_PROMPT.format(excerpts="", history=history_text, query=query)
+    
+    _, passages = chat_index.build_context(context.transcript, context.index, query)
+    excerpts = "Relevant transcript excerpts:\n" + "\n\n".join(passages) + "\n\n"
+    return model, context.prefix + "\n\n" + CHAT_QUESTION_PROMPT.format(
+        excerpts=excerpts, history=history_text, query=query
+    )
+
 @app.on_event("startup")
 async def startup_event():
     # Initialize vector database
     vector_db.initialize_vector_db()
+    
+    # Start summarizing queued uploads, including any left over from the last run
+    job_queue.register("summary", run_summary_job)
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    vector_db.shutdown_vector_db()
+    async_io.shutdown()
+
+@app.get("/api/health")
+async def health():
+    """Report index health from the background probe, without a Pinecone round trip."""
+    health = vector_db.get_index_health()
+    health["dependencies"] = async_io.stats()
+    health["jobs"] = await async_io.run_jobs(job_queue.stats)
+    health["search_index"] = search_index.stats()
+    return health
 
 @track
-def summarize_with_gemini(prompt):
-    response = model.generate_content(prompt)
+async def summarize_with_gemini(prompt):
+    response = await async_io.generate_content(model, prompt)
     return response.text
 
+async def stream_summary(prompt, on_progress):
+    """Generate a summary as a stream, passing the text so far to on_progress after each chunk"""
+    parts = []
+    async for text in async_io.stream_content(model, prompt):
+        parts.append(text)
+        on_progress("".join(parts))
+    return "".join(parts)
+
+async def generate_summary(transcript, parsed=None, on_progress=None):
+    """
+    Summarize a transcript, reusing the cached summary of identical text if there is one.
+
+    Long transcripts are summarized chunk by chunk and the chunk summaries merged.
+    With on_progress, a short transcript's summary is streamed and the partial
+    text reported as it arrives.
+    """
+    if chunked_summary.needs_chunking(transcript):
+        generate = lambda: chunked_summary.map_reduce_summary(
+            transcript, summarize_with_gemini, model.model_name, parsed
+        )
+    elif on_progress is not None:
+        generate = lambda: stream_summary(SUMMARY_PROMPT.format(transcript=transcript), on_progress)
+    else:
+        generate = lambda: summarize_with_gemini(SUMMARY_PROMPT.format(transcript=transcript))
+    return await summary_cache.get_or_generate_async(
+        transcript,
+        chunked_summary.prompt_version(transcript),
+        model.model_name,
+        generate
+    )
+
+async def run_summary_job(job):
+    """
+    Job queue handler: summarize a stored meeting and save the summary.
+    
+    The transcript is loaded from the blob store by the hash in the payload,
+    so queued jobs hold nothing in memory.
+    """
+    transcript = await async_io.run_index(get_blob, job["payload"]["transcript_hash"])
+    
+    summary = await generate_summary(
+        transcript,
+        on_progress=lambda text: job_queue.set_progress(job["job_id"], text)
+    )
+    
+    update = await async_io.run_index(vector_db.update_meeting_summary, job["meeting_id"], summary)
+    if update["status"] != "success":
+        raise Exception(update["message"])
+    return {"summary_hash": content_hash(summary)}
+
+@app.get("/api/summary-cache/stats")
+async def summary_cache_stats():
+    """Report summary cache hits, misses and size."""
+    return await async_io.run_cache(summary_cache.stats)
+
+@app.get("/api/search-cache/stats")
+async def search_cache_stats():
+    """Report search result cache hits, misses and size."""
+    return search_cache.stats()
+
+@app.get("/api/chat-cache/stats")
+async def chat_cache_stats():
+    """Report chat context cache hits, misses and size."""
+    return chat_context.stats()
+
 @app.post("/api/summarize-transcript")
 async def summarize_transcript_text(request: SummaryRequest):
     """Generate a summary for a meeting transcript from the vector database."""
     try:
         # Get the meeting data from the vector database
-        result = vector_db.retrieve_meeting(request.meeting_id)
+        result = await async_io.run_index(vector_db.retrieve_meeting, request.meeting_id)
         
         if result["status"] != "success":
             raise HTTPException(status_code=404, detail=f"Meeting with ID {request.meeting_id} not found")
@@ -100,17 +427,11 @@ async def summarize_transcript_text(request: SummaryRequest):
         if not transcript:
             raise HTTPException(status_code=400, detail="No transcript found for this meeting")
         
-        # Generate summary using Gemini
-        prompt = f"""Please provide a concise summary of the following meeting transcript. 
-        Focus on key points, decisions made, and action items. Format the summary in a clear, 
-        structured way with headings and bullet points where appropriate:
-
-        {transcript}"""
-        
-        summary = summarize_with_gemini(prompt)
+        # Generate summary using Gemini (or the summary cache)
+        summary = await generate_summary(transcript)
         
         # Update the meeting with the summary
-        vector_db.update_meeting_summary(request.meeting_id, summary)
+        await async_io.run_index(vector_db.update_meeting_summary, request.meeting_id, summary)
         
         return {
             "meeting_id": request.meeting_id,
@@ -124,47 +445,156 @@ async def summarize_transcript_text(request: SummaryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/summarize")
-async def summarize_transcript(
-    file: UploadFile,
-    emails: str = Form(...),
-    meeting_name: str = Form(...)
-):
-    if not file.filename.endswith('.txt'):
-        raise HTTPException(status_code=400, detail="Only .txt files are supported")
+@app.post("/api/summarize", status_code=202, openapi_extra=TRANSCRIPT_UPLOAD_SCHEMA)
+async def summarize_transcript(request: Request):
+    """
+    Store an uploaded transcript and queue its summary.
+    
+    Answers 202 with the job_id as soon as the meeting is stored; poll
+    GET /api/jobs/{job_id} for the summary.
+    """
+    # Receive the upload, parsing and storing the transcript as it arrives
+    upload = await receive_summarize_upload(request)
     
     try:
-        # Read the file content
-        content = await file.read()
-        transcript = content.decode('utf-8')
-        
-        # Generate summary using Gemini (tracked by Comet)
-        prompt = f"""Please provide a concise summary of the following meeting transcript. \
-        Focus on key points, decisions made, and action items. Format the summary in a clear, \
-        structured way with headings and bullet points where appropriate:\n\n        {transcript}"""
-        summary = summarize_with_gemini(prompt)
-        
-        # Store in vector database
-        attendees = [email.strip() for email in emails.split(',') if email.strip()]
-        meeting_id = vector_db.store_meeting(
-            meeting_name=meeting_name,
-            transcript=transcript,
+        # Store in vector database, reading the transcript back from the blob
+        # store; the summary is added when the job finishes
+        attendees = [email.strip() for email in upload.fields["emails"].split(',') if email.strip()]
+        result = await async_io.run_index(
+            vector_db.store_meeting,
+            meeting_name=upload.fields["meeting_name"],
+            transcript=None,
             meeting_date=datetime.now().isoformat(),
-            attendees=attendees
+            attendees=attendees,
+            parsed=upload.parsed,
+            transcript_hash=upload.transcript_hash
         )
         
-        # Update with summary
-        vector_db.update_meeting_summary(meeting_id, summary)
+        if result["status"] != "success":
+            raise Exception(result["message"])
+        meeting_id = result["meeting_id"]
         
-        return {
-            "summary": summary, 
-            "transcript": transcript,
-            "meeting_id": meeting_id
-        }
+        # Summarize with Gemini (tracked by Comet), or reuse a cached summary, in the background
+        job_id = await job_queue.submit(
+            "summary",
+            meeting_id,
+            {"transcript_hash": upload.transcript_hash}
+        )
+        
+        return JSONResponse(
+            status_code=202,
+            headers={"Location": f"/api/jobs/{job_id}"},
+            content={
+                "job_id": job_id,
+                "status": "queued",
+                "meeting_id": meeting_id
+            }
+        )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Report the status of a background job.
+    
+    Finished summary jobs include the summary; running ones include the
+    partial summary generated so far when it is available.
+    """
+    job = await async_io.run_jobs(job_queue.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    
+    response = {
+        "job_id": job_id,
+        "kind": job["kind"],
+        "meeting_id": job["meeting_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "created_at": datetime.fromtimestamp(job["created_at"]).isoformat(),
+        "updated_at": datetime.fromtimestamp(job["updated_at"]).isoformat()
+    }
+    if job["kind"] == "summary":
+        if job["status"] == "succeeded":
+            response["summary"] = await async_io.run_index(get_blob, job["result"]["summary_hash"])
+        elif job.get("progress"):
+            response["partial_summary"] = job["progress"]
+    return response
+
+@app.post("/api/summarize/stream", openapi_extra=TRANSCRIPT_UPLOAD_SCHEMA)
+async def summarize_transcript_stream(request: Request):
+    """
+    Streaming variant of /api/summarize.
+
+    Emits Server-Sent Events: "meeting" (meeting_id and transcript) as soon as the
+    transcript is stored, a "token" per chunk of summary text, then "done" with the
+    full summary once it has been saved, or "error" if generation fails.
+    """
+    upload = await receive_summarize_upload(request)
+    parsed = upload.parsed
+    
+    try:
+        # Store the transcript first so the client gets a meeting_id before the first token
+        attendees = [email.strip() for email in upload.fields["emails"].split(',') if email.strip()]
+        result = await async_io.run_index(
+            vector_db.store_meeting,
+            meeting_name=upload.fields["meeting_name"],
+            transcript=None,
+            meeting_date=datetime.now().isoformat(),
+            attendees=attendees,
+            parsed=parsed,
+            transcript_hash=upload.transcript_hash
+        )
+        
+        if result["status"] != "success":
+            raise Exception(result["message"])
+        meeting_id = result["meeting_id"]
+        
+        # Summarizing needs the whole text; it is only loaded once the meeting is stored
+        transcript = await async_io.run_index(get_blob, upload.transcript_hash)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def events():
+        yield sse_event("meeting", {"meeting_id": meeting_id, "transcript": transcript})
+        try:
+            prompt_version = chunked_summary.prompt_version(transcript)
+            summary = await async_io.run_cache(summary_cache.get, transcript, prompt_version, model.model_name)
+            if summary is not None:
+                yield sse_event("token", {"text": summary})
+            else:
+                if chunked_summary.needs_chunking(transcript):
+                    # Summarize the chunks up front, then stream the final merge
+                    chunks = chunked_summary.split_transcript(transcript, parsed=parsed)
+                    yield sse_event("progress", {"stage": "chunks", "chunks": len(chunks)})
+                    summaries = await chunked_summary.summarize_chunks(chunks, summarize_with_gemini, model.model_name)
+                    prompt = await chunked_summary.build_reduce_prompt(summaries, summarize_with_gemini, model.model_name)
+                else:
+                    prompt = SUMMARY_PROMPT.format(transcript=transcript)
+                
+                parts = []
+                async for text in async_io.stream_content(model, prompt):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+                summary = "".join(parts)
+                await async_io.run_cache(summary_cache.put, transcript, prompt_version, model.model_name, summary)
+            
+            # Persist the finished summary; a client that disconnects early leaves
+            # the meeting unsummarized, to be completed by /api/summarize-transcript
+            update = await async_io.run_index(vector_db.update_meeting_summary, meeting_id, summary)
+            if update["status"] != "success":
+                raise Exception(update["message"])
+            
+            yield sse_event("done", {"meeting_id": meeting_id, "summary": summary})
+        except Exception as e:
+            print(f"Error streaming summary for meeting {meeting_id}: {str(e)}")
+            yield sse_event("error", {"meeting_id": meeting_id, "detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/api/send-email")
 async def send_email(request: Request):
     try:
@@ -178,44 +608,67 @@ async def send_email(request: Request):
         
         # Format recipients and send email
         recipients = [email.strip() for email in emails.split(',') if email.strip()]
-        send_summary_via_email(summary, recipients)
+        await async_io.run_smtp(send_summary_via_email, summary, recipients)
         
         return {"message": "Email sent successfully"}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def chat_history(request):
+    """Return the request's conversation history as plain dicts"""
+    return [{"role": turn.role, "text": turn.text} for turn in request.history or []]
+
 @app.post("/api/chat")
 async def chat_with_ai(request: ChatRequest):
     try:
-        # Get the query and transcript from the request
-        query = request.query
-        transcript = request.transcript
+        # Build the prompt from the passages relevant to the question
+        chat_model, prompt = await async_io.run_index(
+            prepare_chat_prompt, request.query, request.meeting_id, request.transcript, chat_history(request)
+        )
         
         # Generate response using Gemini
-        prompt = f"""You are an AI assistant helping to answer questions about a meeting transcript.
-        Please answer the following question based only on the information in the transcript.
-        If the question cannot be answered with the information in the transcript, 
-        please indicate that you don't have enough information.
-
-        Meeting Transcript:
-        {transcript}
-        
-        Question: {query}"""
-        
-        response = model.generate_content(prompt)
+        response = await async_io.generate_content(chat_model, prompt)
         answer = response.text
         
         return {"response": answer}
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_with_ai_stream(request: ChatRequest):
+    """
+    Streaming variant of /api/chat.
+
+    Emits a "token" Server-Sent Event per chunk of the answer, then "done" with
+    the full response, or "error" if generation fails.
+    """
+    chat_model, prompt = await async_io.run_index(
+        prepare_chat_prompt, request.query, request.meeting_id, request.transcript, chat_history(request)
+    )
+    
+    async def events():
+        try:
+            parts = []
+            async for text in async_io.stream_content(chat_model, prompt):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            yield sse_event("done", {"response": "".join(parts)})
+        except Exception as e:
+            print(f"Error streaming chat response: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @app.post("/api/meetings")
 async def store_meeting(meeting: MeetingRequest):
     try:
         # Store meeting in vector database
-        meeting_id = vector_db.store_meeting(
+        meeting_id = await async_io.run_index(
+            vector_db.store_meeting,
             meeting_name=meeting.meeting_name,
             transcript=meeting.transcript,
             meeting_date=meeting.meeting_date,
@@ -227,8 +680,79 @@ async def store_meeting(meeting: MeetingRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/meetings/bulk")
+async def store_meetings_bulk(request: Request):
+    """
+    Store meetings from an NDJSON body, one MeetingRequest per line.
+
+    The body is parsed as it arrives and meetings are stored in batches of
+    BULK_BATCH_SIZE, one batch being stored while the next is read. Returns
+    the meeting ID or error of every line.
+    """
+    results = []
+    batch = []
+    pending = None
+    too_long = None
+
+    async def store(batch):
+        stored = await async_io.run_index(
+            vector_db.store_meetings,
+            [meeting.model_dump() for _, meeting in batch]
+        )
+        for (line, _), result in zip(batch, stored):
+            if result["status"] == "success":
+                results.append({"line": line, "meeting_id": result["meeting_id"]})
+            else:
+                results.append({"line": line, "error": result["message"]})
+
+    try:
+        try:
+            async for line, value, error in bulk_ingest.read_ndjson(request.stream()):
+                if error is None:
+                    try:
+                        batch.append((line, MeetingRequest.model_validate(value)))
+                    except ValidationError as ve:
+                        error = "; ".join(
+                            f"{'.'.join(str(part) for part in e['loc']) or 'record'}: {e['msg']}"
+                            for e in ve.errors()
+                        )
+                if error is not None:
+                    results.append({"line": line, "error": error})
+                if len(batch) >= bulk_ingest.BULK_BATCH_SIZE:
+                    if pending is not None:
+                        await pending
+                    pending = asyncio.create_task(store(batch))
+                    batch = []
+        except bulk_ingest.LineTooLong as e:
+            # Stop reading, but still store what was read before the line
+            too_long = str(e)
+        if pending is not None:
+            await pending
+            pending = None
+        if batch:
+            await store(batch)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error storing meetings: {str(e)}")
+    finally:
+        if pending is not None:
+            # Let a batch already being stored finish
+            await asyncio.gather(pending, return_exceptions=True)
+
+    results.sort(key=lambda result: result["line"])
+    stored = sum(1 for result in results if "meeting_id" in result)
+    response = {
+        "status": "success" if stored == len(results) and not too_long else "partial" if stored else "error",
+        "stored": stored,
+        "failed": len(results) - stored,
+        "results": results
+    }
+    if too_long:
+        response["detail"] = too_long
+        return JSONResponse(status_code=413, content=response)
+    return response
+
 @app.get("/api/meetings/{meeting_id}")
-async def get_meeting(meeting_id: str):
+async def get_meeting(meeting_id: str, fields: Optional[str] = None):
     try:
         # Validate meeting ID
         if not meeting_id or meeting_id == "undefined" or meeting_id == "null":
@@ -236,15 +760,27 @@ async def get_meeting(meeting_id: str):
                 status_code=400, 
                 detail=f"Invalid meeting ID: {meeting_id}"
             )
+        
+        selected = parse_fields(fields, MEETING_FIELDS)
             
-        # Get meeting from vector database
-        result = vector_db.retrieve_meeting(meeting_id)
+        # Get meeting from vector database, loading bodies only if they will be returned
+        include_bodies = selected is None or any(field in BODY_FIELDS for field in selected)
+        result = await async_io.run_index(
+            vector_db.retrieve_meeting, meeting_id, include_bodies=include_bodies
+        )
         
         if result["status"] != "success":
             raise HTTPException(status_code=404, detail=f"Meeting with ID {meeting_id} not found")
         
         meeting = result["meeting"]
         
+        # Projected (compact) representation
+        if selected is not None:
+            return JSONResponse({
+                "status": "success",
+                "meeting": compact_meeting(meeting_id, meeting, selected)
+            })
+        
         # Format the meeting data
         # Generate a default name if missing
         meeting_name = meeting.get("meeting_name", "")
@@ -301,28 +837,80 @@ async def get_meeting(meeting_id: str):
 async def search_meetings(search_request: MeetingSearchRequest):
     try:
         # Search meetings in vector database
-        meetings = vector_db.search_meetings(
+        meetings = await async_io.run_index(
+            vector_db.search_meetings,
             query=search_request.query,
-            top_k=search_request.top_k
+            top_k=search_request.top_k,
+            mode=search_request.mode,
+            filters=meeting_filters(
+                search_request.attendees,
+                search_request.date_from,
+                search_request.date_to,
+                search_request.has_summary
+            )
         )
         
         return {"results": meetings}
     
+    except HTTPException as he:
+        # Re-raise HTTP exceptions
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/meetings")
-async def list_meetings():
+async def list_meetings(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    view: str = Query("full", pattern="^(full|compact)$"),
+    fields: Optional[str] = None,
+    attendee: Optional[List[str]] = Query(None),
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    has_summary: Optional[bool] = None
+):
     try:
-        # Get all meetings from vector database
-        meetings_result = vector_db.list_all_meetings()
+        # ?fields= implies the compact view; the list never loads bodies
+        selected = parse_fields(fields, LIST_FIELDS)
+        if selected is None and view == "compact":
+            selected = LIST_FIELDS
+        
+        # Validate the cursor before touching the catalog
+        if cursor:
+            try:
+                meeting_catalog.decode_cursor(cursor)
+            except ValueError as ve:
+                raise HTTPException(status_code=400, detail=str(ve))
+        
+        filters = meeting_filters(attendee, date_from, date_to, has_summary)
+        
+        # Get one page of meetings (newest first) from the catalog
+        meetings_result = await async_io.run_index(
+            vector_db.list_all_meetings, limit=limit, cursor=cursor, filters=filters
+        )
         
         if "status" not in meetings_result or meetings_result["status"] != "success":
             return {"meetings": []}
         
+        if selected is not None:
+            return JSONResponse({
+                "status": "success",
+                "meetings": [
+                    compact_meeting(meeting["meeting_id"], meeting["metadata"], selected)
+                    for meeting in meetings_result["meetings"]
+                ],
+                "total": meetings_result["total"],
+                "next_cursor": meetings_result["next_cursor"]
+            })
+        
+        # Catalog rows only reference the bodies by hash; the full view includes them
+        bodies = await async_io.run_index(
+            meeting_bodies, [meeting["metadata"] for meeting in meetings_result["meetings"]]
+        )
+        
         # Format the meetings for the frontend
         formatted_meetings = []
-        for meeting in meetings_result["meetings"]:
+        for meeting, (summary, transcript) in zip(meetings_result["meetings"], bodies):
             meeting_id = meeting["meeting_id"]
             metadata = meeting["metadata"]
             
@@ -348,33 +936,32 @@ async def list_meetings():
                     "meeting_date": meeting_date,
                     "date": meeting_date,
                     "attendees": metadata.get("attendees", []),
-                    "summary": metadata.get("summary", ""),
-                    "transcript": metadata.get("transcript", ""),
+                    "summary": summary,
+                    "transcript": transcript,
                     "timestamp": metadata.get("timestamp", "")
                 },
                 "name": meeting_name,    # Add name at top level for API consumers
                 "date": meeting_date,    # Add date at top level for API consumers
                 "attendees": metadata.get("attendees", []),
-                "has_summary": "summary" in metadata and metadata["summary"].strip() != "",
-                "has_enhanced_data": any(
-                    key in metadata for key in ["action_items", "key_topics", "decisions", "next_steps"]
+                "has_summary": bool(metadata.get("has_summary")),
+                "has_enhanced_data": metadata.get(
+                    "has_enhanced_data",
+                    any(key in metadata for key in ["action_items", "key_topics", "decisions", "next_steps"])
                 )
             }
             formatted_meetings.append(formatted_meeting)
         
-        # Sort meetings by meeting_date (newest first)
-        sorted_meetings = sorted(
-            formatted_meetings,
-            key=lambda x: x.get("date", "1970-01-01"),
-            reverse=True  # Newest first
-        )
-        
+        # The catalog already returns meetings sorted by date (newest first)
         return {
             "status": "success",
-            "meetings": sorted_meetings,
-            "total": len(sorted_meetings)
+            "meetings": formatted_meetings,
+            "total": meetings_result["total"],
+            "next_cursor": meetings_result["next_cursor"]
         }
     
+    except HTTPException as he:
+        # Re-raise HTTP exceptions
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing meetings: {str(e)}")
 
@@ -391,7 +978,9 @@ async def delete_meeting(meeting_id: str):
         print(f"FastAPI: Processing delete request for meeting ID: {meeting_id}")
         
         # Call delete_meeting function with namespace
-        result = vector_db.delete_meeting(meeting_id, namespace=vector_db.DEFAULT_NAMESPACE)
+        result = await async_io.run_index(
+            vector_db.delete_meeting, meeting_id, namespace=vector_db.DEFAULT_NAMESPACE
+        )
         
         # Check result
         if result["status"] != "success":
@@ -402,17 +991,6 @@ async def delete_meeting(meeting_id: str):
                 detail=error_message
             )
             
-        # Give Pinecone some time to process the deletion
-        await asyncio.sleep(0.5)  
-        
-        # Force a refresh of the Pinecone index to ensure deletion is reflected
-        # Try to access the meeting to verify it's gone (double-check)
-        verify_result = vector_db.retrieve_meeting(meeting_id)
-        if verify_result["status"] == "success":
-            print(f"FastAPI: Warning - Meeting still exists after deletion reported as successful")
-            # Meeting still exists - unusual but we'll report success anyway
-            # since the vector_db layer reported success
-        
         print(f"FastAPI: Delete operation completed successfully for meeting ID: {meeting_id}")
         return {
             "status": "success",
@@ -435,7 +1013,8 @@ async def delete_meeting(meeting_id: str):
 async def update_meeting_attendees(meeting_id: str, request: UpdateAttendeesRequest):
     try:
         # Update attendees in vector database
-        result = vector_db.update_meeting_attendees(
+        result = await async_io.run_index(
+            vector_db.update_meeting_attendees,
             meeting_id=meeting_id,
             attendees=request.attendees
         )
@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import base64
+import sqlite3
+import threading
+from datetime import datetime
+
+# The catalog lives next to the legacy meetings table in meetings.db
+CATALOG_DB = os.getenv(
+    'MEETING_CATALOG_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'meetings.db')
+)
+
+# Metadata keys that mark a meeting as having enhanced (structured) summary data
+ENHANCED_FIELDS = ["action_items", "key_topics", "decisions", "next_steps"]
+
+_lock = threading.Lock()
+_conn = None
+
+def _connection():
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(CATALOG_DB, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS meeting_catalog (
+                namespace TEXT NOT NULL,
+                meeting_id TEXT NOT NULL,
+                meeting_name TEXT NOT NULL,
+                meeting_date TEXT,
+                sort_date TEXT NOT NULL,
+                timestamp TEXT,
+                attendees TEXT NOT NULL,
+                has_summary INTEGER NOT NULL DEFAULT 0,
+                has_enhanced_data INTEGER NOT NULL DEFAULT 0,
+                transcript_hash TEXT,
+                summary_hash TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (namespace, meeting_id)
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_meeting_catalog_date "
+            "ON meeting_catalog (namespace, sort_date DESC, meeting_id DESC)"
+        )
+        # Attendee -> meeting index for attendee filters; name is the part of
+        # the address before the @, so "raj.patel" matches raj.patel@example.com
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS meeting_attendees (
+                namespace TEXT NOT NULL,
+                attendee TEXT NOT NULL,
+                name TEXT NOT NULL,
+                meeting_id TEXT NOT NULL,
+                PRIMARY KEY (namespace, attendee, meeting_id)
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_meeting_attendees_name "
+            "ON meeting_attendees (namespace, name, meeting_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_meeting_attendees_meeting "
+            "ON meeting_attendees (namespace, meeting_id)"
+        )
+        # Per-namespace counter bumped by every write to the namespace,
+        # including ones that change no catalog row (e.g. re-embedding)
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS catalog_versions (
+                namespace TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )"""
+        )
+        # Namespace version at which each meeting was last written or
+        # deleted, so indexes built from the catalog can apply only the changes
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS catalog_changes (
+                namespace TEXT NOT NULL,
+                meeting_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (namespace, meeting_id)
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_catalog_changes_version "
+            "ON catalog_changes (namespace, version)"
+        )
+        # Catalogs written before the attendee index existed are indexed once
+        if conn.execute("SELECT 1 FROM meeting_attendees LIMIT 1").fetchone() is None:
+            rows = conn.execute("SELECT namespace, meeting_id, attendees FROM meeting_catalog").fetchall()
+            conn.executemany(
+                "INSERT OR IGNORE INTO meeting_attendees (namespace, attendee, name, meeting_id) VALUES (?, ?, ?, ?)",
+                [
+                    attendee_row
+                    for namespace, meeting_id, attendees in rows
+                    for attendee_row in _attendee_rows(meeting_id, json.loads(attendees), namespace)
+                ]
+            )
+        conn.commit()
+        _conn = conn
+    return _conn
+
+def _attendee_key(attendee):
+    """Normalized attendee address and the name before its @"""
+    attendee = attendee.strip().lower()
+    return attendee, attendee.split("@", 1)[0]
+
+def _attendee_rows(meeting_id, attendees, namespace):
+    keys = {_attendee_key(attendee) for attendee in attendees if isinstance(attendee, str) and attendee.strip()}
+    return [(namespace, attendee, name, meeting_id) for attendee, name in keys]
+
+def _sort_date(metadata):
+    # Same fallback the API uses for display: meeting date, else upload timestamp
+    meeting_date = metadata.get("meeting_date") or ""
+    if not meeting_date.strip():
+        meeting_date = metadata.get("timestamp") or ""
+        if meeting_date.endswith("Z"):
+            meeting_date = meeting_date[:-1]
+    return meeting_date
+
+def _row(meeting_id, metadata, namespace):
+    summary = metadata.get("summary")
+    has_summary = metadata.get("has_summary", bool(summary and summary.strip()))
+    return (
+        namespace,
+        meeting_id,
+        metadata.get("meeting_name") or "",
+        metadata.get("meeting_date"),
+        _sort_date(metadata),
+        metadata.get("timestamp"),
+        json.dumps(metadata.get("attendees") or []),
+        int(bool(has_summary)),
+        int(bool(metadata.get("has_enhanced_data")) or any(key in metadata for key in ENHANCED_FIELDS)),
+        metadata.get("transcript_hash"),
+        metadata.get("summary_hash"),
+        datetime.now().isoformat()
+    )
+
+def _bump_version(conn, namespace):
+    """Increment a namespace's version within the current transaction and return it"""
+    conn.execute(
+        "INSERT INTO catalog_versions (namespace, version) VALUES (?, 1) "
+        "ON CONFLICT (namespace) DO UPDATE SET version = version + 1",
+        (namespace,)
+    )
+    return conn.execute(
+        "SELECT version FROM catalog_versions WHERE namespace = ?", (namespace,)
+    ).fetchone()[0]
+
+def _record_changes(conn, meeting_ids, namespace):
+    version = _bump_version(conn, namespace)
+    conn.executemany(
+        "INSERT OR REPLACE INTO catalog_changes (namespace, meeting_id, version) VALUES (?, ?, ?)",
+        [(namespace, meeting_id, version) for meeting_id in meeting_ids]
+    )
+
+def upsert_meetings(records, namespace):
+    """
+    Write catalog entries for meetings that were just written to the index.
+
+    Args:
+        records (list): (meeting_id, metadata) pairs
+        namespace (str): Namespace of the meetings
+    """
+    if not records:
+        return
+    with _lock:
+        conn = _connection()
+        conn.executemany(
+            """INSERT OR REPLACE INTO meeting_catalog (
+                namespace, meeting_id, meeting_name, meeting_date, sort_date, timestamp,
+                attendees, has_summary, has_enhanced_data, transcript_hash, summary_hash, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [_row(meeting_id, metadata, namespace) for meeting_id, metadata in records]
+        )
+        conn.executemany(
+            "DELETE FROM meeting_attendees WHERE namespace = ? AND meeting_id = ?",
+            [(namespace, meeting_id) for meeting_id, _ in records]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO meeting_attendees (namespace, attendee, name, meeting_id) VALUES (?, ?, ?, ?)",
+            [
+                attendee_row
+                for meeting_id, metadata in records
+                for attendee_row in _attendee_rows(meeting_id, metadata.get("attendees") or [], namespace)
+            ]
+        )
+        _record_changes(conn, [meeting_id for meeting_id, _ in records], namespace)
+        conn.commit()
+
+def upsert_meeting(meeting_id, metadata, namespace):
+    """Write the catalog entry for one meeting"""
+    upsert_meetings([(meeting_id, metadata)], namespace)
+
+def delete_meeting(meeting_id, namespace):
+    """Remove a meeting from the catalog"""
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "DELETE FROM meeting_catalog WHERE namespace = ? AND meeting_id = ?",
+            (namespace, meeting_id)
+        )
+        conn.execute(
+            "DELETE FROM meeting_attendees WHERE namespace = ? AND meeting_id = ?",
+            (namespace, meeting_id)
+        )
+        _record_changes(conn, [meeting_id], namespace)
+        conn.commit()
+
+def data_version():
+    """
+    Return SQLite's data version of the catalog, which changes whenever another
+    connection (e.g. a loader script in another process) commits to it
+    """
+    with _lock:
+        return _connection().execute("PRAGMA data_version").fetchone()[0]
+
+def touch(namespace):
+    """
+    Record a change to a namespace's vectors that leaves its catalog rows as
+    they are, so data_version changes for every other process
+    """
+    with _lock:
+        conn = _connection()
+        _bump_version(conn, namespace)
+        conn.commit()
+
+def namespace_version(namespace):
+    """Return a namespace's version, which every write to it (from any process) increments"""
+    with _lock:
+        row = _connection().execute(
+            "SELECT version FROM catalog_versions WHERE namespace = ?", (namespace,)
+        ).fetchone()
+    return row[0] if row else 0
+
+def changed_since(namespace, version):
+    """
+    Return the meetings written or deleted in a namespace after a version.
+
+    Args:
+        namespace (str): Namespace to check
+        version (int): Version returned by namespace_version earlier
+
+    Returns:
+        tuple: (current namespace version, list of changed meeting IDs)
+    """
+    current = namespace_version(namespace)
+    with _lock:
+        rows = _connection().execute(
+            "SELECT meeting_id FROM catalog_changes WHERE namespace = ? AND version > ?",
+            (namespace, version)
+        ).fetchall()
+    return current, [row[0] for row in rows]
+
+# Filters accepted by list_meetings, count_meetings and filter_meeting_ids
+FILTER_KEYS = ("attendees", "date_from", "date_to", "has_summary")
+
+def _filter_clause(namespace, filters):
+    """
+    Build the WHERE conditions (after the namespace) for meeting filters.
+
+    Dates are compared against the sort date (meeting date, else upload time)
+    as ISO strings, so the date index serves the range. date_to is inclusive:
+    "~" sorts after the time part of any timestamp on that day. Every listed
+    attendee must have attended, matched by full address or by the name before the @.
+
+    Args:
+        namespace (str): Namespace being filtered
+        filters (dict): Any of attendees (list), date_from, date_to (YYYY-MM-DD) and has_summary (bool)
+
+    Returns:
+        tuple: (SQL fragment starting with " AND" or empty, parameters)
+    """
+    clause = ""
+    params = []
+    if not filters:
+        return clause, params
+    if filters.get("date_from"):
+        clause += " AND sort_date >= ?"
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        clause += " AND sort_date <= ?"
+        params.append(filters["date_to"] + "~")
+    if filters.get("has_summary") is not None:
+        clause += " AND has_summary = ?"
+        params.append(int(bool(filters["has_summary"])))
+    for attendee in filters.get("attendees") or []:
+        address, name = _attendee_key(attendee)
+        clause += (
+            " AND meeting_id IN (SELECT meeting_id FROM meeting_attendees WHERE namespace = ? AND "
+            + ("attendee = ?" if "@" in address else "name = ?") + ")"
+        )
+        params += [namespace, address if "@" in address else name]
+    return clause, params
+
+def _sort_day(sort_date):
+    """YYYYMMDD number of an ISO date or timestamp, or None if it does not start with one"""
+    digits = (sort_date or "")[:10].replace("-", "")
+    return int(digits) if len(digits) == 8 and digits.isdigit() else None
+
+def filter_metadata(metadata):
+    """
+    Vector metadata fields that let a vector store apply the meeting filters itself.
+
+    attendee_keys holds every attendee's normalized address and the name before
+    its @, and sort_day the sort date as a YYYYMMDD number (0 if it has none),
+    since Pinecone range filters only compare numbers.
+
+    Args:
+        metadata (dict): Meeting metadata with attendees, meeting_date and timestamp
+
+    Returns:
+        dict: The fields, to merge into the vector metadata
+    """
+    keys = set()
+    for attendee in metadata.get("attendees") or []:
+        if isinstance(attendee, str) and attendee.strip():
+            keys.update(_attendee_key(attendee))
+    return {
+        "attendee_keys": sorted(keys),
+        "sort_day": _sort_day(_sort_date(metadata)) or 0
+    }
+
+def vector_filter(filters):
+    """
+    Translate meeting filters to a Pinecone metadata filter over the fields of filter_metadata.
+
+    The translation matches the same meetings as _filter_clause, except that
+    dates that are not YYYY-MM-DD are left to the catalog.
+
+    Args:
+        filters (dict): Filters, as for _filter_clause
+
+    Returns:
+        dict: The metadata filter, or None if there is nothing to filter on
+    """
+    conditions = []
+    for attendee in filters.get("attendees") or []:
+        address, name = _attendee_key(attendee)
+        conditions.append({"attendee_keys": {"$in": [address if "@" in address else name]}})
+    for key, op in (("date_from", "$gte"), ("date_to", "$lte")):
+        day = _sort_day(filters.get(key))
+        if day is not None:
+            conditions.append({"sort_day": {op: day}})
+    if filters.get("has_summary") is not None:
+        conditions.append({"has_summary": {"$eq": bool(filters["has_summary"])}})
+    return {"$and": conditions} if conditions else None
+
+def count_meetings(namespace, filters=None):
+    """Return the number of catalogued meetings in a namespace, optionally matching filters"""
+    clause, params = _filter_clause(namespace, filters)
+    with _lock:
+        return _connection().execute(
+            f"SELECT COUNT(*) FROM meeting_catalog WHERE namespace = ?{clause}", [namespace, *params]
+        ).fetchone()[0]
+
+def filter_meeting_ids(namespace, filters):
+    """
+    Return the IDs of the meetings matching filters, from the local date and attendee indexes.
+
+    Args:
+        namespace (str): Namespace to filter
+        filters (dict): Filters, as for _filter_clause
+
+    Returns:
+        list: Matching meeting IDs, newest first
+    """
+    clause, params = _filter_clause(namespace, filters)
+    with _lock:
+        rows = _connection().execute(
+            f"SELECT meeting_id FROM meeting_catalog WHERE namespace = ?{clause} "
+            "ORDER BY sort_date DESC, meeting_id DESC",
+            [namespace, *params]
+        ).fetchall()
+    return [row[0] for row in rows]
+
+def encode_cursor(sort_date, meeting_id):
+    """Encode a keyset position as an opaque URL-safe cursor"""
+    raw = json.dumps([sort_date, meeting_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_date, meeting_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_date, meeting_id
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+_COLUMNS = (
+    "meeting_id, meeting_name, meeting_date, sort_date, timestamp, attendees, "
+    "has_summary, has_enhanced_data, transcript_hash, summary_hash"
+)
+
+def _metadata(row):
+    """Convert a catalog row selected with _COLUMNS to vector-style metadata"""
+    metadata = {
+        "meeting_name": row[1],
+        "meeting_date": row[2],
+        "timestamp": row[4],
+        "attendees": json.loads(row[5]),
+        "has_summary": bool(row[6]),
+        "has_enhanced_data": bool(row[7])
+    }
+    if row[8]:
+        metadata["transcript_hash"] = row[8]
+    if row[9]:
+        metadata["summary_hash"] = row[9]
+    return metadata
+
+def get_meeting(meeting_id, namespace):
+    """Return the catalog metadata of one meeting, or None if it is not catalogued"""
+    with _lock:
+        row = _connection().execute(
+            f"SELECT {_COLUMNS} FROM meeting_catalog WHERE namespace = ? AND meeting_id = ?",
+            (namespace, meeting_id)
+        ).fetchone()
+    return _metadata(row) if row else None
+
+def list_meetings(namespace, limit=100, cursor=None, filters=None):
+    """
+    Return one page of meetings, newest first, using keyset pagination.
+
+    Args:
+        namespace (str): Namespace to list
+        limit (int, optional): Page size
+        cursor (str, optional): Cursor returned with the previous page
+        filters (dict, optional): Only list meetings matching these filters (see _filter_clause)
+
+    Returns:
+        tuple: (list of (meeting_id, metadata) pairs, next cursor or None)
+    """
+    clause, params = _filter_clause(namespace, filters)
+    query = f"SELECT {_COLUMNS} FROM meeting_catalog WHERE namespace = ?{clause}"
+    params = [namespace, *params]
+    if cursor:
+        sort_date, meeting_id = decode_cursor(cursor)
+        query += " AND (sort_date, meeting_id) < (?, ?)"
+        params += [sort_date, meeting_id]
+    query += " ORDER BY sort_date DESC, meeting_id DESC LIMIT ?"
+    # Fetch one extra row to learn whether another page exists
+    params.append(limit + 1)
+
+    with _lock:
+        rows = _connection().execute(query, params).fetchall()
+
+    meetings = [(row[0], _metadata(row)) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[3], last[0])
+    return meetings, next_cursor
@@ -5,14 +5,17 @@
 
 import os
 import json
+import argparse
 from datetime import datetime
 from dotenv import load_dotenv
 import google.generativeai as genai
+import summary_cache
+from batch_runner import TokenBucket, Checkpoint, run_batch
+from prompts import ENHANCED_SUMMARY_PROMPT, ENHANCED_SUMMARY_PROMPT_VERSION
 from vector_db import (
-    list_all_meetings,
+    iter_all_meetings,
     retrieve_meeting,
     update_meeting_summary,
-    connect_to_index,
     DEFAULT_NAMESPACE
 )
 
@@ -27,7 +30,42 @@ if not GOOGLE_API_KEY:
 genai.configure(api_key=GOOGLE_API_KEY)
 llm_model = genai.GenerativeModel('gemini-1.5-pro')
 
-def summarize_transcript(transcript, meeting_name, meeting_date, attendees):
+# Concurrent meetings in process_all_meetings
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))
+
+# Gemini requests per minute allowed for the batch; match the project's quota
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '60'))
+
+# Retries per meeting, with jittered exponential backoff
+BATCH_MAX_RETRIES = int(os.getenv('BATCH_MAX_RETRIES', '3'))
+
+# Meetings finished by an interrupted run are skipped when it is started again
+BATCH_CHECKPOINT = os.getenv(
+    'BATCH_CHECKPOINT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'process_transcripts.checkpoint.jsonl')
+)
+
+def parse_summary_response(content):
+    """
+    Parse the JSON object out of a model response.
+    
+    Args:
+        content (str): Raw response text, possibly wrapped in a code block
+    
+    Returns:
+        dict: The parsed enhanced summary
+    """
+    # If JSON is in code block format, extract it
+    if "```json" in content and "```" in content.split("```json", 1)[1]:
+        json_content = content.split("```json", 1)[1].split("```", 1)[0].strip()
+    elif "```" in content and "```" in content.split("```", 1)[1]:
+        json_content = content.split("```", 1)[1].split("```", 1)[0].strip()
+    else:
+        json_content = content.strip()
+    
+    return json.loads(json_content)
+
+def summarize_transcript(transcript, meeting_name, meeting_date, attendees, limiter=None, raise_errors=False):
     """
     Send transcript to LLM for summarization.
     Returns enhanced summary with additional structured information.
@@ -37,50 +75,38 @@ def summarize_transcript(transcript, meeting_name, meeting_date, attendees):
         meeting_name (str): Name of the meeting
         meeting_date (str): Date of the meeting
         attendees (list): List of attendees
+        limiter (TokenBucket, optional): Rate limiter to acquire before calling the model
+        raise_errors (bool, optional): Raise on failure instead of returning a placeholder summary
         
     Returns:
         dict: Enhanced summary with structured data
     """
     # Prepare prompt for the LLM
-    prompt = f"""
-    You are a professional meeting summarizer. Your task is to analyze the following meeting transcript 
-    and create a comprehensive summary with key sections:
-
-    Meeting: {meeting_name}
-    Date: {meeting_date}
-    Attendees: {', '.join(attendees)}
-
-    Transcript:
-    {transcript}
-
-    Please provide your response in JSON format with the following keys:
-    - summary: A concise summary of the meeting (300 words max)
-    - action_items: List of action items with assignee and deadline if mentioned
-    - key_topics: List of main topics discussed
-    - decisions: List of decisions made
-    - next_steps: Any planned follow-up actions or meetings
-    
-    Make sure your output is valid JSON.
-    """
+    prompt = ENHANCED_SUMMARY_PROMPT.format(
+        meeting_name=meeting_name,
+        meeting_date=meeting_date,
+        attendees=', '.join(attendees),
+        transcript=transcript
+    )
     
     try:
-        # Generate response
-        response = llm_model.generate_content(prompt)
+        # Reuse a cached response for the same meeting content if there is one;
+        # the whole prompt is the cache key since it embeds the meeting header
+        content = summary_cache.get(prompt, ENHANCED_SUMMARY_PROMPT_VERSION, llm_model.model_name)
+        from_cache = content is not None
+        if not from_cache:
+            # Generate response, within the rate limit (cache hits do not count)
+            if limiter is not None:
+                limiter.acquire()
+            response = llm_model.generate_content(prompt)
+            content = response.text
         
         # Parse the JSON from the response
-        # Find the JSON content between triple backticks if present
-        content = response.text
-        
-        # If JSON is in code block format, extract it
-        if "```json" in content and "```" in content.split("```json", 1)[1]:
-            json_content = content.split("```json", 1)[1].split("```", 1)[0].strip()
-        elif "```" in content and "```" in content.split("```", 1)[1]:
-            json_content = content.split("```", 1)[1].split("```", 1)[0].strip()
-        else:
-            json_content = content.strip()
+        enhanced_summary = parse_summary_response(content)
         
-        # Parse JSON response
-        enhanced_summary = json.loads(json_content)
+        # Only cache responses that parsed successfully
+        if not from_cache:
+            summary_cache.put(prompt, ENHANCED_SUMMARY_PROMPT_VERSION, llm_model.model_name, content)
         
         # Add processing timestamp
         enhanced_summary["processed_at"] = datetime.now().isoformat()
@@ -88,6 +114,8 @@ def summarize_transcript(transcript, meeting_name, meeting_date, attendees):
         return enhanced_summary
     
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error generating summary: {e}")
         return {
             "summary": f"Error generating summary: {str(e)}",
@@ -105,32 +133,32 @@ def get_unsummarized_meetings(namespace=DEFAULT_NAMESPACE):
     Returns:
         list: List of meeting IDs that need summarization
     """
-    result = list_all_meetings(namespace)
-    
-    if result["status"] != "success":
-        print(f"Error fetching meetings: {result['message']}")
-        return []
-    
     meetings_to_process = []
     
-    for meeting in result["meetings"]:
-        metadata = meeting["metadata"]
-        
-        # Check if meeting needs processing (missing summary or enhanced fields)
-        if "summary" not in metadata or not any(
-            key in metadata for key in ["action_items", "key_topics", "decisions", "next_steps"]
-        ):
-            meetings_to_process.append(meeting["meeting_id"])
+    try:
+        for meeting in iter_all_meetings(namespace):
+            metadata = meeting["metadata"]
+            
+            # Check if meeting needs processing (missing summary or enhanced fields)
+            if not metadata.get("has_summary") or not metadata.get("has_enhanced_data"):
+                meetings_to_process.append(meeting["meeting_id"])
+    except Exception as e:
+        print(f"Error fetching meetings: {e}")
+        return []
     
     return meetings_to_process
 
-def process_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
+def process_meeting(meeting_id, namespace=DEFAULT_NAMESPACE, limiter=None):
     """
     Process a single meeting: fetch, summarize, and update in Pinecone.
     
+    A failed summary is reported as an error and the meeting left unchanged,
+    so it can be retried.
+    
     Args:
         meeting_id (str): ID of the meeting to process
         namespace (str): Pinecone namespace
+        limiter (TokenBucket, optional): Rate limiter for the model call
         
     Returns:
         dict: Status of processing
@@ -146,20 +174,23 @@ def process_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
     
     # Generate enhanced summary
     print(f"Summarizing meeting: {meeting['meeting_name']}")
-    enhanced_summary = summarize_transcript(
-        meeting["transcript"],
-        meeting["meeting_name"],
-        meeting["meeting_date"],
-        meeting["attendees"]
-    )
+    try:
+        enhanced_summary = summarize_transcript(
+            meeting["transcript"],
+            meeting["meeting_name"],
+            meeting["meeting_date"],
+            meeting["attendees"],
+            limiter=limiter,
+            raise_errors=True
+        )
+    except Exception as e:
+        print(f"Error summarizing meeting {meeting_id}: {e}")
+        return {"status": "error", "message": str(e)}
     
     # Update original meeting metadata with enhanced summary data
     for key, value in enhanced_summary.items():
         meeting[key] = value
     
-    # Connect to the index
-    index = connect_to_index()
-    
     # Extract summary and additional fields
     summary = enhanced_summary.pop("summary")
     
@@ -178,15 +209,25 @@ def process_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
     print(f"Successfully processed meeting: {meeting['meeting_name']}")
     return {"status": "success", "meeting_id": meeting_id}
 
-def process_all_meetings(namespace=DEFAULT_NAMESPACE):
+def process_all_meetings(namespace=DEFAULT_NAMESPACE, workers=None, requests_per_minute=None,
+                         max_retries=None, checkpoint_path=None):
     """
-    Process all meetings that need summarization.
+    Process all meetings that need summarization, several at a time.
+    
+    Model calls share a token bucket matched to the Gemini quota, failed meetings
+    are retried with jittered backoff, and finished meetings are recorded in a
+    checkpoint file so an interrupted run resumes where it stopped. The
+    checkpoint is removed once a run finishes without failures.
     
     Args:
         namespace (str): Pinecone namespace
+        workers (int, optional): Concurrent meetings (default BATCH_WORKERS)
+        requests_per_minute (float, optional): Gemini rate limit (default GEMINI_REQUESTS_PER_MINUTE)
+        max_retries (int, optional): Retries per meeting (default BATCH_MAX_RETRIES)
+        checkpoint_path (str, optional): Checkpoint file (default BATCH_CHECKPOINT)
         
     Returns:
-        dict: Processing results
+        dict: Processing results and throughput
     """
     # Get meetings needing summarization
     meetings_to_process = get_unsummarized_meetings(namespace)
@@ -195,32 +236,63 @@ def process_all_meetings(namespace=DEFAULT_NAMESPACE):
         print("No meetings need processing.")
         return {"status": "success", "processed": 0, "total": 0}
     
-    print(f"Found {len(meetings_to_process)} meetings to process")
-    
-    # Process each meeting
-    processed = 0
-    failed = 0
-    results = []
+    workers = workers or BATCH_WORKERS
+    limiter = TokenBucket(requests_per_minute or GEMINI_REQUESTS_PER_MINUTE)
+    checkpoint = Checkpoint(checkpoint_path or BATCH_CHECKPOINT)
+    print(f"Found {len(meetings_to_process)} meetings to process with {workers} workers")
     
-    for meeting_id in meetings_to_process:
-        result = process_meeting(meeting_id, namespace)
-        results.append(result)
-        
-        if result["status"] == "success":
-            processed += 1
-        else:
-            failed += 1
+    # Process meetings concurrently
+    results, report = run_batch(
+        meetings_to_process,
+        lambda meeting_id: process_meeting(meeting_id, namespace, limiter),
+        workers=workers,
+        checkpoint=checkpoint,
+        max_retries=BATCH_MAX_RETRIES if max_retries is None else max_retries,
+        label="meetings"
+    )
+    stats = report.snapshot()
+    if stats["failed"] == 0:
+        checkpoint.remove()
     
-    print(f"Processing complete. Processed: {processed}, Failed: {failed}")
+    print(
+        f"Processing complete. Processed: {stats['processed']}, Failed: {stats['failed']}, "
+        f"Retried: {stats['retried']}, Skipped: {stats['skipped']}"
+    )
+    print(
+        f"Throughput: {stats['per_minute']:.1f} meetings/min over {stats['elapsed_seconds']:.0f}s "
+        f"({limiter.waited:.0f}s waiting for the rate limit)"
+    )
+    cache_stats = summary_cache.stats()
+    print(f"Summary cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
     
     return {
         "status": "success",
-        "processed": processed,
-        "failed": failed,
+        "processed": stats["processed"],
+        "failed": stats["failed"],
+        "retried": stats["retried"],
+        "skipped": stats["skipped"],
         "total": len(meetings_to_process),
+        "elapsed_seconds": stats["elapsed_seconds"],
+        "meetings_per_minute": stats["per_minute"],
         "results": results
     }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate enhanced summaries for meetings that need them')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS, help='Meetings processed concurrently')
+    parser.add_argument('--rpm', type=float, default=GEMINI_REQUESTS_PER_MINUTE, help='Gemini requests per minute')
+    parser.add_argument('--retries', type=int, default=BATCH_MAX_RETRIES, help='Retries per failed meeting')
+    parser.add_argument('--checkpoint', type=str, default=BATCH_CHECKPOINT, help='Checkpoint file for resuming')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+    args = parser.parse_args()
+    
+    if args.restart:
+        Checkpoint(args.checkpoint).remove()
+    
     print("Starting meeting transcript processing...")
-    process_all_meetings() 
\ No newline at end of file
+    process_all_meetings(
+        workers=args.workers,
+        requests_per_minute=args.rpm,
+        max_retries=args.retries,
+        checkpoint_path=args.checkpoint
+    )
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# Bump a *_VERSION whenever its template changes so cached responses
+# produced by the old wording are no longer reused
+
+SUMMARY_PROMPT_VERSION = "summary-v1"
+SUMMARY_PROMPT = """Please provide a concise summary of the following meeting transcript.
+Focus on key points, decisions made, and action items. Format the summary in a clear,
+structured way with headings and bullet points where appropriate:
+
+{transcript}"""
+
+ENHANCED_SUMMARY_PROMPT_VERSION = "enhanced-summary-v1"
+ENHANCED_SUMMARY_PROMPT = """
+You are a professional meeting summarizer. Your task is to analyze the following meeting transcript
+and create a comprehensive summary with key sections:
+
+Meeting: {meeting_name}
+Date: {meeting_date}
+Attendees: {attendees}
+
+Transcript:
+{transcript}
+
+Please provide your response in JSON format with the following keys:
+- summary: A concise summary of the meeting (300 words max)
+- action_items: List of action items with assignee and deadline if mentioned
+- key_topics: List of main topics discussed
+- decisions: List of decisions made
+- next_steps: Any planned follow-up actions or meetings
+
+Make sure your output is valid JSON.
+"""
+
+# Long transcripts are summarized in chunks (map) whose notes are then merged (reduce)
+CHUNK_SUMMARY_PROMPT_VERSION = "chunk-summary-v1"
+CHUNK_SUMMARY_PROMPT = """The following is part {part} of {total} of a meeting transcript.
+Write concise notes on this part only: key points, decisions made, action items
+(with owner and deadline if mentioned) and open questions. Keep speaker names.
+
+{transcript}"""
+
+MERGE_SUMMARY_PROMPT_VERSION = "merge-summary-v1"
+MERGE_SUMMARY_PROMPT = """The following are notes on consecutive parts of one meeting, in order.
+Combine them into a single set of concise notes, keeping every decision, action item
+and open question and removing repetition:
+
+{summaries}"""
+
+REDUCE_SUMMARY_PROMPT_VERSION = "reduce-summary-v1"
+REDUCE_SUMMARY_PROMPT = """The following are notes on consecutive parts of one meeting, in order.
+Please provide a concise summary of the whole meeting from these notes.
+Focus on key points, decisions made, and action items. Format the summary in a clear,
+structured way with headings and bullet points where appropriate:
+
+{summaries}"""
+
+# The context prompt is the same for every question about a meeting and is
+# prepared once per meeting; only the question prompt changes per question
+CHAT_CONTEXT_PROMPT_VERSION = "chat-context-v2"
+CHAT_CONTEXT_PROMPT = """You are an AI assistant helping to answer questions about a meeting.
+Please answer the user's question based only on the meeting information provided.
+If the question cannot be answered with this information,
+please indicate that you don't have enough information.
+
+{context}"""
+
+CHAT_QUESTION_PROMPT = """{excerpts}{history}Question: {query}"""
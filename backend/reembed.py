@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Re-embed stored meetings with the current embedding model.
+
+Streams through a namespace one page of IDs at a time, re-embeds the meetings
+whose vectors were produced by another model (or version), and updates them in
+place. Only one page of records is held in memory.
+
+The API may keep serving while this runs: vector search only scores meetings
+embedded with the API's own model, so meetings on the other model drop out of
+vector rankings (keyword search still finds them) until the migration is done
+and the API is restarted with the new EMBEDDING_PROVIDER.
+
+Usage:
+    EMBEDDING_PROVIDER=lexical python reembed.py [--namespace NS] [--dry-run] [--force]
+"""
+import time
+import argparse
+import embeddings
+import search_cache
+import meeting_catalog
+import vector_db
+
+def reembed_namespace(namespace=vector_db.DEFAULT_NAMESPACE, page_size=100, batch_size=None,
+                      force=False, dry_run=False):
+    """
+    Re-embed every meeting in a namespace not embedded with the current model.
+
+    Args:
+        namespace (str, optional): Namespace to migrate
+        page_size (int, optional): Number of records fetched (and held in memory) at a time
+        batch_size (int, optional): Number of texts embedded per call (default EMBEDDING_BATCH_SIZE)
+        force (bool, optional): Re-embed every meeting, even those already current
+        dry_run (bool, optional): Only count the meetings that would be re-embedded
+
+    Returns:
+        dict: Status and counts of scanned, re-embedded and failed meetings
+    """
+    backend = vector_db.get_backend()
+    batch_size = batch_size or embeddings.EMBEDDING_BATCH_SIZE
+    model = embeddings.model_metadata()
+    counts = {"scanned": 0, "current": 0, "reembedded": 0, "failed": 0}
+    started = time.monotonic()
+
+    print(f"Re-embedding namespace {namespace} with "
+          f"{model[embeddings.MODEL_KEY]} (version {model[embeddings.VERSION_KEY]})"
+          f"{' [dry run]' if dry_run else ''}")
+
+    try:
+        for page, ids in enumerate(backend.list_ids(namespace, page_size=page_size), start=1):
+            records = backend.fetch(ids, namespace)
+            counts["scanned"] += len(records)
+
+            stale = [
+                record for record in records.values()
+                if force or not embeddings.is_current(record["metadata"])
+            ]
+            counts["current"] += len(records) - len(stale)
+
+            if dry_run:
+                counts["reembedded"] += len(stale)
+                continue
+
+            for start in range(0, len(stale), batch_size):
+                batch = stale[start:start + batch_size]
+                texts = []
+                for record in batch:
+                    metadata = record["metadata"]
+                    texts.append(embeddings.meeting_text(
+                        vector_db.get_meeting_body(metadata, "transcript"),
+                        vector_db.get_meeting_body(metadata, "summary")
+                    ))
+
+                finished = 0
+                try:
+                    vectors = embeddings.embed_many(texts)
+                    for record, vector in zip(batch, vectors):
+                        # Patch only the vector and model fields, so metadata
+                        # changed since the fetch is kept; meetings deleted
+                        # since the fetch are not recreated
+                        if backend.update(record["id"], namespace, values=vector.tolist(), set_metadata=model):
+                            counts["reembedded"] += 1
+                        finished += 1
+                except Exception as e:
+                    print(f"Error re-embedding {len(batch) - finished} meetings: {e}")
+                    counts["failed"] += len(batch) - finished
+
+            elapsed = time.monotonic() - started
+            throughput = counts["reembedded"] / elapsed if elapsed > 0 else 0.0
+            print(f"Page {page}: {counts['scanned']} scanned, {counts['reembedded']} re-embedded, "
+                  f"{counts['failed']} failed | {throughput:.1f} vectors/s")
+    except Exception as e:
+        print(f"Error re-embedding namespace {namespace}: {e}")
+        return {
+            "status": "error",
+            "message": str(e),
+            **counts
+        }
+    finally:
+        # Cached search results were ranked with the old vectors; the catalog
+        # write invalidates them in the API processes too
+        if counts["reembedded"] and not dry_run:
+            search_cache.bump(namespace)
+            meeting_catalog.touch(namespace)
+
+    elapsed = time.monotonic() - started
+    throughput = counts["reembedded"] / elapsed if elapsed > 0 else 0.0
+    print(f"Done in {elapsed:.1f}s: {counts['scanned']} scanned, {counts['current']} already current, "
+          f"{counts['reembedded']} {'to re-embed' if dry_run else 're-embedded'}, {counts['failed']} failed"
+          f"{'' if dry_run else f' | {throughput:.1f} vectors/s'}")
+    return {
+        "status": "success" if not counts["failed"] else "error",
+        "elapsed_seconds": round(elapsed, 1),
+        **counts
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-embed stored meetings with the current embedding model')
+    parser.add_argument('--namespace', type=str, default=vector_db.DEFAULT_NAMESPACE, help='Namespace to migrate')
+    parser.add_argument('--page-size', type=int, default=100, help='Records fetched per page')
+    parser.add_argument('--batch-size', type=int, default=embeddings.EMBEDDING_BATCH_SIZE,
+                        help='Texts embedded per batch')
+    parser.add_argument('--force', action='store_true', help='Re-embed meetings already on the current model')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the meetings to re-embed')
+    args = parser.parse_args()
+
+    if not vector_db.initialize_vector_db():
+        print("Failed to initialize vector database")
+        return
+    try:
+        reembed_namespace(args.namespace, args.page_size, args.batch_size, args.force, args.dry_run)
+    finally:
+        vector_db.shutdown_vector_db()
+
+if __name__ == "__main__":
+    main()
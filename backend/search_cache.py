@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import threading
+from collections import OrderedDict, defaultdict
+import meeting_catalog
+
+# Search results kept in memory, least recently used evicted first
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '1024'))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_generations = defaultdict(int)
+_counters = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+def normalize_query(query):
+    """Lowercase a query and collapse its whitespace, so trivially different queries share an entry"""
+    return " ".join(query.lower().split())
+
+def make_key(namespace, query, top_k, mode, filters=None, filter_query=None):
+    """Build the cache key of a search; query should already be normalized"""
+    return (
+        namespace,
+        query,
+        top_k,
+        mode,
+        json.dumps(filters, sort_keys=True) if filters else None,
+        json.dumps(filter_query, sort_keys=True) if filter_query else None
+    )
+
+def generation(namespace):
+    """
+    Return the namespace's current write generation.
+
+    It changes on every write through vector_db (see bump) and whenever
+    another process commits to the meeting catalog.
+    """
+    with _lock:
+        local = _generations[namespace]
+    return (local, meeting_catalog.data_version())
+
+def bump(namespace):
+    """Record a write to a namespace, invalidating its cached results"""
+    with _lock:
+        _generations[namespace] += 1
+
+def get(key, current_generation):
+    """
+    Look up cached search results.
+
+    Args:
+        key (tuple): Key from make_key
+        current_generation (tuple): The namespace's generation, from generation()
+
+    Returns:
+        dict: The cached result, or None on a miss. Callers must not modify it.
+    """
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] != current_generation:
+            # Computed before a write to the namespace
+            del _entries[key]
+            _counters["invalidations"] += 1
+            entry = None
+        if entry is None:
+            _counters["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _counters["hits"] += 1
+        return entry[1]
+
+def put(key, computed_generation, result):
+    """
+    Cache search results.
+
+    Args:
+        key (tuple): Key from make_key
+        computed_generation (tuple): The generation read before the search ran, so
+            results racing a write are stored as already stale
+        result (dict): The search result
+    """
+    with _lock:
+        _entries[key] = (computed_generation, result)
+        _entries.move_to_end(key)
+        while len(_entries) > SEARCH_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _counters["evictions"] += 1
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+def stats():
+    """Return cache hit/miss counters and size"""
+    with _lock:
+        lookups = _counters["hits"] + _counters["misses"]
+        return {
+            "entries": len(_entries),
+            "max_entries": SEARCH_CACHE_MAX_ENTRIES,
+            **_counters,
+            "hit_ratio": _counters["hits"] / lookups if lookups else 0.0
+        }
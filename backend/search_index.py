@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+import os
+import math
+import heapq
+import threading
+from collections import Counter, defaultdict
+import meeting_catalog
+from chat_index import tokenize, K1, B
+
+# Fields indexed for keyword search and the weight of a term occurrence in each;
+# a term in the meeting name counts as much as three in the transcript
+FIELD_WEIGHTS = {
+    "meeting_name": 3,
+    "summary": 2,
+    "transcript": 1
+}
+
+# Reciprocal rank fusion constant and the number of candidates each ranking
+# contributes to a hybrid search
+RRF_K = int(os.getenv('SEARCH_RRF_K', '60'))
+SEARCH_CANDIDATES = int(os.getenv('SEARCH_CANDIDATES', '50'))
+
+class KeywordIndex:
+    """
+    In-memory inverted index of one namespace's meetings, scored with BM25.
+
+    Postings map each term to the field-weighted term frequency per meeting.
+    Meetings are added and removed one at a time, so the index follows writes
+    without being rebuilt.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.terms = {}  # meeting_id -> indexed terms, to remove its postings
+        self.lengths = {}
+        self.total_length = 0
+        self.catalog_version = 0
+        self.lock = threading.RLock()
+
+    def add(self, meeting_id, fields):
+        """Index (or re-index) a meeting from its text fields"""
+        counts = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field) or ""):
+                counts[term] += weight
+        with self.lock:
+            self.remove(meeting_id)
+            for term, frequency in counts.items():
+                self.postings[term][meeting_id] = frequency
+            self.terms[meeting_id] = tuple(counts)
+            self.lengths[meeting_id] = sum(counts.values())
+            self.total_length += self.lengths[meeting_id]
+
+    def remove(self, meeting_id):
+        """Drop a meeting from the index; unknown IDs are ignored"""
+        with self.lock:
+            for term in self.terms.pop(meeting_id, ()):
+                postings = self.postings[term]
+                postings.pop(meeting_id, None)
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= self.lengths.pop(meeting_id, 0)
+
+    def search(self, query, limit, candidates=None):
+        """
+        Rank meetings against a query with BM25.
+
+        Args:
+            query (str): Search query
+            limit (int): Maximum number of meetings to return
+            candidates (set, optional): Only score these meeting IDs
+
+        Returns:
+            list: Up to limit (meeting_id, score) pairs with a positive score, best first
+        """
+        with self.lock:
+            count = len(self.lengths)
+            if not count:
+                return []
+            average_length = (self.total_length / count) or 1.0
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                if candidates is not None and len(candidates) < len(postings):
+                    # Walk the smaller side
+                    postings = {
+                        meeting_id: postings[meeting_id] for meeting_id in candidates if meeting_id in postings
+                    }
+                for meeting_id, frequency in postings.items():
+                    if candidates is not None and meeting_id not in candidates:
+                        continue
+                    length = self.lengths[meeting_id]
+                    scores[meeting_id] += idf * frequency * (K1 + 1) / (
+                        frequency + K1 * (1 - B + B * length / average_length)
+                    )
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+    def stats(self):
+        with self.lock:
+            return {"meetings": len(self.lengths), "terms": len(self.postings)}
+
+_lock = threading.Lock()
+_indexes = {}
+
+def get_index(namespace, load):
+    """
+    Return the keyword index of a namespace, building it on first use.
+
+    Writes made by other processes (e.g. a bulk loader) did not go through
+    update() here, so the meetings the catalog records as changed since the
+    index was last brought up to date are re-indexed, and deleted ones
+    removed, before it is returned.
+
+    Args:
+        namespace (str): Namespace of the index
+        load: Callable taking the namespace and optionally a list of meeting
+            IDs, and yielding (meeting_id, fields) for every meeting (or for
+            those of the IDs that still exist)
+
+    Returns:
+        KeywordIndex: The index
+    """
+    with _lock:
+        index = _indexes.get(namespace)
+        if index is None:
+            # Register the new index before filling it, so writes made during
+            # the build wait for it and are applied on top
+            index = KeywordIndex()
+            index.catalog_version = meeting_catalog.namespace_version(namespace)
+            index.lock.acquire()
+            _indexes[namespace] = index
+            building = True
+        else:
+            building = False
+    if building:
+        try:
+            for meeting_id, fields in load(namespace):
+                index.add(meeting_id, fields)
+            print(f"Built keyword index for namespace {namespace}: {len(index.lengths)} meetings")
+        except Exception:
+            with _lock:
+                if _indexes.get(namespace) is index:
+                    del _indexes[namespace]
+            raise
+        finally:
+            index.lock.release()
+        return index
+
+    if meeting_catalog.namespace_version(namespace) != index.catalog_version:
+        with index.lock:
+            version, changed = meeting_catalog.changed_since(namespace, index.catalog_version)
+            if changed:
+                found = set()
+                for meeting_id, fields in load(namespace, changed):
+                    index.add(meeting_id, fields)
+                    found.add(meeting_id)
+                for meeting_id in changed:
+                    if meeting_id not in found:
+                        index.remove(meeting_id)
+            index.catalog_version = max(version, index.catalog_version)
+    return index
+
+def warm(namespace, load):
+    """Build the keyword index of a namespace in a background thread"""
+    def build():
+        try:
+            get_index(namespace, load)
+        except Exception as e:
+            print(f"Error building keyword index for namespace {namespace}: {e}")
+    threading.Thread(target=build, daemon=True).start()
+
+def update(namespace, meeting_id, fields):
+    """Re-index one meeting, if the namespace's index has been built"""
+    index = _indexes.get(namespace)
+    if index is not None:
+        index.add(meeting_id, fields)
+
+def remove(namespace, meeting_id):
+    """Remove one meeting from the namespace's index, if it has been built"""
+    index = _indexes.get(namespace)
+    if index is not None:
+        index.remove(meeting_id)
+
+def reset(namespace):
+    """Drop a namespace's index so the next search rebuilds it"""
+    with _lock:
+        _indexes.pop(namespace, None)
+
+def fuse(rankings, limit, k=None):
+    """
+    Combine rankings with reciprocal rank fusion.
+
+    Each ranking is a list of meeting IDs, best first; a meeting scores
+    1 / (k + rank) in every ranking it appears in.
+
+    Returns:
+        list: Up to limit (meeting_id, fused score) pairs, best first
+    """
+    k = k or RRF_K
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, meeting_id in enumerate(ranking, start=1):
+            scores[meeting_id] += 1.0 / (k + rank)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+def stats():
+    """Return the size of each built index"""
+    with _lock:
+        indexes = dict(_indexes)
+    return {namespace: index.stats() for namespace, index in indexes.items()}
@@ -5,8 +5,8 @@ import os
 import argparse
 from pinecone import Pinecone
 from dotenv import load_dotenv
-import hashlib
-import numpy as np
+from blob_store import get_blob
+import embeddings
 
 # Load environment variables
 load_dotenv()
@@ -35,7 +35,8 @@ def setup_pinecone():
 
 def get_mock_embedding(text):
     """
-    Generate a mock embedding for text (same as in load_json_to_pinecone.py).
+    Generate the embedding of a query with the shared embedding provider,
+    the same one the API and loaders store vectors with.
     
     Args:
         text (str): The text to generate embedding for
@@ -43,25 +44,7 @@ def get_mock_embedding(text):
     Returns:
         list: The embedding vector
     """
-    # Create a hash of the text
-    hash_obj = hashlib.sha256(text.encode())
-    hash_bytes = hash_obj.digest()
-    
-    # Convert hash bytes to a vector of floats with the required dimension
-    vector = []
-    for i in range(DIMENSION):
-        # Use modulo to cycle through the hash bytes
-        byte_index = i % len(hash_bytes)
-        # Convert byte to float between -1 and 1
-        vector.append((hash_bytes[byte_index] / 128.0) - 1.0)
-    
-    # Normalize the vector to unit length
-    vector = np.array(vector)
-    norm = np.linalg.norm(vector)
-    if norm > 0:
-        vector = vector / norm
-    
-    return vector.tolist()
+    return embeddings.embed(text).tolist()
 
 def search_meetings(query_text, top_k=3, namespace=NAMESPACE):
     """
@@ -121,8 +104,10 @@ def display_meeting_results(results):
                 else:
                     print(f"  Attendees: {attendees}")
             
-            if 'summary' in match.metadata:
-                summary = match.metadata['summary']
+            summary = match.metadata.get('summary')
+            if summary is None and match.metadata.get('summary_hash'):
+                summary = get_blob(match.metadata['summary_hash'])
+            if summary:
                 print(f"  Summary Preview: {summary[:200]}..." if len(summary) > 200 else f"  Summary: {summary}")
         
         print()
@@ -136,7 +121,7 @@ def main():
     args = parser.parse_args()
     
     print(f"Searching for meetings related to: '{args.query}'")
-    print(f"Using mock embeddings for demonstration purposes")
+    print(f"Using {embeddings.EMBEDDING_PROVIDER} embeddings")
     
     # Search for meetings
     results = search_meetings(args.query, args.top_k, args.namespace)
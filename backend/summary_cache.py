@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+import async_io
+
+# Persistent cache of model responses, shared by the API and the batch scripts
+SUMMARY_CACHE_DB = os.getenv(
+    'SUMMARY_CACHE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'summary_cache.db')
+)
+
+# Least recently used entries are evicted once the cache grows past this size
+SUMMARY_CACHE_MAX_BYTES = int(os.getenv('SUMMARY_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+_lock = threading.Lock()
+_conn = None
+_counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+def _connection():
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(SUMMARY_CACHE_DB, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS summary_cache (
+                content_hash TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (content_hash, prompt_version, model_name)
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_summary_cache_last_access ON summary_cache (last_access)"
+        )
+        conn.commit()
+        _conn = conn
+    return _conn
+
+def normalize_transcript(text):
+    """
+    Normalize a transcript so trivially different uploads share a cache entry:
+    Unicode NFC, LF line endings, no trailing whitespace and no surrounding blank lines.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+def transcript_hash(text):
+    """Return the sha256 of the normalized transcript"""
+    return hashlib.sha256(normalize_transcript(text).encode("utf-8")).hexdigest()
+
+def get(text, prompt_version, model_name):
+    """
+    Look up a cached response.
+
+    Args:
+        text (str): The transcript (or other varying prompt input)
+        prompt_version (str): Version of the prompt template
+        model_name (str): Model that produced the response
+
+    Returns:
+        str: The cached response, or None on a miss
+    """
+    key = (transcript_hash(text), prompt_version, model_name)
+    with _lock:
+        conn = _connection()
+        row = conn.execute(
+            "SELECT response FROM summary_cache "
+            "WHERE content_hash = ? AND prompt_version = ? AND model_name = ?",
+            key
+        ).fetchone()
+        if row is None:
+            _counters["misses"] += 1
+            return None
+        conn.execute(
+            "UPDATE summary_cache SET last_access = ?, hit_count = hit_count + 1 "
+            "WHERE content_hash = ? AND prompt_version = ? AND model_name = ?",
+            (time.time(), *key)
+        )
+        conn.commit()
+        _counters["hits"] += 1
+        return row[0]
+
+def put(text, prompt_version, model_name, response):
+    """
+    Cache a successful response and evict least recently used entries
+    if the cache is over its size limit.
+    """
+    key = (transcript_hash(text), prompt_version, model_name)
+    size = len(response.encode("utf-8"))
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            """INSERT OR REPLACE INTO summary_cache (
+                content_hash, prompt_version, model_name, response, size, created_at, last_access
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (*key, response, size, now, now)
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM summary_cache").fetchone()[0]
+        if total > SUMMARY_CACHE_MAX_BYTES:
+            evicted = 0
+            for content_hash, version, model, entry_size in conn.execute(
+                "SELECT content_hash, prompt_version, model_name, size FROM summary_cache "
+                "ORDER BY last_access"
+            ).fetchall():
+                if total <= SUMMARY_CACHE_MAX_BYTES:
+                    break
+                conn.execute(
+                    "DELETE FROM summary_cache "
+                    "WHERE content_hash = ? AND prompt_version = ? AND model_name = ?",
+                    (content_hash, version, model)
+                )
+                total -= entry_size
+                evicted += 1
+            _counters["evictions"] += evicted
+        conn.commit()
+
+def get_or_generate(text, prompt_version, model_name, generate):
+    """
+    Return the cached response, or call generate() and cache its result.
+
+    generate() should raise on failure so that errors are never cached.
+    """
+    cached = get(text, prompt_version, model_name)
+    if cached is not None:
+        return cached
+    response = generate()
+    put(text, prompt_version, model_name, response)
+    return response
+
+async def get_or_generate_async(text, prompt_version, model_name, generate):
+    """
+    Async variant of get_or_generate; generate is an async callable.
+
+    The SQLite reads and writes run on their own async_io pool, so a batch
+    thread holding the cache lock stalls neither the event loop nor searches.
+    """
+    cached = await async_io.run_cache(get, text, prompt_version, model_name)
+    if cached is not None:
+        return cached
+    response = await generate()
+    await async_io.run_cache(put, text, prompt_version, model_name, response)
+    return response
+
+def stats():
+    """
+    Return hit/miss counters for this process plus the cache's size.
+
+    lifetime_hits sums the hits recorded on entries still in the cache across
+    every process sharing the file, i.e. model calls saved by those entries.
+    """
+    with _lock:
+        entries, total_bytes, lifetime_hits = _connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hit_count), 0) FROM summary_cache"
+        ).fetchone()
+        lookups = _counters["hits"] + _counters["misses"]
+        return {
+            "hits": _counters["hits"],
+            "misses": _counters["misses"],
+            "hit_ratio": _counters["hits"] / lookups if lookups else 0.0,
+            "evictions": _counters["evictions"],
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": SUMMARY_CACHE_MAX_BYTES,
+            "lifetime_hits": lifetime_hits
+        }
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+import re
+import codecs
+from array import array
+from datetime import datetime
+
+# Speaker turns start with a "HH:MM:SS Name:" line
+SPEAKER_TURN_PATTERN = re.compile(r'[ \t]*(\d{1,2}):(\d{2})(?::(\d{2}))?[ \t]+([^:\n]{1,100}):')
+
+# Header lines ("Meeting Topic: ...") before the first speaker turn
+HEADER_PATTERN = re.compile(r'[ \t]*([A-Za-z][A-Za-z ]{0,40}):[ \t]*(.*)')
+MAX_HEADER_LINES = 50
+
+# Only the start of each line is kept while parsing, so memory stays bounded
+# however long a line is
+LINE_HEAD_CHARS = 4096
+
+READ_CHUNK_SIZE = 64 * 1024
+
+class ParsedTranscript:
+    """
+    Compact structure of a transcript: its header fields plus one column per
+    turn attribute (start time in seconds, speaker id and character offset).
+
+    Turn i spans transcript[offsets[i]:offsets[i + 1]], the last turn ending
+    at length. The text itself is not kept.
+    """
+
+    def __init__(self, header, speakers, timestamps, speaker_ids, offsets, length):
+        self.header = header
+        self.speakers = speakers
+        self.timestamps = timestamps
+        self.speaker_ids = speaker_ids
+        self.offsets = offsets
+        self.length = length
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def header_end(self):
+        """Offset of the first turn, or 0 if there are no turns"""
+        return self.offsets[0] if self.offsets else 0
+
+    def turn_bounds(self):
+        """Return (start, end) character offsets of every turn"""
+        ends = list(self.offsets[1:]) + [self.length]
+        return list(zip(self.offsets, ends))
+
+    @property
+    def meeting_name(self):
+        return self.header.get("Meeting Topic", "")
+
+    @property
+    def meeting_date(self):
+        return self.header.get("Meeting Date", "")
+
+    @property
+    def participants(self):
+        """Participant names without their roles"""
+        value = self.header.get("Participants", "")
+        names = [re.sub(r'\s*\(.*?\)', '', name).strip() for name in re.split(r',(?![^()]*\))', value)]
+        return [name for name in names if name]
+
+    def stats(self):
+        """
+        Return turn and speaking-time statistics.
+
+        Returns:
+            dict: turns, speakers, duration_seconds (first to last turn),
+                characters and per-speaker turn and character counts
+        """
+        turns_per_speaker = {speaker: 0 for speaker in self.speakers}
+        characters_per_speaker = {speaker: 0 for speaker in self.speakers}
+        for (start, end), speaker_id in zip(self.turn_bounds(), self.speaker_ids):
+            speaker = self.speakers[speaker_id]
+            turns_per_speaker[speaker] += 1
+            characters_per_speaker[speaker] += end - start
+        return {
+            "turns": len(self),
+            "speakers": len(self.speakers),
+            "duration_seconds": self.timestamps[-1] - self.timestamps[0] if len(self) > 1 else 0,
+            "characters": self.length,
+            "turns_per_speaker": turns_per_speaker,
+            "characters_per_speaker": characters_per_speaker
+        }
+
+class TranscriptParser:
+    """
+    Incremental transcript parser.
+
+    Feed it bytes or text in pieces of any size as they arrive, then call
+    close() for the ParsedTranscript. feed() returns the decoded text so a
+    caller that needs the transcript can collect it in the same pass.
+    """
+
+    def __init__(self, encoding='utf-8'):
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._offset = 0
+        self._line_start = 0
+        self._head = ""
+        self._header = {}
+        self._header_lines = 0
+        self._speaker_ids = {}
+        self._speakers = []
+        self._timestamps = array('I')
+        self._turn_speakers = array('H')
+        self._offsets = array('Q')
+
+    def feed(self, data):
+        """
+        Parse the next piece of the transcript.
+
+        Args:
+            data (bytes or str): The next piece
+
+        Returns:
+            str: The decoded text of this piece
+
+        Raises:
+            UnicodeDecodeError: If bytes are not valid in the parser's encoding
+        """
+        text = self._decoder.decode(data) if isinstance(data, (bytes, bytearray)) else data
+        self._consume(text)
+        return text
+
+    def close(self):
+        """
+        Finish parsing.
+
+        Returns:
+            ParsedTranscript: The parsed structure
+
+        Raises:
+            UnicodeDecodeError: If the input ended inside a multi-byte character
+        """
+        self._consume(self._decoder.decode(b'', final=True))
+        if self._offset > self._line_start:
+            self._end_line()
+        return ParsedTranscript(
+            self._header, self._speakers, self._timestamps,
+            self._turn_speakers, self._offsets, self._offset
+        )
+
+    def _consume(self, text):
+        base = self._offset
+        index = 0
+        while True:
+            newline = text.find("\n", index)
+            end = len(text) if newline == -1 else newline
+            room = LINE_HEAD_CHARS - len(self._head)
+            if room > 0:
+                self._head += text[index:min(end, index + room)]
+            if newline == -1:
+                break
+            self._end_line()
+            index = newline + 1
+            self._line_start = base + index
+        self._offset = base + len(text)
+
+    def _end_line(self):
+        line = self._head.rstrip("\r")
+        self._head = ""
+
+        match = SPEAKER_TURN_PATTERN.match(line)
+        if match:
+            first, second, third, speaker = match.groups()
+            if third is None:
+                seconds = int(first) * 60 + int(second)
+            else:
+                seconds = int(first) * 3600 + int(second) * 60 + int(third)
+            speaker = speaker.strip()
+            speaker_id = self._speaker_ids.get(speaker)
+            if speaker_id is None:
+                speaker_id = self._speaker_ids[speaker] = len(self._speakers)
+                self._speakers.append(speaker)
+            self._timestamps.append(seconds)
+            self._turn_speakers.append(speaker_id)
+            self._offsets.append(self._line_start)
+            return
+
+        # Header fields only appear before the first turn
+        if not self._offsets and self._header_lines < MAX_HEADER_LINES and line.strip():
+            self._header_lines += 1
+            header = HEADER_PATTERN.match(line)
+            if header:
+                self._header.setdefault(header.group(1).strip(), header.group(2).strip())
+
+def parse_text(text):
+    """Parse a transcript that is already in memory"""
+    parser = TranscriptParser()
+    parser.feed(text)
+    return parser.close()
+
+def parse_file(path, keep_text=True):
+    """
+    Parse a transcript file in fixed-size reads.
+
+    Args:
+        path (str): Path to the transcript
+        keep_text (bool, optional): Also return the transcript text; without it
+            memory use does not grow with the file's size beyond the turn columns
+
+    Returns:
+        tuple: (transcript text or None, ParsedTranscript)
+    """
+    parser = TranscriptParser()
+    parts = [] if keep_text else None
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b''):
+            text = parser.feed(chunk)
+            if keep_text:
+                parts.append(text)
+    parsed = parser.close()
+    return ("".join(parts) if keep_text else None), parsed
+
+def meeting_info(parsed, default_name="Unknown Meeting"):
+    """
+    Return meeting_name, meeting_date and attendees for a parsed transcript.
+
+    Dates like "May 24, 2025" are converted to ISO format. Transcripts only
+    name their participants, so attendees get first.last@example.com addresses.
+    """
+    meeting_date = parsed.meeting_date
+    if meeting_date:
+        try:
+            meeting_date = datetime.strptime(meeting_date, "%B %d, %Y").isoformat()
+        except ValueError:
+            pass
+    return {
+        "meeting_name": parsed.meeting_name or default_name,
+        "meeting_date": meeting_date or datetime.now().isoformat(),
+        "attendees": [
+            re.sub(r'\W+', '.', name.lower()).strip('.') + '@example.com' for name in parsed.participants
+        ]
+    }
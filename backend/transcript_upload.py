@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+import os
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+import transcript_parser
+from blob_store import BlobWriter
+
+# Largest transcript accepted by the upload endpoints, in bytes
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+
+# Largest plain form field (emails, meeting name), in bytes
+MAX_FIELD_BYTES = 64 * 1024
+
+class UploadError(Exception):
+    """An upload was rejected; status_code is the HTTP status to answer with"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class TranscriptUpload:
+    """
+    A received transcript upload and the form fields sent with it.
+
+    The transcript itself is not held: it is in the blob store under
+    transcript_hash, to be read back with get_blob when it is needed.
+    """
+
+    def __init__(self, filename, fields, parsed, transcript_hash, size):
+        self.filename = filename
+        self.fields = fields
+        self.parsed = parsed
+        self.transcript_hash = transcript_hash
+        self.size = size
+
+class _Receiver:
+    """multipart callbacks routing the file part to the parser, hash and blob store"""
+
+    def __init__(self, file_field, suffix, max_bytes):
+        self.file_field = file_field
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.fields = {}
+        self.filename = None
+        self.parser = None
+        self.writer = None
+        self.pending = []
+        self.file_size = 0
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._name = None
+        self._is_file = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._name = None
+        self._is_file = False
+
+    def on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            self.fields[self._name] = b""
+            return
+
+        if self._name != self.file_field or self.writer is not None:
+            raise UploadError(400, f"Unexpected file field: {self._name}")
+        self.filename = options[b"filename"].decode("utf-8", "replace")
+        # Reject before reading the file when the type is wrong
+        if not self.filename.endswith(self.suffix):
+            raise UploadError(400, f"Only {self.suffix} files are supported")
+        self._is_file = True
+        self.parser = transcript_parser.TranscriptParser()
+        self.writer = BlobWriter()
+
+    def on_part_data(self, data, start, end):
+        if not self._is_file:
+            value = self.fields[self._name] + data[start:end]
+            if len(value) > MAX_FIELD_BYTES:
+                raise UploadError(413, f"Form field {self._name} is too large")
+            self.fields[self._name] = value
+            return
+
+        self.file_size += end - start
+        if self.file_size > self.max_bytes:
+            raise UploadError(413, f"Transcript is larger than the {self.max_bytes} byte limit")
+        self.pending.append(data[start:end])
+
+    def process_pending(self):
+        """Decode, parse, hash and store the file data received so far"""
+        data = b"".join(self.pending)
+        self.pending = []
+        if not data:
+            return
+        try:
+            # Only the parse is kept; the decoded text is dropped
+            self.parser.feed(data)
+        except UnicodeDecodeError:
+            raise UploadError(400, "Transcript must be UTF-8 text")
+        self.writer.write(data)
+
+    def finish(self):
+        """Commit the stored transcript and return the upload"""
+        if self.writer is None:
+            raise UploadError(400, f"Missing file field: {self.file_field}")
+        self.process_pending()
+        try:
+            parsed = self.parser.close()
+        except UnicodeDecodeError:
+            raise UploadError(400, "Transcript must be UTF-8 text")
+        transcript_hash = self.writer.commit()
+        fields = {name: value.decode("utf-8", "replace") for name, value in self.fields.items()}
+        return TranscriptUpload(
+            self.filename, fields, parsed, transcript_hash, self.file_size
+        )
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.abort()
+
+async def receive_transcript(request, file_field="file", suffix=".txt", max_bytes=None):
+    """
+    Receive a multipart transcript upload while it is still arriving.
+
+    Each piece of the file is parsed, hashed and compressed into the blob
+    store as soon as it is received. Only the parse (turn columns and header)
+    stays in memory, however large the transcript. Uploads that declare a
+    Content-Length over the limit are rejected before any of the body is read;
+    others are rejected as soon as the limit is crossed.
+
+    Args:
+        request (Request): The incoming request
+        file_field (str, optional): Form field holding the transcript
+        suffix (str, optional): Required file name suffix
+        max_bytes (int, optional): Size limit (default MAX_UPLOAD_BYTES)
+
+    Returns:
+        TranscriptUpload: The transcript's parse, its blob store hash and the other form fields
+
+    Raises:
+        UploadError: If the upload is malformed, too large or not UTF-8 text
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError(400, "Expected a multipart/form-data upload")
+
+    # Allow for the other form fields and multipart framing on top of the file
+    body_limit = max_bytes + 4 * MAX_FIELD_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > body_limit:
+        raise UploadError(413, f"Transcript is larger than the {max_bytes} byte limit")
+
+    receiver = _Receiver(file_field, suffix, max_bytes)
+    parser = MultipartParser(options[b"boundary"], receiver.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise UploadError(413, f"Transcript is larger than the {max_bytes} byte limit")
+            parser.write(chunk)
+            if receiver.pending:
+                await run_in_threadpool(receiver.process_pending)
+        parser.finalize()
+        return await run_in_threadpool(receiver.finish)
+    except Exception:
+        receiver.abort()
+        raise
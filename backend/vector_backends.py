@@ -0,0 +1,703 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import fcntl
+import sqlite3
+import threading
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+import numpy as np
+from index_session import IndexSession
+
+# Default directory for the local backend's vector files and metadata table
+LOCAL_VECTOR_DIR = os.getenv(
+    'LOCAL_VECTOR_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'local_index')
+)
+
+# Pinecone caps upsert requests at 2 MB and 1000 records
+UPSERT_MAX_BYTES = int(os.getenv('UPSERT_MAX_BYTES', str(2 * 1024 * 1024)))
+UPSERT_MAX_RECORDS = 1000
+
+class VectorBackend(ABC):
+    """
+    Storage interface used by vector_db.
+
+    Records are plain dicts of the form {"id", "values", "metadata"}; query
+    matches are {"id", "score", "metadata"}. Every method is one logical
+    operation against the store. Subclasses must implement the abstract
+    methods; one that does not cannot be instantiated.
+    """
+
+    name = "base"
+
+    # Largest ID set query(ids=...) should be asked to score; None if any size is cheap
+    candidate_limit = 1000
+
+    def initialize(self):
+        """Prepare the store; return True when it is ready to use."""
+        return True
+
+    @abstractmethod
+    def upsert(self, vectors, namespace):
+        """Insert or replace records."""
+
+    @abstractmethod
+    def fetch(self, ids, namespace):
+        """Return a dict mapping each found id to its record."""
+
+    def update(self, vector_id, namespace, values=None, set_metadata=None):
+        """
+        Patch one record in place: replace its values if given and merge
+        set_metadata into its metadata. Returns False if the record does not exist.
+        """
+        record = self.fetch([vector_id], namespace).get(vector_id)
+        if record is None:
+            return False
+        record["metadata"].update(set_metadata or {})
+        if values is not None:
+            record["values"] = values
+        self.upsert([record], namespace)
+        return True
+
+    @abstractmethod
+    def query(self, vector, top_k, namespace, include_metadata=True, filter=None, ids=None):
+        """
+        Return up to top_k matches ordered by descending cosine score.
+
+        With ids, only those records are scored.
+        """
+
+    def _query_fetched(self, vector, ids, top_k, namespace, include_metadata=True, filter=None, batch_size=100):
+        """Score a set of records by fetching them, for stores that cannot restrict a query to IDs"""
+        query_vector = np.asarray(vector, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query_vector))
+        matches = []
+        for i in range(0, len(ids), batch_size):
+            records = [
+                record for record in self.fetch(ids[i:i + batch_size], namespace).values()
+                if not filter or matches_filter(record["metadata"], filter)
+            ]
+            if not records:
+                continue
+            values = np.asarray([record["values"] for record in records], dtype=np.float32)
+            denominator = np.linalg.norm(values, axis=1) * query_norm
+            scores = np.divide(
+                values @ query_vector, denominator, out=np.zeros(len(records), dtype=np.float32), where=denominator > 0
+            )
+            matches.extend(
+                {"id": record["id"], "score": float(score), "metadata": record["metadata"] if include_metadata else {}}
+                for record, score in zip(records, scores)
+            )
+        matches.sort(key=lambda match: -match["score"])
+        return matches[:top_k]
+
+    @abstractmethod
+    def delete(self, ids, namespace):
+        """Delete records by id; unknown ids are ignored."""
+
+    @abstractmethod
+    def list_ids(self, namespace, page_size=100):
+        """Yield the ids stored in a namespace, one page (list) at a time."""
+
+    @abstractmethod
+    def stats(self):
+        """Return {"namespaces": {ns: {"vector_count": n}}, "total_vector_count": n}."""
+
+    def health(self):
+        return {"backend": self.name, "healthy": True}
+
+    def close(self):
+        pass
+
+class PineconeBackend(VectorBackend):
+    """Pinecone serverless index behind a long-lived IndexSession."""
+
+    name = "pinecone"
+
+    # Scoring by fetch pulls every candidate's full vector, so only small
+    # candidate sets are fetched; larger ones are filtered by Pinecone
+    candidate_limit = 100
+
+    def __init__(self, index_name, dimension):
+        from pinecone import Pinecone
+
+        api_key = os.getenv('PINECONE_API_KEY')
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY environment variable is not set")
+
+        # Initialize Pinecone with the v6.0.0 API
+        self.pc = Pinecone(api_key=api_key)
+        self.index_name = index_name
+        self.dimension = dimension
+        self.session = IndexSession(self.pc, index_name)
+
+    @property
+    def index(self):
+        return self.session.index
+
+    def initialize(self):
+        # Check if index exists
+        index_exists = False
+        indexes = self.pc.list_indexes()
+
+        print(f"Available Pinecone indexes: {indexes}")
+
+        for index_info in indexes.get('indexes', []):
+            if index_info.get('name') == self.index_name:
+                index_exists = True
+                break
+
+        # Create index if it doesn't exist
+        if not index_exists:
+            print(f"Creating Pinecone index: {self.index_name}")
+            self.pc.create_index(
+                name=self.index_name,
+                dimension=self.dimension,
+                metric="cosine",
+                spec={
+                    "serverless": {
+                        "cloud": "aws",
+                        "region": "us-west-2"
+                    }
+                }
+            )
+            print(f"Index {self.index_name} created successfully")
+        else:
+            print(f"Index {self.index_name} already exists")
+
+        # Verify the index once and keep its stats fresh in the background
+        self.session.refresh()
+        self.session.start_refresher()
+        return True
+
+    def upsert(self, vectors, namespace):
+        self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def update(self, vector_id, namespace, values=None, set_metadata=None):
+        # One update call; Pinecone merges set_metadata into the stored metadata
+        params = {"id": vector_id, "namespace": namespace}
+        if values is not None:
+            params["values"] = values
+        if set_metadata:
+            params["set_metadata"] = set_metadata
+        self.index.update(**params)
+        return True
+
+    def fetch(self, ids, namespace):
+        response = self.index.fetch(ids=ids, namespace=namespace)
+
+        # FetchResponse object (new API) or dict with a 'vectors' key (old API)
+        if hasattr(response, 'vectors'):
+            found = response.vectors
+        elif isinstance(response, dict) and 'vectors' in response:
+            found = response['vectors']
+        else:
+            raise ValueError(f"Unexpected fetch response type: {type(response)}")
+
+        records = {}
+        for vector_id, vector in found.items():
+            if isinstance(vector, dict):
+                records[vector_id] = {
+                    "id": vector_id,
+                    "values": vector.get('values'),
+                    "metadata": vector.get('metadata') or {}
+                }
+            else:
+                records[vector_id] = {
+                    "id": vector_id,
+                    "values": vector.values,
+                    "metadata": vector.metadata or {}
+                }
+        return records
+
+    def query(self, vector, top_k, namespace, include_metadata=True, filter=None, ids=None):
+        if ids is not None:
+            # Pinecone queries cannot be restricted to IDs
+            return self._query_fetched(vector, ids, top_k, namespace, include_metadata, filter)
+        params = {
+            "vector": vector,
+            "top_k": top_k,
+            "namespace": namespace,
+            "include_metadata": include_metadata
+        }
+        if filter:
+            params["filter"] = filter
+
+        results = self.index.query(**params)
+        return [
+            {
+                "id": match['id'],
+                "score": match['score'],
+                "metadata": match.get('metadata') or {}
+            }
+            for match in results.get('matches', [])
+        ]
+
+    def delete(self, ids, namespace):
+        return self.index.delete(ids=ids, namespace=namespace)
+
+    def list_ids(self, namespace, page_size=100):
+        token = None
+        while True:
+            response = self.index.list_paginated(
+                namespace=namespace,
+                limit=page_size,
+                pagination_token=token
+            )
+            ids = [vector.id for vector in response.vectors]
+            if ids:
+                yield ids
+            token = response.pagination.next if response.pagination else None
+            if not token:
+                break
+
+    def stats(self):
+        return self.session.stats()
+
+    def health(self):
+        health = self.session.health()
+        health["backend"] = self.name
+        return health
+
+    def close(self):
+        self.session.stop_refresher()
+
+class LocalVectorBackend(VectorBackend):
+    """
+    In-process exact-search store for single-node deployments and benchmarks.
+
+    Each namespace keeps its vectors in one contiguous float32 matrix backed by
+    a memory-mapped file; ids, norms and metadata live in a SQLite table that
+    maps each id to its row. Queries score every live row with a single matmul.
+
+    Several processes may open the same directory (the API workers, a loader,
+    reembed.py): writes hold an exclusive lock on the directory's lock file and
+    reads a shared one, and a process reloads its row map whenever another
+    one has committed since it last looked.
+    """
+
+    name = "local"
+
+    # Restricting a query to IDs only masks rows of the matrix
+    candidate_limit = None
+
+    def __init__(self, directory=LOCAL_VECTOR_DIR, dimension=768, initial_capacity=1024):
+        self.directory = directory
+        self.dimension = dimension
+        self.initial_capacity = initial_capacity
+        self._lock = threading.RLock()
+        self._namespaces = {}
+        self._data_version = None
+
+        os.makedirs(directory, exist_ok=True)
+        # Cross-process lock: shared for reads, exclusive for writes
+        self._lock_file = open(os.path.join(directory, '.lock'), 'a+')
+        self._db = sqlite3.connect(
+            os.path.join(directory, 'metadata.db'),
+            check_same_thread=False
+        )
+        with self._locked(exclusive=True):
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS vectors (
+                    namespace TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    row INTEGER NOT NULL,
+                    metadata TEXT NOT NULL,
+                    PRIMARY KEY (namespace, id)
+                )"""
+            )
+            # Norms are stored so a reload does not rescan the matrix; rows
+            # written before the column existed get theirs on first load
+            columns = [column[1] for column in self._db.execute("PRAGMA table_info(vectors)")]
+            if "norm" not in columns:
+                self._db.execute("ALTER TABLE vectors ADD COLUMN norm REAL")
+            self._db.commit()
+
+    @contextmanager
+    def _locked(self, exclusive=False):
+        """
+        Hold the thread lock and the directory's file lock, dropping cached
+        namespace state first if another process has committed since.
+        """
+        with self._lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+                if data_version != self._data_version:
+                    for state in self._namespaces.values():
+                        state["matrix"].flush()
+                    self._namespaces.clear()
+                    self._data_version = data_version
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _matrix_path(self, namespace):
+        return os.path.join(self.directory, f"{namespace}.f32")
+
+    def _open_matrix(self, namespace, capacity):
+        path = self._matrix_path(namespace)
+        size = capacity * self.dimension * 4
+        with open(path, 'ab') as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=np.float32, mode='r+', shape=(capacity, self.dimension))
+
+    def _namespace(self, namespace, create=False):
+        """Load (or create) the in-memory row map for a namespace."""
+        state = self._namespaces.get(namespace)
+        if state is not None:
+            return state
+
+        rows = self._db.execute(
+            "SELECT id, row, norm FROM vectors WHERE namespace = ?", (namespace,)
+        ).fetchall()
+        path = self._matrix_path(namespace)
+        if not rows and not os.path.exists(path) and not create:
+            return None
+
+        capacity = self.initial_capacity
+        if os.path.exists(path):
+            capacity = max(capacity, os.path.getsize(path) // (self.dimension * 4))
+        high_water = max((row for _, row, _ in rows), default=-1) + 1
+        while capacity < high_water:
+            capacity *= 2
+
+        matrix = self._open_matrix(namespace, capacity)
+        ids = [None] * capacity
+        live = np.zeros(capacity, dtype=bool)
+        norms = np.zeros(capacity, dtype=np.float32)
+        missing = []
+        for vector_id, row, norm in rows:
+            ids[row] = vector_id
+            live[row] = True
+            if norm is None:
+                missing.append((vector_id, row))
+            else:
+                norms[row] = norm
+        if missing:
+            missing_rows = [row for _, row in missing]
+            norms[missing_rows] = np.linalg.norm(matrix[missing_rows], axis=1)
+            self._db.executemany(
+                "UPDATE vectors SET norm = ? WHERE namespace = ? AND id = ?",
+                [(float(norms[row]), namespace, vector_id) for vector_id, row in missing]
+            )
+            self._db.commit()
+
+        state = {
+            "matrix": matrix,
+            "ids": ids,
+            "rows": {vector_id: row for vector_id, row, _ in rows},
+            "live": live,
+            "norms": norms,
+            "high_water": high_water,
+            "free": [row for row in range(high_water) if not live[row]]
+        }
+        self._namespaces[namespace] = state
+        return state
+
+    def _grow(self, namespace, state, needed):
+        capacity = state["matrix"].shape[0]
+        new_capacity = capacity
+        while new_capacity < needed:
+            new_capacity *= 2
+        state["matrix"].flush()
+        state["matrix"] = self._open_matrix(namespace, new_capacity)
+        state["ids"].extend([None] * (new_capacity - capacity))
+        state["live"] = np.concatenate([state["live"], np.zeros(new_capacity - capacity, dtype=bool)])
+        state["norms"] = np.concatenate([state["norms"], np.zeros(new_capacity - capacity, dtype=np.float32)])
+
+    def upsert(self, vectors, namespace):
+        if not vectors:
+            return
+        with self._locked(exclusive=True):
+            state = self._namespace(namespace, create=True)
+
+            rows = []
+            for vector in vectors:
+                row = state["rows"].get(vector["id"])
+                if row is None:
+                    if state["free"]:
+                        row = state["free"].pop()
+                    else:
+                        row = state["high_water"]
+                        state["high_water"] += 1
+                rows.append(row)
+                state["rows"][vector["id"]] = row
+
+            if state["high_water"] > state["matrix"].shape[0]:
+                self._grow(namespace, state, state["high_water"])
+
+            values = np.asarray([vector["values"] for vector in vectors], dtype=np.float32)
+            state["matrix"][rows] = values
+            state["matrix"].flush()
+            state["norms"][rows] = np.linalg.norm(values, axis=1)
+            state["live"][rows] = True
+            for vector, row in zip(vectors, rows):
+                state["ids"][row] = vector["id"]
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (namespace, id, row, metadata, norm) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (namespace, vector["id"], row, json.dumps(vector.get("metadata") or {}), float(state["norms"][row]))
+                    for vector, row in zip(vectors, rows)
+                ]
+            )
+            self._db.commit()
+
+    def update(self, vector_id, namespace, values=None, set_metadata=None):
+        with self._locked(exclusive=True):
+            state = self._namespace(namespace)
+            if state is None or vector_id not in state["rows"]:
+                return False
+            row = state["rows"][vector_id]
+
+            if values is not None:
+                values = np.asarray(values, dtype=np.float32)
+                state["matrix"][row] = values
+                state["matrix"].flush()
+                state["norms"][row] = np.linalg.norm(values)
+                self._db.execute(
+                    "UPDATE vectors SET norm = ? WHERE namespace = ? AND id = ?",
+                    (float(state["norms"][row]), namespace, vector_id)
+                )
+
+            if set_metadata:
+                metadata = self._load_metadata([vector_id], namespace).get(vector_id, {})
+                metadata.update(set_metadata)
+                self._db.execute(
+                    "UPDATE vectors SET metadata = ? WHERE namespace = ? AND id = ?",
+                    (json.dumps(metadata), namespace, vector_id)
+                )
+            self._db.commit()
+            return True
+
+    def _load_metadata(self, ids, namespace):
+        if not ids:
+            return {}
+        metadata = {}
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for vector_id, raw in self._db.execute(
+                f"SELECT id, metadata FROM vectors WHERE namespace = ? AND id IN ({placeholders})",
+                [namespace, *chunk]
+            ):
+                metadata[vector_id] = json.loads(raw)
+        return metadata
+
+    def fetch(self, ids, namespace):
+        with self._locked():
+            state = self._namespace(namespace)
+            if state is None:
+                return {}
+            metadata = self._load_metadata([i for i in ids if i in state["rows"]], namespace)
+            return {
+                vector_id: {
+                    "id": vector_id,
+                    "values": state["matrix"][state["rows"][vector_id]].tolist(),
+                    "metadata": meta
+                }
+                for vector_id, meta in metadata.items()
+            }
+
+    def query(self, vector, top_k, namespace, include_metadata=True, filter=None, ids=None):
+        with self._locked():
+            state = self._namespace(namespace)
+            if state is None or not state["rows"] or top_k <= 0:
+                return []
+
+            n = state["high_water"]
+            if ids is not None:
+                candidates = np.zeros(n, dtype=bool)
+                candidates[[state["rows"][vector_id] for vector_id in ids if vector_id in state["rows"]]] = True
+            else:
+                candidates = state["live"][:n].copy()
+            if filter:
+                all_metadata = self._load_metadata(
+                    list(state["rows"]) if ids is None else [i for i in ids if i in state["rows"]], namespace
+                )
+                for vector_id, meta in all_metadata.items():
+                    if not matches_filter(meta, filter):
+                        candidates[state["rows"][vector_id]] = False
+            if not candidates.any():
+                return []
+
+            query_vector = np.asarray(vector, dtype=np.float32)
+            query_norm = float(np.linalg.norm(query_vector))
+            # Exact cosine in one matmul, over every row or just the requested ones
+            rows = np.arange(n) if ids is None else np.flatnonzero(candidates)
+            matrix = state["matrix"][:n] if ids is None else state["matrix"][rows]
+            scores = matrix @ query_vector
+            denominator = state["norms"][rows] * query_norm
+            scores = np.divide(scores, denominator, out=np.zeros_like(scores), where=denominator > 0)
+            scores[~candidates[rows]] = -np.inf
+
+            k = min(top_k, int(candidates.sum()))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+
+            hits = [(state["ids"][rows[position]], float(scores[position])) for position in top]
+            metadata = self._load_metadata([vector_id for vector_id, _ in hits], namespace) if include_metadata else {}
+            return [
+                {"id": vector_id, "score": score, "metadata": metadata.get(vector_id, {})}
+                for vector_id, score in hits
+            ]
+
+    def delete(self, ids, namespace):
+        with self._locked(exclusive=True):
+            state = self._namespace(namespace)
+            if state is None:
+                return {}
+            rows = [state["rows"].pop(vector_id) for vector_id in ids if vector_id in state["rows"]]
+            if rows:
+                state["matrix"][rows] = 0.0
+                state["matrix"].flush()
+                state["norms"][rows] = 0.0
+                state["live"][rows] = False
+                for row in rows:
+                    state["ids"][row] = None
+                state["free"].extend(rows)
+            self._db.executemany(
+                "DELETE FROM vectors WHERE namespace = ? AND id = ?",
+                [(namespace, vector_id) for vector_id in ids]
+            )
+            self._db.commit()
+            return {}
+
+    def list_ids(self, namespace, page_size=100):
+        with self._locked():
+            ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM vectors WHERE namespace = ? ORDER BY id", (namespace,)
+            )]
+        for i in range(0, len(ids), page_size):
+            yield ids[i:i + page_size]
+
+    def stats(self):
+        with self._locked():
+            counts = dict(self._db.execute(
+                "SELECT namespace, COUNT(*) FROM vectors GROUP BY namespace"
+            ).fetchall())
+        return {
+            "dimension": self.dimension,
+            "namespaces": {ns: {"vector_count": count} for ns, count in counts.items()},
+            "total_vector_count": sum(counts.values())
+        }
+
+    def health(self):
+        return {"backend": self.name, "healthy": True, "directory": self.directory}
+
+    def close(self):
+        with self._lock:
+            for state in self._namespaces.values():
+                state["matrix"].flush()
+            self._db.close()
+            self._lock_file.close()
+
+def matches_filter(metadata, filter_query):
+    """
+    Evaluate a Pinecone-style metadata filter against a metadata dict.
+
+    Supports $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $exists, $and and $or.
+    A plain value is shorthand for $eq. List-valued metadata fields match when
+    any element matches, as in Pinecone.
+    """
+    for key, condition in filter_query.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            if not _matches_field(metadata, key, condition):
+                return False
+    return True
+
+def _matches_field(metadata, key, condition):
+    present = key in metadata
+    value = metadata.get(key)
+    candidates = value if isinstance(value, list) else [value]
+
+    for op, operand in condition.items():
+        if op == "$exists":
+            ok = present == bool(operand)
+        elif not present:
+            ok = op in ("$ne", "$nin")
+        elif op == "$eq":
+            ok = operand in candidates
+        elif op == "$ne":
+            ok = operand not in candidates
+        elif op == "$in":
+            ok = any(c in operand for c in candidates)
+        elif op == "$nin":
+            ok = not any(c in operand for c in candidates)
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            try:
+                if op == "$gt":
+                    ok = any(c > operand for c in candidates)
+                elif op == "$gte":
+                    ok = any(c >= operand for c in candidates)
+                elif op == "$lt":
+                    ok = any(c < operand for c in candidates)
+                else:
+                    ok = any(c <= operand for c in candidates)
+            except TypeError:
+                ok = False
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if not ok:
+            return False
+    return True
+
+def record_size(vector):
+    """Approximate size of a record in an upsert request, in bytes (values as JSON floats)"""
+    return len(vector["id"]) + 22 * len(vector["values"]) + len(json.dumps(vector.get("metadata") or {})) + 64
+
+def upsert_batches(vectors, max_bytes=UPSERT_MAX_BYTES, max_records=UPSERT_MAX_RECORDS):
+    """
+    Split records into upsert batches by request size rather than record count.
+
+    Args:
+        vectors (iterable): Records to upsert
+        max_bytes (int, optional): Largest estimated request size
+        max_records (int, optional): Most records per request
+
+    Yields:
+        list: Records for one upsert request
+    """
+    batch = []
+    size = 0
+    for vector in vectors:
+        vector_size = record_size(vector)
+        if batch and (size + vector_size > max_bytes or len(batch) >= max_records):
+            yield batch
+            batch = []
+            size = 0
+        batch.append(vector)
+        size += vector_size
+    if batch:
+        yield batch
+
+def create_backend(name, index_name, dimension):
+    """
+    Build the storage backend selected by name.
+
+    Args:
+        name (str): "pinecone" or "local"
+        index_name (str): Pinecone index name (ignored by the local backend)
+        dimension (int): Embedding dimension
+
+    Returns:
+        VectorBackend: The backend instance
+    """
+    if name == "pinecone":
+        return PineconeBackend(index_name, dimension)
+    if name == "local":
+        return LocalVectorBackend(dimension=dimension)
+    raise ValueError(f"Unknown vector backend: {name}")
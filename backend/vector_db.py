@@ -4,72 +4,133 @@
 # @Last Modified by:   Mukhil Sundararaj
 # @Last Modified time: 2025-05-20 11:50:44
 import os
-from pinecone import Pinecone
 from dotenv import load_dotenv
 import google.generativeai as genai
 import uuid
 import json
 from datetime import datetime
+from vector_backends import create_backend, matches_filter, upsert_batches
+from blob_store import put_blob, get_blob
+import meeting_catalog
+import chat_index
+import search_index
+import search_cache
+import embeddings
 # Updated import for google-generativeai 0.7.0
 # from google.genai.types import EmbedContentConfig
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Pinecone client
-PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
-if not PINECONE_API_KEY:
-    raise ValueError("PINECONE_API_KEY environment variable is not set")
-
-# Initialize Pinecone with the v6.0.0 API
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
-# Initialize Gemini for embeddings
+# Initialize Gemini for embeddings (not needed by the mock embeddings below)
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable is not set")
-
-genai.configure(api_key=GOOGLE_API_KEY)
+if GOOGLE_API_KEY:
+    genai.configure(api_key=GOOGLE_API_KEY)
 embedding_model = genai.GenerativeModel('gemini-1.5-pro')  # Using Gemini 1.5 Pro for embeddings
 
 # Default index name and namespace
 INDEX_NAME = "meeting-summarizer"
 DEFAULT_NAMESPACE = "meetings"
+EMBEDDING_DIMENSION = 768
+
+# Large text fields kept in the blob store; only their content hashes live on the vector
+BODY_FIELDS = ("transcript", "summary")
+
+# Fields whose changes re-index a meeting for keyword search
+SEARCH_FIELDS = tuple(search_index.FIELD_WEIGHTS)
+
+# Fields the vector metadata used by filtered searches is derived from
+FILTER_SOURCE_FIELDS = ("attendees", "meeting_date", "timestamp")
+
+# Storage backend: "pinecone" (default) or "local" for the in-process NumPy store
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'pinecone').lower()
+
+# One long-lived backend (and index handle) per process
+_backend = create_backend(VECTOR_BACKEND, INDEX_NAME, EMBEDDING_DIMENSION)
+
+def get_backend():
+    """Return the storage backend shared by this process"""
+    return _backend
+
+def _externalize_bodies(metadata, partial=False):
+    """
+    Move body fields into the blob store, leaving their content hashes in the metadata.
+    
+    With partial, metadata is a patch and has_summary is only set if the summary is in it.
+    """
+    for field in BODY_FIELDS:
+        if field in metadata:
+            body = metadata.pop(field) or ""
+            metadata[f"{field}_hash"] = put_blob(body)
+            if field == "summary":
+                metadata["has_summary"] = body.strip() != ""
+    if not partial:
+        metadata.setdefault("has_summary", False)
+    return metadata
+
+def _hydrate_bodies(metadata):
+    """Load body fields referenced by hash back into the metadata"""
+    for field in BODY_FIELDS:
+        digest = metadata.get(f"{field}_hash")
+        if digest and field not in metadata:
+            metadata[field] = get_blob(digest)
+    return metadata
+
+def get_meeting_body(metadata, field):
+    """
+    Return a meeting body (transcript or summary) for metadata from a search or listing.
+    
+    Args:
+        metadata (dict): Meeting metadata, with the body inline or referenced by hash
+        field (str): "transcript" or "summary"
+    
+    Returns:
+        str: The body, or an empty string if the meeting has none
+    """
+    if field in metadata:
+        return metadata[field]
+    digest = metadata.get(f"{field}_hash")
+    return get_blob(digest) if digest else ""
+
+def _search_fields(metadata):
+    """Text fields of a meeting indexed for keyword search"""
+    return {
+        "meeting_name": metadata.get("meeting_name"),
+        "summary": get_meeting_body(metadata, "summary"),
+        "transcript": get_meeting_body(metadata, "transcript")
+    }
+
+def _load_search_documents(namespace, meeting_ids=None):
+    """Yield catalogued meetings' keyword search fields (all of them, or those of meeting_ids), for the keyword index"""
+    if meeting_ids is None:
+        for meeting in iter_all_meetings(namespace):
+            yield meeting["meeting_id"], _search_fields(meeting["metadata"])
+        return
+    for meeting_id in meeting_ids:
+        metadata = meeting_catalog.get_meeting(meeting_id, namespace)
+        if metadata is not None:
+            yield meeting_id, _search_fields(metadata)
+
+def get_search_index(namespace=DEFAULT_NAMESPACE):
+    """Return the namespace's keyword index, building it from the catalog on first use"""
+    return search_index.get_index(namespace, _load_search_documents)
 
 def initialize_vector_db():
     """Initialize the vector database, creating an index if it doesn't exist."""
     try:
-        # Check if index exists
-        index_exists = False
-        indexes = pc.list_indexes()
-        
-        print(f"Available Pinecone indexes: {indexes}")
-        
-        for index_info in indexes.get('indexes', []):
-            if index_info.get('name') == INDEX_NAME:
-                index_exists = True
-                break
-        
-        # Create index if it doesn't exist
-        if not index_exists:
-            print(f"Creating Pinecone index: {INDEX_NAME}")
-            pc.create_index(
-                name=INDEX_NAME,
-                dimension=768,  # Dimension of Gemini embeddings
-                metric="cosine",
-                spec={
-                    "serverless": {
-                        "cloud": "aws",
-                        "region": "us-west-2"
-                    }
-                }
-            )
-            print(f"Index {INDEX_NAME} created successfully")
-        else:
-            print(f"Index {INDEX_NAME} already exists")
-            
-        # Connect to the index to verify it's working
-        connect_to_index()
+        print(f"Initializing {_backend.name} vector backend")
+        if not _backend.initialize():
+            return False
+        
+        # Backfill the catalog if the index holds meetings it has never seen
+        if meeting_catalog.count_meetings(DEFAULT_NAMESPACE) == 0:
+            stats = _backend.stats() or {}
+            namespace_stats = stats.get('namespaces', {}).get(DEFAULT_NAMESPACE)
+            if namespace_stats and namespace_stats['vector_count'] > 0:
+                rebuild_catalog(DEFAULT_NAMESPACE)
+        
+        # Build the keyword index off the startup path; searches wait for it
+        search_index.warm(DEFAULT_NAMESPACE, _load_search_documents)
         return True
     
     except Exception as e:
@@ -77,50 +138,88 @@ def initialize_vector_db():
         return False
 
 def get_embedding(text):
-    """Generate embedding for a text using a deterministic hash-based method for testing"""
+    """Generate embedding for a text with the configured provider (see embeddings.py)"""
     try:
-        # For testing, we'll create a deterministic hash-based embedding 
-        # that doesn't require API calls
-        import hashlib
-        import numpy as np
-        
-        # Create a deterministic hash-based embedding of 768 dimensions
-        text_hash = hashlib.md5(text.encode()).digest()
-        # Use a smaller portion of the hash to ensure it's within the allowed range for seed
-        seed = int.from_bytes(text_hash[:4], byteorder='big') % (2**32 - 1)
-        np.random.seed(seed)
-        
-        # Generate a 768-dimensional embedding vector with values between -1 and 1
-        embedding = np.random.uniform(-1, 1, 768).tolist()
-        
-        return embedding
+        # No API calls; see embeddings.embed_many for embedding many texts at once
+        return embeddings.embed(text).tolist()
     except Exception as e:
         print(f"Error generating embedding: {e}")
         raise
 
 def connect_to_index(index_name=INDEX_NAME):
-    """Connect to Pinecone index"""
+    """Return the shared Pinecone index handle (no network round trip once opened)"""
     try:
-        index = pc.Index(index_name)
-        # Verify the index can be accessed with a simple stats check
-        stats = index.describe_index_stats()
-        print(f"Successfully connected to index {index_name}. Stats: {stats}")
-        return index
+        if _backend.name != "pinecone":
+            raise ValueError(f"connect_to_index() needs the Pinecone backend, not {_backend.name}")
+        if index_name != _backend.index_name:
+            return _backend.pc.Index(index_name)
+        return _backend.index
     except Exception as e:
         print(f"Error connecting to index {index_name}: {e}")
         raise
 
-def store_meeting(transcript, meeting_name, meeting_date, attendees, summary=None, namespace=DEFAULT_NAMESPACE):
+def get_index_stats():
+    """Return the index stats (cached by the background refresher for Pinecone)"""
+    return _backend.stats()
+
+def get_index_health():
+    """Return the result of the most recent health probe"""
+    return _backend.health()
+
+def shutdown_vector_db():
+    """Stop background work and release the storage backend."""
+    _backend.close()
+
+def _new_meeting_metadata(transcript, meeting_name, meeting_date, attendees, summary=None, parsed=None,
+                          transcript_hash=None):
+    """
+    Build the metadata of a new meeting, moving its bodies to the blob store
+    and building its chat passage index.
+    """
+    # Validate meeting_name is not empty
+    if not meeting_name or meeting_name.strip() == "":
+        print("WARNING: Empty meeting name provided, using 'Meeting on {meeting_date}' instead")
+        meeting_name = f"Meeting on {meeting_date}"
+    
+    # Prepare metadata
+    metadata = {
+        "meeting_name": meeting_name,
+        "meeting_date": meeting_date,
+        "attendees": attendees,
+        "transcript": transcript,
+        "timestamp": datetime.now().isoformat(),
+        **embeddings.model_metadata()
+    }
+    metadata.update(meeting_catalog.filter_metadata(metadata))
+    
+    # Add summary if available
+    if summary:
+        metadata["summary"] = summary
+    
+    # Keep the bodies out of the vector metadata
+    if transcript_hash:
+        metadata["transcript_hash"] = transcript_hash
+        del metadata["transcript"]
+    _externalize_bodies(metadata)
+    
+    # Build the passage index chat questions are answered from
+    chat_index.ensure_index(metadata["transcript_hash"], transcript, parsed)
+    return metadata
+
+def store_meeting(transcript, meeting_name, meeting_date, attendees, summary=None, namespace=DEFAULT_NAMESPACE,
+                  parsed=None, transcript_hash=None):
     """
     Store a meeting in the vector database.
     
     Args:
-        transcript (str): The meeting transcript
+        transcript (str): The meeting transcript, or None to load it from the blob store by transcript_hash
         meeting_name (str): Name of the meeting
         meeting_date (str): Date of the meeting
         attendees (list): List of attendees' email addresses
         summary (str, optional): Meeting summary if available
         namespace (str, optional): Namespace to store in
+        parsed (ParsedTranscript, optional): The transcript's structure, if already parsed
+        transcript_hash (str, optional): Hash of a transcript already in the blob store
     
     Returns:
         dict: Status and meeting ID
@@ -129,38 +228,21 @@ def store_meeting(transcript, meeting_name, meeting_date, attendees, summary=Non
         # Generate a unique meeting ID
         meeting_id = str(uuid.uuid4())
         
-        # Generate embedding for the transcript
-        content = transcript
-        if summary:
-            content += " " + summary
-        
-        embedding = get_embedding(content)
+        if transcript is None:
+            transcript = get_blob(transcript_hash)
         
-        # Validate meeting_name is not empty
-        if not meeting_name or meeting_name.strip() == "":
-            print("WARNING: Empty meeting name provided, using 'Meeting on {meeting_date}' instead")
-            meeting_name = f"Meeting on {meeting_date}"
-        
-        # Prepare metadata
-        metadata = {
-            "meeting_name": meeting_name,
-            "meeting_date": meeting_date,
-            "attendees": attendees,
-            "transcript": transcript,
-            "timestamp": datetime.now().isoformat()
-        }
+        # Generate embedding for the transcript
+        embedding = get_embedding(embeddings.meeting_text(transcript, summary))
         
-        # Add summary if available
-        if summary:
-            metadata["summary"] = summary
+        metadata = _new_meeting_metadata(
+            transcript, meeting_name, meeting_date, attendees, summary, parsed, transcript_hash
+        )
+        meeting_name = metadata["meeting_name"]
             
         print(f"Storing meeting with ID {meeting_id}, name: {meeting_name}")
         
-        # Connect to the index
-        index = connect_to_index()
-        
-        # Store in Pinecone using v6.0.0 API format
-        index.upsert(
+        # Store using the Pinecone v6.0.0 record format
+        _backend.upsert(
             vectors=[
                 {
                     "id": meeting_id,
@@ -171,7 +253,15 @@ def store_meeting(transcript, meeting_name, meeting_date, attendees, summary=Non
             namespace=namespace
         )
         
-        print(f"Successfully stored meeting {meeting_id} in Pinecone")
+        meeting_catalog.upsert_meeting(meeting_id, metadata, namespace)
+        search_index.update(namespace, meeting_id, {
+            "meeting_name": meeting_name,
+            "summary": summary,
+            "transcript": transcript
+        })
+        search_cache.bump(namespace)
+        
+        print(f"Successfully stored meeting {meeting_id} in {_backend.name} backend")
         
         return {
             "status": "success",
@@ -184,13 +274,85 @@ def store_meeting(transcript, meeting_name, meeting_date, attendees, summary=Non
             "message": str(e)
         }
 
-def retrieve_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
+def store_meetings(records, namespace=DEFAULT_NAMESPACE):
+    """
+    Store many meetings at once.
+    
+    Texts are embedded in batches and the vectors upserted in requests split
+    by size (see vector_backends.upsert_batches), then the catalog is written
+    in one transaction. A failing record or upsert batch only fails its own
+    meetings.
+    
+    Args:
+        records (list): Dicts with transcript, meeting_name and optionally
+            meeting_date, attendees and summary, as taken by store_meeting
+        namespace (str, optional): Namespace to store in
+    
+    Returns:
+        list: Per record, {"status": "success", "meeting_id"} or {"status": "error", "message"}
+    """
+    results = [None] * len(records)
+    prepared = []
+    for position, record in enumerate(records):
+        try:
+            metadata = _new_meeting_metadata(
+                record["transcript"],
+                record.get("meeting_name"),
+                record.get("meeting_date"),
+                record.get("attendees") or [],
+                record.get("summary")
+            )
+            prepared.append((position, str(uuid.uuid4()), metadata, record))
+        except Exception as e:
+            results[position] = {"status": "error", "message": str(e)}
+    
+    try:
+        vectors = embeddings.embed_many([
+            embeddings.meeting_text(record["transcript"], record.get("summary")) for _, _, _, record in prepared
+        ])
+    except Exception as e:
+        print(f"Error embedding meetings: {e}")
+        for position, _, _, _ in prepared:
+            results[position] = {"status": "error", "message": str(e)}
+        return results
+    
+    stored = []
+    positions = {meeting_id: position for position, meeting_id, _, _ in prepared}
+    for batch in upsert_batches(
+        {"id": meeting_id, "values": vector.tolist(), "metadata": metadata}
+        for (_, meeting_id, metadata, _), vector in zip(prepared, vectors)
+    ):
+        try:
+            _backend.upsert(vectors=batch, namespace=namespace)
+            stored.extend(batch)
+        except Exception as e:
+            print(f"Error storing {len(batch)} meetings: {e}")
+            for vector in batch:
+                results[positions[vector["id"]]] = {"status": "error", "message": str(e)}
+    
+    meeting_catalog.upsert_meetings([(vector["id"], vector["metadata"]) for vector in stored], namespace)
+    for vector in stored:
+        record = records[positions[vector["id"]]]
+        search_index.update(namespace, vector["id"], {
+            "meeting_name": vector["metadata"]["meeting_name"],
+            "summary": record.get("summary"),
+            "transcript": record["transcript"]
+        })
+        results[positions[vector["id"]]] = {"status": "success", "meeting_id": vector["id"]}
+    if stored:
+        search_cache.bump(namespace)
+    
+    print(f"Stored {len(stored)} of {len(records)} meetings in {_backend.name} backend")
+    return results
+
+def retrieve_meeting(meeting_id, namespace=DEFAULT_NAMESPACE, include_bodies=True):
     """
     Retrieve a meeting by ID.
     
     Args:
         meeting_id (str): Meeting ID to retrieve
         namespace (str, optional): Namespace to retrieve from
+        include_bodies (bool, optional): Load the transcript and summary from the blob store
     
     Returns:
         dict: Meeting data or error
@@ -198,46 +360,23 @@ def retrieve_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
     try:
         print(f"Fetching meeting with ID {meeting_id} from namespace {namespace}")
         
-        # Connect to the index
-        index = connect_to_index()
-        
         # Fetch the vector
-        response = index.fetch(ids=[meeting_id], namespace=namespace)
+        records = _backend.fetch([meeting_id], namespace)
         
-        # Handle the FetchResponse object from Pinecone v6.0.0 
-        try:
-            # Check if the response has a 'vectors' attribute (new API)
-            if hasattr(response, 'vectors'):
-                if meeting_id in response.vectors:
-                    meeting = response.vectors[meeting_id].metadata
-                    return {
-                        "status": "success",
-                        "meeting": meeting
-                    }
-            # Check if the response is a dict with a 'vectors' key (old API)
-            elif isinstance(response, dict) and 'vectors' in response:
-                if meeting_id in response['vectors']:
-                    meeting = response['vectors'][meeting_id]['metadata']
-                    return {
-                        "status": "success",
-                        "meeting": meeting
-                    }
-            
-            # Meeting not found in either format
-            print(f"Meeting {meeting_id} not found in namespace {namespace}")
+        if meeting_id in records:
+            meeting = records[meeting_id]["metadata"]
+            if include_bodies:
+                _hydrate_bodies(meeting)
             return {
-                "status": "error",
-                "message": f"Meeting {meeting_id} not found in namespace {namespace}"
+                "status": "success",
+                "meeting": meeting
             }
         
-        except Exception as access_error:
-            print(f"Error accessing response data: {access_error}")
-            print(f"Response type: {type(response)}")
-            print(f"Response content: {repr(response)}")
-            return {
-                "status": "error",
-                "message": f"Error accessing meeting data: {str(access_error)}"
-            }
+        print(f"Meeting {meeting_id} not found in namespace {namespace}")
+        return {
+            "status": "error",
+            "message": f"Meeting {meeting_id} not found in namespace {namespace}"
+        }
     
     except Exception as e:
         print(f"Error retrieving meeting: {e}")
@@ -246,54 +385,136 @@ def retrieve_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
             "message": str(e)
         }
 
-def search_meetings(query, top_k=5, namespace=DEFAULT_NAMESPACE, filter_query=None):
+def search_meetings(query, top_k=5, namespace=DEFAULT_NAMESPACE, filter_query=None, mode="hybrid", filters=None):
     """
-    Search for meetings semantically similar to the query.
+    Search for meetings matching the query.
+    
+    Hybrid search fuses the vector similarity ranking with a BM25 keyword
+    ranking over meeting names, summaries and transcripts (reciprocal rank
+    fusion), so exact terms such as names find their meetings whatever the
+    embeddings. Keyword search is answered from the in-memory index alone.
+    
+    Attendee, date and summary filters are resolved to a candidate set from
+    the catalog's indexes first, and only those meetings are scored.
+    
+    Results are cached by normalized query, parameters and the namespace's
+    write generation, so repeated searches are served from memory until the
+    next write.
     
     Args:
         query (str): Search query
         top_k (int, optional): Number of results to return
         namespace (str, optional): Namespace to search in
         filter_query (dict, optional): Metadata filter
+        mode (str, optional): "hybrid" (default), "keyword" or "vector"
+        filters (dict, optional): Any of attendees, date_from, date_to and has_summary
+            (see meeting_catalog.FILTER_KEYS)
     
     Returns:
         dict: List of matching meetings
     """
     try:
-        # Generate embedding for the query
-        query_embedding = get_embedding(query)
-        
-        # Connect to the index
-        index = connect_to_index()
-        
-        # Search parameters
-        search_params = {
-            "vector": query_embedding,
-            "top_k": top_k,
-            "namespace": namespace,
-            "include_metadata": True
-        }
+        if mode not in ("hybrid", "keyword", "vector"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        query = search_cache.normalize_query(query)
+        cache_key = search_cache.make_key(namespace, query, top_k, mode, filters, filter_query)
+        generation = search_cache.generation(namespace)
+        cached = search_cache.get(cache_key, generation)
+        if cached is not None:
+            return cached
+        
+        candidates = top_k if mode != "hybrid" else max(top_k, search_index.SEARCH_CANDIDATES)
+        
+        allowed = None
+        if filters and any(filters.get(key) not in (None, [], "") for key in meeting_catalog.FILTER_KEYS):
+            allowed = meeting_catalog.filter_meeting_ids(namespace, filters)
+            if not allowed:
+                result = {
+                    "status": "success",
+                    "meetings": []
+                }
+                search_cache.put(cache_key, generation, result)
+                return result
         
-        # Add filter if provided
-        if filter_query:
-            search_params["filter"] = filter_query
+        vector_matches = {}
+        if mode != "keyword":
+            # Generate embedding for the query
+            query_embedding = get_embedding(query)
+            
+            # Perform the search, scoring only the filtered meetings when the
+            # backend can do that cheaply
+            limit = _backend.candidate_limit
+            restrict = allowed is not None and (limit is None or len(allowed) <= limit)
+            vector_filter = filter_query
+            if allowed is not None and not restrict:
+                # Too many candidates to fetch; have the store apply the filters itself
+                pushed = meeting_catalog.vector_filter(filters)
+                vector_filter = {"$and": [filter_query, pushed]} if filter_query and pushed else filter_query or pushed
+            results = _backend.query(
+                vector=query_embedding,
+                top_k=candidates,
+                namespace=namespace,
+                include_metadata=True,
+                filter=vector_filter,
+                ids=allowed if restrict else None
+            )
+            if allowed is not None and not restrict:
+                # The catalog has the last word, e.g. on dates the store cannot compare
+                allowed_set = set(allowed)
+                results = [match for match in results if match['id'] in allowed_set]
+            # Scores against vectors from another embedding model are meaningless,
+            # e.g. while reembed.py is migrating; those meetings can still be
+            # found by keyword
+            vector_matches = {
+                match['id']: match for match in results if embeddings.is_current(match['metadata'])
+            }
         
-        # Perform the search
-        results = index.query(**search_params)
+        keyword_scores = {}
+        keyword_metadata = {}
+        if mode != "vector":
+            # Over-fetch when filtering, since the index does not know the filter
+            limit = candidates * 4 if filter_query else candidates
+            matches = get_search_index(namespace).search(
+                query, limit, candidates=set(allowed) if allowed is not None else None
+            )
+            for meeting_id, score in matches:
+                metadata = meeting_catalog.get_meeting(meeting_id, namespace)
+                if metadata is None or (filter_query and not matches_filter(metadata, filter_query)):
+                    continue
+                keyword_scores[meeting_id] = score
+                keyword_metadata[meeting_id] = metadata
+                if len(keyword_scores) == candidates:
+                    break
+        
+        if mode == "hybrid":
+            ranked = search_index.fuse([list(vector_matches), list(keyword_scores)], top_k)
+        elif mode == "keyword":
+            ranked = list(keyword_scores.items())[:top_k]
+        else:
+            ranked = [(meeting_id, match['score']) for meeting_id, match in vector_matches.items()]
         
         # Process and return results
         meetings = []
-        for match in results['matches']:
-            meetings.append({
-                "meeting_id": match['id'],
-                "score": match['score'],
-                "metadata": match['metadata']
-            })
+        for meeting_id, score in ranked:
+            match = vector_matches.get(meeting_id)
+            meeting = {
+                "meeting_id": meeting_id,
+                "score": score,
+                # Keyword-only hits carry their catalog metadata, saving a fetch
+                "metadata": match['metadata'] if match else keyword_metadata[meeting_id]
+            }
+            if mode == "hybrid":
+                meeting["vector_score"] = match['score'] if match else None
+                meeting["keyword_score"] = keyword_scores.get(meeting_id)
+            meetings.append(meeting)
         
-        return {
+        result = {
             "status": "success",
             "meetings": meetings
         }
+        search_cache.put(cache_key, generation, result)
+        return result
     except Exception as e:
         print(f"Error searching meetings: {e}")
         return {
@@ -301,68 +522,30 @@ def search_meetings(query, top_k=5, namespace=DEFAULT_NAMESPACE, filter_query=No
             "message": str(e)
         }
 
-def list_all_meetings(namespace=DEFAULT_NAMESPACE, limit=100):
+def list_all_meetings(namespace=DEFAULT_NAMESPACE, limit=100, cursor=None, filters=None):
     """
-    List all meetings in the database.
+    List meetings in the database, newest first.
+    
+    Meetings are served from the local catalog using keyset pagination, so the
+    cost of a page does not grow with the size of the namespace.
     
     Args:
         namespace (str, optional): Namespace to list from
         limit (int, optional): Maximum number of meetings to return
+        cursor (str, optional): Cursor returned with the previous page
+        filters (dict, optional): Only list meetings matching these filters (see meeting_catalog.FILTER_KEYS)
     
     Returns:
-        dict: List of meetings
+        dict: List of meetings, the total matching and the next page cursor
     """
     try:
         print(f"Listing meetings from namespace: {namespace} (limit: {limit})")
         
-        # Connect to the index
-        index = connect_to_index()
-        
-        # Get index stats
-        stats = index.describe_index_stats()
-        print(f"Index stats: {stats}")
-        
-        # Check if namespace exists
-        if namespace not in stats.get('namespaces', {}):
-            print(f"Namespace {namespace} does not exist in index {INDEX_NAME}")
-            return {
-                "status": "success",
-                "meetings": [],
-                "total": 0
-            }
-        
-        # Get all vector IDs in the namespace
-        # This is a simple approach - for production with many vectors, implement pagination
-        vector_count = stats['namespaces'][namespace]['vector_count']
-        print(f"Found {vector_count} vectors in namespace {namespace}")
-        
-        if vector_count == 0:
-            print(f"No meetings found in namespace {namespace}")
-            return {
-                "status": "success", 
-                "meetings": [],
-                "total": 0
-            }
-        
-        # Use the search endpoint with a null query to get vectors
-        # This is a workaround as Pinecone v6.0.0 API doesn't have a direct method to list all vectors
-        # For actual implementation, consider a different approach for listing all meetings
-        dummy_embedding = [0.0] * 768  # Create a dummy embedding of zeros
-        results = index.query(
-            vector=dummy_embedding,
-            top_k=min(vector_count, limit),
-            namespace=namespace,
-            include_metadata=True
-        )
-        
-        print(f"Query returned {len(results.get('matches', []))} results")
+        rows, next_cursor = meeting_catalog.list_meetings(namespace, limit, cursor, filters)
         
         # Process and return results
         meetings = []
-        for match in results.get('matches', []):
-            meeting_id = match.get('id', 'unknown_id')
-            metadata = match.get('metadata', {})
-            
+        for meeting_id, metadata in rows:
             # Check and sanitize metadata
             if not metadata.get('meeting_name') or metadata.get('meeting_name').strip() == "":
                 print(f"Warning: Meeting {meeting_id} has no name, setting default name")
@@ -378,7 +561,8 @@ def list_all_meetings(namespace=DEFAULT_NAMESPACE, limit=100):
         return {
             "status": "success",
             "meetings": meetings,
-            "total": vector_count
+            "total": meeting_catalog.count_meetings(namespace, filters),
+            "next_cursor": next_cursor
         }
     except Exception as e:
         error_msg = f"Error listing meetings: {str(e)}"
@@ -388,6 +572,104 @@ def list_all_meetings(namespace=DEFAULT_NAMESPACE, limit=100):
             "message": error_msg
         }
 
+def iter_all_meetings(namespace=DEFAULT_NAMESPACE, page_size=500):
+    """
+    Yield every catalogued meeting in a namespace, newest first.
+    
+    Args:
+        namespace (str, optional): Namespace to list from
+        page_size (int, optional): Number of meetings read per catalog page
+    
+    Yields:
+        dict: Meeting ID and metadata, as returned by list_all_meetings
+    """
+    cursor = None
+    while True:
+        result = list_all_meetings(namespace, limit=page_size, cursor=cursor)
+        if result["status"] != "success":
+            raise RuntimeError(result["message"])
+        yield from result["meetings"]
+        cursor = result["next_cursor"]
+        if not cursor:
+            break
+
+def backfill_filter_metadata(namespace=DEFAULT_NAMESPACE, page_size=500):
+    """
+    Add the metadata used by filtered searches to vectors written before it existed.
+    
+    Filtered searches over more meetings than the backend's candidate_limit
+    are filtered by the vector store, which only finds vectors carrying
+    meeting_catalog.filter_metadata. The fields are derived from the catalog
+    and written as metadata-only updates.
+    
+    Args:
+        namespace (str, optional): Namespace to backfill
+        page_size (int, optional): Number of meetings read per catalog page
+    
+    Returns:
+        dict: Status and number of meetings updated
+    """
+    try:
+        updated = 0
+        cursor = None
+        while True:
+            meetings, cursor = meeting_catalog.list_meetings(namespace, limit=page_size, cursor=cursor)
+            for meeting_id, metadata in meetings:
+                if _backend.update(meeting_id, namespace, set_metadata=meeting_catalog.filter_metadata(metadata)):
+                    updated += 1
+            if not cursor:
+                break
+        print(f"Backfilled filter metadata for {updated} meetings in namespace {namespace}")
+        return {
+            "status": "success",
+            "updated": updated
+        }
+    except Exception as e:
+        print(f"Error backfilling filter metadata: {e}")
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+def rebuild_catalog(namespace=DEFAULT_NAMESPACE, batch_size=100):
+    """
+    Rebuild the local catalog for a namespace from the vectors in the index.
+    
+    Used to pick up meetings that were written before the catalog existed or
+    by tools that bypass vector_db.
+    
+    Args:
+        namespace (str, optional): Namespace to rebuild
+        batch_size (int, optional): Number of vectors fetched per request
+    
+    Returns:
+        dict: Status and number of meetings catalogued
+    """
+    try:
+        print(f"Rebuilding meeting catalog for namespace {namespace}")
+        catalogued = 0
+        for ids in _backend.list_ids(namespace, page_size=batch_size):
+            records = _backend.fetch(ids, namespace)
+            meeting_catalog.upsert_meetings(
+                [(meeting_id, record["metadata"]) for meeting_id, record in records.items()],
+                namespace
+            )
+            catalogued += len(records)
+        search_index.reset(namespace)
+        search_cache.bump(namespace)
+        
+        print(f"Catalogued {catalogued} meetings in namespace {namespace}")
+        return {
+            "status": "success",
+            "catalogued": catalogued
+        }
+    except Exception as e:
+        print(f"Error rebuilding catalog: {e}")
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
 def delete_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
     """
     Delete a meeting from the database.
@@ -409,9 +691,6 @@ def delete_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
                 "message": f"Invalid meeting ID: {meeting_id}"
             }
         
-        # Connect to the index
-        index = connect_to_index()
-        
         try:
             # Try to delete directly without any checks
             print(f"Executing direct delete for meeting: {meeting_id}")
@@ -420,36 +699,17 @@ def delete_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
             # The delete method might return different response types
             # We'll just try to delete and check if it raises an exception
             
-            result = index.delete(
+            result = _backend.delete(
                 ids=[meeting_id], 
                 namespace=namespace
             )
             
             print(f"Delete operation result: {result}")
+            meeting_catalog.delete_meeting(meeting_id, namespace)
+            search_index.remove(namespace, meeting_id)
+            search_cache.bump(namespace)
             
-            # Verify deletion by trying to fetch the meeting
-            try:
-                verification = index.fetch(ids=[meeting_id], namespace=namespace)
-                
-                # Check if the meeting still exists
-                if (hasattr(verification, 'vectors') and meeting_id in verification.vectors) or \
-                   (isinstance(verification, dict) and 'vectors' in verification and meeting_id in verification['vectors']):
-                    print(f"Warning: Meeting {meeting_id} still exists after deletion")
-                    # If still exists, make a second attempt with a different approach
-                    print(f"Making a second deletion attempt with filter operation")
-                    try:
-                        index.delete(
-                            filter={"id": {"$eq": meeting_id}},
-                            namespace=namespace
-                        )
-                    except Exception as second_attempt_err:
-                        print(f"Second deletion attempt error: {second_attempt_err}")
-                else:
-                    print(f"Verification successful - meeting {meeting_id} was deleted")
-            except Exception as verify_err:
-                print(f"Error during verification, assuming deletion was successful: {verify_err}")
-            
-            # Return success regardless of verification
+            # Pinecone acknowledges the delete; no verification fetch is needed
             return {
                 "status": "success",
                 "message": f"Meeting {meeting_id} deleted successfully"
@@ -469,58 +729,105 @@ def delete_meeting(meeting_id, namespace=DEFAULT_NAMESPACE):
             "message": error_msg
         }
 
-def update_meeting_summary(meeting_id, summary, namespace=DEFAULT_NAMESPACE, additional_fields=None):
+def _rewrite_meeting(meeting_id, fields, namespace):
     """
-    Update a meeting's summary and additional fields.
+    Apply an update by rewriting the whole record, for meetings update_meeting
+    cannot patch: ones missing from the catalog or still holding their bodies
+    inline, which would otherwise shadow the blob store copies.
+    """
+    records = _backend.fetch([meeting_id], namespace)
+    if meeting_id not in records:
+        return {
+            "status": "error",
+            "message": f"Meeting {meeting_id} not found in namespace {namespace}"
+        }
+    record = records[meeting_id]
+    meeting = record["metadata"]
+    
+    before = {field: get_meeting_body(meeting, field) for field in BODY_FIELDS if field in fields}
+    meeting.update(fields)
+    meeting.update(meeting_catalog.filter_metadata(meeting))
+    values = record["values"]
+    if any(fields[field] != body for field, body in before.items()):
+        values = get_embedding(
+            embeddings.meeting_text(get_meeting_body(meeting, "transcript"), get_meeting_body(meeting, "summary"))
+        )
+        meeting.update(embeddings.model_metadata())
+    
+    _externalize_bodies(meeting)
+    _backend.upsert(
+        vectors=[
+            {
+                "id": meeting_id,
+                "values": values,
+                "metadata": meeting
+            }
+        ],
+        namespace=namespace
+    )
+    meeting_catalog.upsert_meeting(meeting_id, meeting, namespace)
+    if any(field in fields for field in SEARCH_FIELDS):
+        search_index.update(namespace, meeting_id, _search_fields(meeting))
+    search_cache.bump(namespace)
+    return {
+        "status": "success",
+        "message": f"Meeting {meeting_id} updated successfully",
+        "reembedded": values is not record["values"]
+    }
+
+def update_meeting(meeting_id, fields, namespace=DEFAULT_NAMESPACE):
+    """
+    Patch a meeting in place, writing only the given fields.
+    
+    The vector is re-embedded only when the text it embeds changed, i.e. when
+    the content hash of the transcript or summary differs from the stored one;
+    other edits are a single metadata write. The current hashes come from the
+    catalog, so the meeting is only fetched if it is not catalogued (or predates
+    the blob store, in which case the whole record is rewritten).
     
     Args:
         meeting_id (str): Meeting ID to update
-        summary (str): New summary text
+        fields (dict): Metadata fields to set; "transcript" and "summary" bodies go to the blob store
         namespace (str, optional): Namespace of the meeting
-        additional_fields (dict, optional): Additional fields to update (e.g., action_items, key_topics)
     
     Returns:
-        dict: Status of the operation
+        dict: Status of the operation, with "reembedded" telling whether the vector changed
     """
     try:
-        # First retrieve the existing meeting
-        result = retrieve_meeting(meeting_id, namespace)
-        
-        if result["status"] != "success":
-            return result
-        
-        meeting = result["meeting"]
-        
-        # Update the summary
-        meeting["summary"] = summary
-        
-        # Update additional fields if provided
-        if additional_fields:
-            for key, value in additional_fields.items():
-                meeting[key] = value
-        
-        # Generate new embedding with updated summary
-        content = meeting["transcript"] + " " + summary
-        embedding = get_embedding(content)
-        
-        # Connect to the index
-        index = connect_to_index()
-        
-        # Upsert the updated vector
-        index.upsert(
-            vectors=[
-                {
-                    "id": meeting_id,
-                    "values": embedding,
-                    "metadata": meeting
-                }
-            ],
-            namespace=namespace
-        )
+        current = meeting_catalog.get_meeting(meeting_id, namespace)
+        if current is None or not current.get("transcript_hash"):
+            return _rewrite_meeting(meeting_id, fields, namespace)
+        
+        patch = _externalize_bodies(dict(fields), partial=True)
+        if any(field in fields for field in FILTER_SOURCE_FIELDS):
+            patch.update(meeting_catalog.filter_metadata({**current, **patch}))
+        
+        # Same hashes mean the same text, so the stored embedding still holds
+        values = None
+        if any(
+            f"{field}_hash" in patch and patch[f"{field}_hash"] != current.get(f"{field}_hash")
+            for field in BODY_FIELDS
+        ):
+            merged = {**current, **patch}
+            transcript = get_meeting_body(merged, "transcript")
+            summary = get_meeting_body(merged, "summary")
+            values = get_embedding(embeddings.meeting_text(transcript, summary))
+            patch.update(embeddings.model_metadata())
+        
+        if not _backend.update(meeting_id, namespace, values=values, set_metadata=patch):
+            return {
+                "status": "error",
+                "message": f"Meeting {meeting_id} not found in namespace {namespace}"
+            }
+        meeting_catalog.upsert_meeting(meeting_id, {**current, **patch}, namespace)
+        if any(field in fields for field in SEARCH_FIELDS):
+            search_index.update(namespace, meeting_id, _search_fields({**current, **patch}))
+        search_cache.bump(namespace)
         
         return {
             "status": "success",
-            "message": f"Meeting {meeting_id} updated successfully"
+            "message": f"Meeting {meeting_id} updated successfully",
+            "reembedded": values is not None
         }
     except Exception as e:
         print(f"Error updating meeting: {e}")
@@ -529,6 +836,23 @@ def update_meeting_summary(meeting_id, summary, namespace=DEFAULT_NAMESPACE, add
             "message": str(e)
         }
 
+def update_meeting_summary(meeting_id, summary, namespace=DEFAULT_NAMESPACE, additional_fields=None):
+    """
+    Update a meeting's summary and additional fields.
+    
+    Args:
+        meeting_id (str): Meeting ID to update
+        summary (str): New summary text
+        namespace (str, optional): Namespace of the meeting
+        additional_fields (dict, optional): Additional fields to update (e.g., action_items, key_topics)
+    
+    Returns:
+        dict: Status of the operation
+    """
+    fields = dict(additional_fields or {})
+    fields["summary"] = summary
+    return update_meeting(meeting_id, fields, namespace)
+
 def update_meeting_attendees(meeting_id, attendees, namespace=DEFAULT_NAMESPACE):
     """
     Update the attendees list for a meeting.
@@ -541,47 +865,9 @@ def update_meeting_attendees(meeting_id, attendees, namespace=DEFAULT_NAMESPACE)
     Returns:
         dict: Status of the operation
     """
-    try:
-        # First retrieve the existing meeting
-        result = retrieve_meeting(meeting_id, namespace)
-        
-        if result["status"] != "success":
-            return result
-        
-        meeting = result["meeting"]
-        
-        # Update the attendees
-        meeting["attendees"] = attendees
-        
-        # Generate new embedding with updated metadata
-        content = meeting["transcript"]
-        if "summary" in meeting and meeting["summary"]:
-            content += " " + meeting["summary"]
-            
-        embedding = get_embedding(content)
-        
-        # Connect to the index
-        index = connect_to_index()
-        
-        # Upsert the updated vector
-        index.upsert(
-            vectors=[
-                {
-                    "id": meeting_id,
-                    "values": embedding,
-                    "metadata": meeting
-                }
-            ],
-            namespace=namespace
-        )
-        
-        return {
-            "status": "success",
-            "message": f"Meeting {meeting_id} attendees updated successfully"
-        }
-    except Exception as e:
-        print(f"Error updating meeting attendees: {e}")
-        return {
-            "status": "error",
-            "message": str(e)
-        } 
\ No newline at end of file
+    result = update_meeting(meeting_id, {"attendees": attendees}, namespace)
+    if result["status"] == "success":
+        result["message"] = f"Meeting {meeting_id} attendees updated successfully"
+    else:
+        print(f"Error updating meeting attendees: {result['message']}")
+    return result
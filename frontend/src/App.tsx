@@ -38,11 +38,14 @@ import GroupIcon from '@mui/icons-material/Group'
 import CalendarTodayIcon from '@mui/icons-material/CalendarToday'
 import CheckCircleIcon from '@mui/icons-material/CheckCircle'
 
+// How often to check on a queued summary job
+const JOB_POLL_INTERVAL_MS = 1000;
+
 // Define interfaces for meeting data
 interface Meeting {
   meeting_id: string;
   id?: string; // Alternative ID field
-  metadata: {
+  metadata?: {
     meeting_name: string;
     name?: string; // Alternative name field
     attendees: string[];
@@ -140,7 +143,8 @@ function App() {
       
       // Add cache-busting query parameter with timestamp
       const timestamp = new Date().getTime();
-      const url = `http://localhost:3000/api/meetings?_=${timestamp}`;
+      // The sidebar only needs names, dates and flags, so ask for the compact view
+      const url = `http://localhost:3000/api/meetings?view=compact&_=${timestamp}`;
       
       const response = await fetch(url, {
         headers: {
@@ -167,28 +171,20 @@ function App() {
       // Process meeting data to ensure all fields are available
       const processedMeetings = data.meetings.map((meeting: any) => {
         // Check if meeting ID is valid
-        const id = meeting.meeting_id || meeting.id;
+        const id = meeting.id || meeting.meeting_id;
         if (!id || id === 'undefined' || id === 'null') {
           console.warn("Meeting with invalid ID found, skipping:", meeting);
           return null;
         }
         
-        // Ensure metadata is present
-        const metadata = meeting.metadata || {};
-        
         // Provide fallback values for required fields
         return {
           meeting_id: id,
-          metadata: {
-            meeting_name: metadata.meeting_name || metadata.name || `Meeting ${id.slice(0, 8)}`,
-            attendees: metadata.attendees || [],
-            meeting_date: metadata.meeting_date || metadata.date || 'Unknown date',
-            summary: metadata.summary || '',
-            transcript: metadata.transcript || '',
-            timestamp: metadata.timestamp || new Date().toISOString()
-          },
-          has_summary: metadata.summary && metadata.summary.length > 0,
-          score: meeting.score
+          name: meeting.name || `Meeting ${id.slice(0, 8)}`,
+          date: meeting.date || 'Unknown date',
+          attendees: meeting.attendees || [],
+          has_summary: meeting.has_summary === true,
+          has_enhanced_data: meeting.has_enhanced_data === true
         };
       }).filter(Boolean); // Remove any null entries
       
@@ -397,6 +393,7 @@ function App() {
       formData.append('emails', emails)
       formData.append('meeting_name', meetingName)
 
+      // The upload is stored right away and summarized by a background job
       const response = await fetch('http://localhost:3000/api/summarize', {
         method: 'POST',
         body: formData,
@@ -408,19 +405,39 @@ function App() {
         throw new Error(`Failed to get summary: ${response.status} ${errorText}`)
       }
 
-      const data = await response.json()
-      console.log("Received summary data:", data);
-      
-      const cleanedSummary = cleanMarkdownFromSummary(data.summary || '')
-      setSummary(cleanedSummary)
-      setTranscript(data.transcript || '')
-      setMeetingId(data.meeting_id || '')
-      
+      // Show the results step while the summary is generated
+      const job = await response.json()
+      // The response does not echo the transcript; show the file that was uploaded
+      setTranscript(await selectedFile.text())
+      setMeetingId(job.meeting_id || '')
       setTabValue(0)
-      setProcessingComplete(true)
+      setLoading(false)
       if (activeStep !== 2) {
         handleNext();
       }
+
+      // Poll the job, showing the partial summary as it grows
+      while (true) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+        const jobResponse = await fetch(`http://localhost:3000/api/jobs/${job.job_id}`)
+        if (!jobResponse.ok) {
+          const errorText = await jobResponse.text();
+          throw new Error(`Failed to get summary: ${jobResponse.status} ${errorText}`)
+        }
+        const status = await jobResponse.json()
+        if (status.status === 'succeeded') {
+          console.log("Received summary data:", status);
+          setSummary(cleanMarkdownFromSummary(status.summary || ''))
+          break
+        }
+        if (status.status === 'failed') {
+          throw new Error(`Failed to get summary: ${status.error || 'Summary job failed'}`)
+        }
+        if (status.partial_summary) {
+          setSummary(status.partial_summary)
+        }
+      }
+      setProcessingComplete(true)
       
       // Refresh the meetings list
       fetchPastMeetings();
@@ -584,7 +601,7 @@ function App() {
             </TabPanel>
             
             <TabPanel value={tabValue} index={1}>
-              <AIChatInterface transcript={transcript} />
+              <AIChatInterface transcript={transcript} meetingId={meetingId} />
             </TabPanel>
             
             <TabPanel value={tabValue} index={2}>
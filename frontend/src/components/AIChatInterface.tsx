@@ -12,6 +12,10 @@ import {
 import SendIcon from '@mui/icons-material/Send';
 import SmartToyIcon from '@mui/icons-material/SmartToy';
 import PersonIcon from '@mui/icons-material/Person';
+import { readEventStream } from '../sse';
+
+// Earlier messages sent with each question; the backend trims them further
+const MAX_HISTORY_MESSAGES = 10;
 
 interface Message {
   sender: 'user' | 'ai';
@@ -20,9 +24,10 @@ interface Message {
 
 interface AIChatInterfaceProps {
   transcript: string;  // Meeting transcript to use as context
+  meetingId?: string;  // Stored meeting; the backend answers from its passage index
 }
 
-const AIChatInterface: React.FC<AIChatInterfaceProps> = ({ transcript }) => {
+const AIChatInterface: React.FC<AIChatInterfaceProps> = ({ transcript, meetingId }) => {
   const [messages, setMessages] = useState<Message[]>([
     { 
       sender: 'ai', 
@@ -42,15 +47,20 @@ const AIChatInterface: React.FC<AIChatInterfaceProps> = ({ transcript }) => {
     setLoading(true);
 
     try {
-      // Send query to backend with transcript as context
-      const response = await fetch('http://localhost:3000/api/chat', {
+      // Send query to backend with transcript as context and stream the answer
+      const response = await fetch('http://localhost:3000/api/chat/stream', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json'
         },
+        // Only send the transcript when the meeting is not stored yet
         body: JSON.stringify({
           query: newMessage,
-          transcript: transcript
+          ...(meetingId ? { meeting_id: meetingId } : { transcript: transcript }),
+          history: messages.slice(1).slice(-MAX_HISTORY_MESSAGES).map(message => ({
+            role: message.sender,
+            text: message.text
+          }))
         })
       });
 
@@ -58,13 +68,31 @@ const AIChatInterface: React.FC<AIChatInterfaceProps> = ({ transcript }) => {
         throw new Error('Failed to get AI response');
       }
 
-      const data = await response.json();
-      
-      // Add AI response to chat
-      setMessages(prevMessages => [...prevMessages, {
-        sender: 'ai' as const,
-        text: data.response || 'Sorry, I could not process that request.'
-      }]);
+      // Add an empty AI message and grow it as tokens arrive
+      setMessages(prevMessages => [...prevMessages, { sender: 'ai' as const, text: '' }]);
+      setLoading(false);
+
+      const updateAnswer = (update: (text: string) => string) => {
+        setMessages(prevMessages => {
+          const last = prevMessages[prevMessages.length - 1];
+          return [...prevMessages.slice(0, -1), { ...last, text: update(last.text) }];
+        });
+      };
+
+      let streamError = false;
+      await readEventStream(response, ({ event, data }) => {
+        if (event === 'token') {
+          updateAnswer(text => text + data.text);
+        } else if (event === 'done') {
+          updateAnswer(() => data.response || 'Sorry, I could not process that request.');
+        } else if (event === 'error') {
+          streamError = true;
+        }
+      });
+
+      if (streamError) {
+        updateAnswer(() => 'Sorry, there was an error processing your request. Please try again.');
+      }
     } catch (error) {
       console.error('Error getting AI response:', error);
       setMessages(prevMessages => [...prevMessages, {
@@ -2,19 +2,21 @@ import { useEffect, useState } from 'react';
 import { Box, Typography, List, ListItem, ListItemText, Paper, Divider, CircularProgress, Button } from '@mui/material';
 import SummaryDisplay from './SummaryDisplay';
 
+// Compact list view: only what the sidebar renders
 interface Meeting {
-  id: number;
-  emails: string;
-  timestamp: string;
-  summary: string;
+  id: string;
+  name: string;
+  date: string;
+  attendees: string[];
+  has_summary: boolean;
 }
 
 interface MeetingDetail {
-  id: number;
+  id: string;
   transcript: string;
   summary: string;
-  emails: string;
-  timestamp: string;
+  attendees: string[];
+  date: string;
 }
 
 const MeetingHistory = () => {
@@ -26,18 +28,18 @@ const MeetingHistory = () => {
 
   useEffect(() => {
     setLoading(true);
-    fetch('http://localhost:3000/api/meetings')
+    fetch('http://localhost:3000/api/meetings?view=compact')
       .then(res => res.json())
-      .then(data => setMeetings(data))
+      .then(data => setMeetings(data.meetings || []))
       .catch(() => setError('Failed to fetch meetings'))
       .finally(() => setLoading(false));
   }, []);
 
-  const fetchMeetingDetail = (id: number) => {
+  const fetchMeetingDetail = (id: string) => {
     setDetailLoading(true);
-    fetch(`http://localhost:3000/api/meetings/${id}`)
+    fetch(`http://localhost:3000/api/meetings/${id}?fields=id,date,attendees,transcript,summary`)
       .then(res => res.json())
-      .then(data => setSelectedMeeting(data))
+      .then(data => setSelectedMeeting(data.meeting))
       .catch(() => setError('Failed to fetch meeting details'))
       .finally(() => setDetailLoading(false));
   };
@@ -56,8 +58,8 @@ const MeetingHistory = () => {
               <div key={meeting.id}>
                 <ListItem sx={{ cursor: 'pointer' }} onClick={() => fetchMeetingDetail(meeting.id)}>
                   <ListItemText
-                    primary={`Meeting #${meeting.id} - ${new Date(meeting.timestamp).toLocaleString()}`}
-                    secondary={`Emails: ${meeting.emails} | Preview: ${meeting.summary}`}
+                    primary={`${meeting.name} - ${new Date(meeting.date).toLocaleString()}`}
+                    secondary={`Attendees: ${meeting.attendees.join(', ')}${meeting.has_summary ? ' | Summarized' : ''}`}
                   />
                 </ListItem>
                 <Divider />
@@ -70,8 +72,8 @@ const MeetingHistory = () => {
       {selectedMeeting && !detailLoading && (
         <Paper sx={{ p: 3, mt: 2 }}>
           <Typography variant="h6" gutterBottom>Meeting Details</Typography>
-          <Typography variant="subtitle2" gutterBottom>Timestamp: {new Date(selectedMeeting.timestamp).toLocaleString()}</Typography>
-          <Typography variant="subtitle2" gutterBottom>Emails: {selectedMeeting.emails}</Typography>
+          <Typography variant="subtitle2" gutterBottom>Date: {new Date(selectedMeeting.date).toLocaleString()}</Typography>
+          <Typography variant="subtitle2" gutterBottom>Attendees: {selectedMeeting.attendees.join(', ')}</Typography>
           <Typography variant="subtitle2" gutterBottom>Transcript:</Typography>
           <Paper sx={{ p: 2, mb: 2, backgroundColor: '#f5f5f5' }}>
             <Typography variant="body2" sx={{ whiteSpace: 'pre-wrap' }}>{selectedMeeting.transcript}</Typography>